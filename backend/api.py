@@ -1,11 +1,60 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from main import load_data, add_features, run_trend_analysis, run_monte_carlo
-from genai_explainer import generate_explanation
+from main import analyze_frame_async, load_many
+from llm_cache import explanations, news_cache, NEWS_REFRESH_SECONDS
+from insights import insight_queue
+from snapshots import snapshot_scheduler
+from live import Subscription, live_hub
+from fundamentals import format_overview, fundamentals_store
 # 1. IMPORT THE BACKTESTER
 from backtester import run_backtest_strategy
-import yfinance as yf
-app = FastAPI()
+from pydantic import BaseModel, Field
+from bar_store import get_store
+from model_registry import get_registry
+from workers import pools
+from singleflight import coalesce, flights
+import shared_cache
+from serialization import FastJSONResponse, dumps, table
+from downsampling import DEFAULT_POINTS, downsample_indices
+from columnar import format_dates
+from metrics import REQUEST_SECONDS, REQUESTS, render, server_timing, span, start_profile
+import asyncio
+import json
+import os
+import time
+import numpy as np
+
+
+@asynccontextmanager
+async def lifespan(app):
+    insight_queue.start()
+    news_task = asyncio.create_task(news_cache.run_forever()) if NEWS_REFRESH_SECONDS > 0 else None
+    snapshot_task = asyncio.create_task(snapshot_scheduler.run_forever()) if snapshot_scheduler.universe else None
+    fundamentals_task = (asyncio.create_task(fundamentals_store.run_forever(snapshot_scheduler.universe))
+                         if snapshot_scheduler.universe else None)
+    yield
+    for task in (news_task, snapshot_task, fundamentals_task):
+        if task:
+            task.cancel()
+    live_hub.stop()
+    insight_queue.stop()
+    pools.shutdown()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
+
+def encoded(result):
+    """
+    Pre-encodes a successful result so FastAPI skips jsonable_encoder and
+    coalesced callers share the encoded bytes. Errors stay plain dicts
+    (and are therefore not cached).
+    """
+    if isinstance(result, dict) and "error" in result:
+        return result
+    with span("serialization"):
+        return FastJSONResponse(result)
 
 # ==========================================
 #  CORS CONFIGURATION
@@ -23,21 +72,51 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# ==========================================
+#  INSTRUMENTATION
+#  Add ?profile=1 (or an X-Profile header) to any request to get its
+#  stage breakdown back in a Server-Timing header.
+# ==========================================
+@app.middleware("http")
+async def instrument(request, call_next):
+    profile = None
+    if request.query_params.get("profile") in ("1", "true") or request.headers.get("x-profile"):
+        profile = start_profile()
+
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    REQUEST_SECONDS.observe(elapsed, route=path)
+    REQUESTS.inc(route=path, status=response.status_code)
+
+    if profile is not None:
+        profile.append(("total", elapsed))
+        response.headers["Server-Timing"] = server_timing(profile)
+    return response
+
 # ==========================================
 #  ENDPOINT 1: REAL-TIME ANALYSIS (Trend Tab)
 # ==========================================
 @app.get("/technical/{ticker}")
-def technical_analysis(ticker: str):
+@coalesce("technical", ttl=30)
+async def technical_analysis(ticker: str, wait_for_insight: bool = False):
+    """
+    Returns the ML + Monte Carlo result right away. The AI insight is
+    generated in the background and streamed from `insight_url`
+    (ai_insight is filled in directly when it is already cached).
+    wait_for_insight=true restores the old blocking behaviour.
+    """
     try:
-        df = load_data(ticker)
-        df = add_features(df)
+        # Precomputed snapshot for universe tickers, otherwise computed now
+        trend, mc = await snapshot_scheduler.get(ticker)
 
-        trend = run_trend_analysis(df)
-        mc = run_monte_carlo(df)
-
-        ai_text = generate_explanation({
+        job = insight_queue.submit({
             "trend": trend["trend"],
             "signal": trend["signal"],
             "confidence": trend["confidence"],
@@ -45,69 +124,229 @@ def technical_analysis(ticker: str):
             "risk_lower": mc["lower"],
             "risk_upper": mc["upper"]
         })
+        if wait_for_insight:
+            await job.wait()
 
         return {
             "trend": trend["trend"],
             "confidence": trend["confidence"],
             "signal": trend["signal"],
-            "ai_insight": ai_text
+            "ai_insight": job.text if job.done else None,
+            "insight_url": f"/insight/{job.id}"
         }
     except Exception as e:
         return {"error": str(e)}
 
+# ==========================================
+#  AI INSIGHT STREAM (Server-Sent Events)
+# ==========================================
+@app.get("/insight/{insight_id}")
+async def stream_insight(insight_id: str):
+    """
+    Relays explanation chunks as they arrive:
+    'token' events carry text chunks, a final 'done' event carries the full text.
+    """
+    job = insight_queue.get(insight_id)
+
+    async def events():
+        if job is None:
+            yield "event: done\ndata: " + json.dumps("AI insight expired. Please refresh the analysis.") + "\n\n"
+            return
+        async for chunk in job.stream():
+            yield "event: token\ndata: " + json.dumps(chunk) + "\n\n"
+        yield "event: done\ndata: " + json.dumps(job.text) + "\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+# ==========================================
+#  MODEL CACHE STATS
+# ==========================================
+@app.get("/stats/model-cache")
+async def model_cache_stats():
+    return get_registry().stats()
+
+@app.get("/stats/workers")
+async def worker_stats():
+    return pools.stats()
+
+@app.get("/stats/coalescing")
+async def coalescing_stats():
+    return flights.stats()
+
+@app.get("/stats/snapshots")
+async def snapshot_stats():
+    return snapshot_scheduler.stats()
+
+@app.get("/stats/fundamentals")
+async def fundamentals_stats():
+    return fundamentals_store.stats()
+
+@app.get("/stats/live")
+async def live_stats():
+    return live_hub.stats()
+
+@app.get("/stats/shared-cache")
+async def shared_cache_stats():
+    return await pools.run_io(shared_cache.stats)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Prometheus scrape endpoint: stage/request histograms plus cache and
+    pool gauges sampled now.
+    """
+    workers = pools.stats()
+    coalescing = flights.stats()
+    models = get_registry().stats()
+    llm = explanations.stats()
+    snapshots = snapshot_scheduler.stats()
+    fundamentals = fundamentals_store.stats()
+
+    gauges = {
+        "in_flight": [({"pool": kind}, v["in_flight"]) for kind, v in workers.items()],
+        "pool_limit": [({"pool": kind}, v["limit"]) for kind, v in workers.items()],
+        "cache_hit_ratio": [
+            ({"cache": "coalescing"}, coalescing["coalescing_ratio"]),
+            ({"cache": "model"}, models["hit_rate"]),
+            ({"cache": "explanation"}, llm["coalescing_ratio"]),
+            ({"cache": "fundamentals"}, fundamentals["hit_rate"]),
+        ],
+        "cache_entries": [
+            ({"cache": "coalescing"}, coalescing["cached_results"]),
+            ({"cache": "model"}, models["entries"]),
+            ({"cache": "explanation"}, llm["cached_results"]),
+            ({"cache": "fundamentals"}, fundamentals["tickers"]),
+        ],
+        "model_cache_bytes": [({}, models["bytes"])],
+        "snapshots_fresh": [({}, snapshots["fresh"])],
+        "snapshots_universe": [({}, snapshots["universe"])],
+    }
+    return PlainTextResponse(render(gauges), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/llm-cache")
+async def llm_cache_stats():
+    return {"explanations": explanations.stats(), "news": news_cache.stats()}
+
 # ==========================================
 #  ENDPOINT 2: BACKTEST SIMULATOR (Backtest Tab)
 # ==========================================
 @app.get("/backtest/{ticker}")
-def backtest_analysis(ticker: str, period: str = "6mo"):
+@coalesce("backtest", ttl=300)
+async def backtest_analysis(ticker: str, period: str = "6mo", training_mode: str = "full",
+                      max_train_rows: int = None, layout: str = "records",
+                      points: int = Query(DEFAULT_POINTS, ge=0), downsample: str = "lttb",
+                      trade_offset: int = None, trade_limit: int = 50):
     """
     Runs the Hybrid ML Backtest.
     Example: /backtest/RELIANCE?period=1y
+    training_mode: full | warm | online, max_train_rows: sliding training window
+    layout: records | columns (chart_data as parallel arrays)
+    points: max chart points (0 = every bar), downsample: lttb | minmax
+    trade_offset / trade_limit: page through the trade log (default: last 50
+    events, trade_limit=0 for all); tradeLogPage.total is the full count
     """
     try:
         # Calls the function from backtester.py
         # The function now returns { chart_data, stats, tradeLog, summary }
         # We pass this dictionary directly to the frontend
-        result = run_backtest_strategy(ticker, period=period)
-        return result
+        result = await pools.run_cpu(
+            run_backtest_strategy, ticker, period=period,
+            training_mode=training_mode, max_train_rows=max_train_rows, layout=layout,
+            points=points, downsample=downsample,
+            trade_offset=trade_offset, trade_limit=trade_limit
+        )
+        return encoded(result)
+    except Exception as e:
+        return {"error": str(e)}
+
+# ==========================================
+#  PARAMETER SWEEP (grid backtests across cores)
+#  Example body: {"tickers": ["RELIANCE", "TCS"],
+#                 "grid": {"rsi_upper": [65, 70], "retrain_frequency": [25, 50]}}
+# ==========================================
+class SweepRequest(BaseModel):
+    tickers: list[str]
+    grid: dict = {}
+    period: str = "6mo"
+    initial_capital: float = 100000
+    rank_by: str = "profitPercent"
+    top: int = 100
+
+
+@app.post("/sweep")
+async def backtest_sweep(request: SweepRequest):
+    try:
+        from sweep import run_sweep
+
+        return await run_sweep(
+            request.tickers, request.grid,
+            period=request.period, initial_capital=request.initial_capital,
+            rank_by=request.rank_by, top=request.top
+        )
+    except Exception as e:
+        return {"error": str(e)}
+
+class PortfolioRequest(BaseModel):
+    tickers: list[str]
+    period: str = "6mo"
+    initial_capital: float = 1000000
+    cost_bps: float = 10
+    slippage_bps: float = 5
+    max_weight: float = None
+    rebalance_every: int = 0
+    rebalance_band: float = 0.25
+    lot_size: int = 1
+    strategy: dict = {}
+    layout: str = "records"
+    points: int = Field(DEFAULT_POINTS, ge=0)
+    downsample: str = "lttb"
+
+
+@app.post("/portfolio/backtest")
+async def portfolio_backtest(request: PortfolioRequest):
+    """
+    Rebalanced portfolio backtest over up to 200 tickers. The response has
+    the equity curve, stats and per-name attribution; the full trade log
+    is downloaded from `tradeLogUrl`.
+    """
+    try:
+        from portfolio import run_portfolio_backtest
+
+        return encoded(await run_portfolio_backtest(
+            request.tickers, period=request.period,
+            initial_capital=request.initial_capital, cost_bps=request.cost_bps,
+            slippage_bps=request.slippage_bps, max_weight=request.max_weight,
+            rebalance_every=request.rebalance_every, rebalance_band=request.rebalance_band,
+            lot_size=request.lot_size,
+            layout=request.layout, points=request.points, downsample=request.downsample,
+            **request.strategy
+        ))
     except Exception as e:
         return {"error": str(e)}
 
+
+@app.get("/portfolio/trades/{run_id}")
+async def portfolio_trades(run_id: str):
+    from portfolio import trade_log_path
+
+    path = trade_log_path(run_id)
+    if path is None or not os.path.exists(path):
+        return {"error": "Trade log not found"}
+    return FileResponse(path, media_type="text/csv", filename=f"trades_{run_id}.csv")
+
 # ==========================================
 #  ENDPOINT 3: COMPANY OVERVIEW (New!)
 # ==========================================
+async def fetch_overview(ticker):
+    # Per-field TTLs: prices stay fresh, static fields come from the store
+    return format_overview(await fundamentals_store.get(ticker))
+
+
 @app.get("/overview/{ticker}")
-def get_company_overview(ticker: str):
+async def get_company_overview(ticker: str):
     try:
-        if not ticker.endswith(".NS"):
-            ticker = ticker + ".NS"
-            
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        # Extract safely (handle missing data)
-        current_price = info.get("currentPrice") or info.get("regularMarketPrice") or 0
-        prev_close = info.get("previousClose") or 0
-        market_cap = info.get("marketCap") or 0
-        pe_ratio = info.get("trailingPE") or 0
-        high_52 = info.get("fiftyTwoWeekHigh") or 0
-        low_52 = info.get("fiftyTwoWeekLow") or 0
-        description = info.get("longBusinessSummary") or "No description available."
-        
-        # Calculate change
-        price_change = current_price - prev_close
-        change_percent = (price_change / prev_close) * 100 if prev_close else 0
-        
-        return {
-            "current_price": round(current_price, 2),
-            "price_change": round(price_change, 2),
-            "change_percent": round(change_percent, 2),
-            "market_cap": market_cap,
-            "pe_ratio": round(pe_ratio, 2) if pe_ratio else "N/A",
-            "high_52": round(high_52, 2),
-            "low_52": round(low_52, 2),
-            "description": description
-        }
+        return await fetch_overview(ticker)
     except Exception as e:
         return {"error": str(e)}    
 # ... existing imports ...
@@ -115,85 +354,238 @@ def get_company_overview(ticker: str):
 # ==========================================
 #  ENDPOINT 4: HISTORICAL DATA (New!)
 # ==========================================
-@app.get("/history/{ticker}")
-def get_stock_history(ticker: str, period: str = "1y"):
-    try:
-        if not ticker.endswith(".NS"):
-            ticker = ticker + ".NS"
-            
-        # Fetch daily data
-        df = yf.download(ticker, period=period, interval="1d", progress=False)
+def fetch_history(ticker, period, layout="records", points=DEFAULT_POINTS, downsample="lttb"):
+    if not ticker.endswith(".NS"):
+        ticker = ticker + ".NS"
         
-        if df.empty:
-            return {"error": "No historical data found"}
-            
-        # Clean up data for frontend
-        df = df[["Close"]].reset_index()
-        df.columns = ["Date", "Close"] # Rename for simplicity
-        
-        # Convert to list of dictionaries
-        history_data = []
-        for index, row in df.iterrows():
-            history_data.append({
-                "date": row["Date"].strftime("%Y-%m-%d"),
-                "close": round(row["Close"], 2)
-            })
-            
-        return history_data
+    # Daily bars as memory-mapped column slices from the shared bar store
+    series = get_store().get_arrays(ticker, interval="1d", period=period)
+    return serialize_history(series, layout, points, downsample)
+
+
+def serialize_history(series, layout="records", points=DEFAULT_POINTS, downsample="lttb"):
+    if series is None or len(series) == 0:
+        return {"error": "No historical data found"}
         
+    # Keep at most `points` closes, then format whole columns at once
+    rows = downsample_indices(series.ts, [series["Close"]], points=points, method=downsample)
+    dates = format_dates(series.ts[rows], series.tz, unit="D")
+    return table({"date": dates, "close": np.round(series["Close"][rows], 2)}, layout)
+
+
+@app.get("/history/{ticker}")
+@coalesce("history", ttl=60)
+async def get_stock_history(ticker: str, period: str = "1y", layout: str = "records",
+                            points: int = Query(DEFAULT_POINTS, ge=0), downsample: str = "lttb"):
+    """
+    layout: records ([{date, close}, ...]) | columns ({date: [...], close: [...]})
+    points: max points returned (0 = every bar), downsample: lttb | minmax
+    """
+    try:
+        return encoded(await pools.run_io(fetch_history, ticker, period, layout, points, downsample))
     except Exception as e:
         return {"error": str(e)}
-import google.generativeai as genai
-import json
-import os
 
-# Ensure your API Key is loaded
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# ==========================================
+#  BATCH ENDPOINTS (one line of JSON per ticker, streamed as ready)
+#  Example: /batch/technical?tickers=RELIANCE,TCS,INFY
+# ==========================================
+MAX_BATCH_TICKERS = 200
+
+
+def _parse_tickers(tickers, limit=MAX_BATCH_TICKERS):
+    symbols = []
+    for t in tickers.split(","):
+        t = t.strip().upper()
+        if t:
+            symbols.append(t if t.endswith(".NS") else t + ".NS")
+    return list(dict.fromkeys(symbols))[:limit]
+
+
+def _stream_per_ticker(symbols, compute):
+    """
+    Runs compute(ticker) for every ticker concurrently and yields
+    NDJSON lines in completion order.
+    """
+    async def one(ticker):
+        try:
+            return {"ticker": ticker, "result": await compute(ticker)}
+        except Exception as e:
+            return {"ticker": ticker, "error": str(e)}
+
+    async def lines():
+        for finished in asyncio.as_completed([one(t) for t in symbols]):
+            yield dumps(await finished) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _load_failed(error):
+    # compute() for a batch whose grouped load failed: every ticker
+    # still gets its own NDJSON line, reporting the load error
+    async def compute(ticker):
+        raise ValueError(f"Data load failed: {error}")
+    return compute
+
+
+@app.get("/batch/technical")
+async def batch_technical(tickers: str):
+    """
+    Trend, confidence, signal and risk range for many tickers.
+    Bars are loaded with one grouped refresh; no AI insight in batch mode.
+    """
+    symbols = _parse_tickers(tickers)
+    try:
+        frames = await pools.run_io(load_many, symbols)
+    except Exception as e:
+        return _stream_per_ticker(symbols, _load_failed(e))
+
+    async def compute(ticker):
+        df = frames.get(ticker)
+        if df is None or df.empty:
+            raise ValueError("Invalid ticker or no data available")
+        trend, mc = snapshot_scheduler.lookup(ticker) or await analyze_frame_async(ticker, df)
+        return {
+            "trend": trend["trend"],
+            "confidence": trend["confidence"],
+            "signal": trend["signal"],
+            "rsi": trend["rsi"],
+            "price": trend["price"],
+            "risk_range": {"lower": mc["lower"], "upper": mc["upper"]}
+        }
+
+    return _stream_per_ticker(symbols, compute)
+
+
+@app.get("/screen")
+async def screen(tickers: str = "", interval: str = "1h", period: str = "30d"):
+    """
+    Trend, confidence and RSI-confirmed signal for up to 1000 tickers
+    (default: the snapshot universe) from one batched model fit. No risk
+    range or AI insight; `stats` reports tickers per second.
+    """
+    try:
+        from screener import MAX_SCREEN_TICKERS, load_closes, screen_series
+
+        symbols = (_parse_tickers(tickers, MAX_SCREEN_TICKERS) if tickers.strip()
+                   else snapshot_scheduler.universe[:MAX_SCREEN_TICKERS])
+        if not symbols:
+            return {"error": "No tickers given and no snapshot universe configured"}
+
+        start = time.perf_counter()
+        closes = await pools.run_io(load_closes, symbols, interval, period)
+        load_seconds = time.perf_counter() - start
+
+        report = await pools.run_cpu(screen_series, closes)
+        report["stats"]["load_seconds"] = round(load_seconds, 4)
+        return encoded(report)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@app.get("/batch/overview")
+async def batch_overview(tickers: str):
+    symbols = _parse_tickers(tickers)
+
+    async def compute(ticker):
+        return await fetch_overview(ticker)
+
+    return _stream_per_ticker(symbols, compute)
+
+
+@app.get("/batch/history")
+async def batch_history(tickers: str, period: str = "1y", layout: str = "records",
+                        points: int = Query(DEFAULT_POINTS, ge=0), downsample: str = "lttb"):
+    symbols = _parse_tickers(tickers)
+    try:
+        series = await pools.run_io(get_store().get_many_arrays, symbols, "1d", period)
+    except Exception as e:
+        return _stream_per_ticker(symbols, _load_failed(e))
+
+    async def compute(ticker):
+        return serialize_history(series[ticker], layout, points, downsample)
+
+    return _stream_per_ticker(symbols, compute)
 
 # ==========================================
 #  ENDPOINT 5: AI-SIMULATED LIVE TICKER
 # ==========================================
 @app.get("/news/ticker")
-def live_market_ticker():
+async def live_market_ticker():
     """
-    Uses Gemini to generate realistic 'Live' Indian market headlines.
+    Gemini-generated 'Live' Indian market headlines, served from a shared
+    cache that is refreshed in the background.
     """
-    try:
-        # We use Gemini Flash for speed
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
-        prompt = """
-        Generate 8 short, realistic "breaking news" headlines for the Indian Stock Market (Nifty 50, Sensex, Bank Nifty, and top stocks like Reliance/TCS).
-        
-        Requirements:
-        1. Mix of Positive (Bullish), Negative (Bearish), and Neutral news.
-        2. Keep headlines under 10 words.
-        3. Output strictly valid JSON format.
-        
-        Output Structure:
-        [
-            {"title": "Nifty reclaims 22,000 mark amid heavy buying", "sentiment": "positive"},
-            {"title": "TCS shares dip 2% after quarterly results miss", "sentiment": "negative"}
-        ]
-        
-        Return ONLY the JSON array. No markdown formatting.
-        """
-        
-        response = model.generate_content(prompt)
-        
-        # Clean the response text (remove markdown backticks if Gemini adds them)
-        cleaned_text = response.text.strip().replace("```json", "").replace("```", "")
-        
-        data = json.loads(cleaned_text)
-        return data
+    return await news_cache.get()
 
-    except Exception as e:
-        print(f"AI Error: {e}")
-        # Reliable Fallback if AI fails
-        return [
-            {"title": "Sensex rallies 500 points on global cues", "sentiment": "positive"},
-            {"title": "Banking stocks under pressure ahead of RBI policy", "sentiment": "negative"},
-            {"title": "Rupee opens flat against US Dollar", "sentiment": "neutral"},
-            {"title": "Reliance Industries hits fresh 52-week high", "sentiment": "positive"},
-            {"title": "FIIs sell equities worth ₹2,000 Cr on Monday", "sentiment": "negative"}
-        ]
\ No newline at end of file
+
+# ==========================================
+#  ENDPOINT 6: LIVE SIGNAL UPDATES
+# ==========================================
+@app.get("/live")
+async def live_stream(tickers: str):
+    """
+    Server-Sent Events: an 'update' event with the current signal of each
+    ticker, then one whenever a new bar arrives. Updates come from
+    streaming indicators and the cached model, computed once per ticker
+    and bar for all subscribers.
+    """
+    subscription = Subscription()
+    errors = await live_hub.subscribe(subscription, tickers.split(","))
+    if not subscription.tickers:
+        return {"error": "No valid tickers", "errors": errors}
+
+    async def events():
+        try:
+            if errors:
+                yield "event: error\ndata: " + json.dumps(errors) + "\n\n"
+            while True:
+                yield "event: update\ndata: " + await subscription.next() + "\n\n"
+        finally:
+            live_hub.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+@app.websocket("/ws/live")
+async def live_socket(websocket: WebSocket, tickers: str = ""):
+    """
+    WebSocket version of /live. Send {"subscribe": [...]} or
+    {"unsubscribe": [...]} to change the ticker set; updates arrive as
+    {"type": "update", ...} and rejected tickers as {"type": "error", ...}.
+    """
+    await websocket.accept()
+    subscription = Subscription()
+
+    async def change(subscribe=(), unsubscribe=()):
+        live_hub.unsubscribe(subscription, unsubscribe)
+        errors = await live_hub.subscribe(subscription, subscribe)
+        if errors:
+            await websocket.send_text(json.dumps({"type": "error", "errors": errors}))
+
+    async def receive():
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                await change(message.get("subscribe", ()), message.get("unsubscribe", ()))
+            except (ValueError, AttributeError, TypeError):
+                await websocket.send_text(json.dumps({"type": "error", "errors": {"message": "Expected {\"subscribe\": [...]} or {\"unsubscribe\": [...]}"}}))
+
+    async def send():
+        while True:
+            await websocket.send_text(await subscription.next())
+
+    tasks = []
+    try:
+        await change(subscribe=tickers.split(",") if tickers else ())
+        tasks = [asyncio.create_task(receive()), asyncio.create_task(send())]
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        live_hub.unsubscribe(subscription)
@@ -1,182 +1,328 @@
-import pandas as pd
 import numpy as np
-import yfinance as yf
-from sklearn.linear_model import LogisticRegression
-from sklearn.preprocessing import StandardScaler
+from bar_store import BAR_COLUMNS, get_store
+from columnar import format_dates
+from downsampling import DEFAULT_POINTS, downsample_indices
+from training import TrendModel
+from features import FEATURE_NAMES, compute_features, target_labels
+from serialization import records, table
+from metrics import span
 
 # =====================================================
-# FEATURE ENGINEERING (Same as main.py)
+# DEFAULT STRATEGY PARAMETERS
 # =====================================================
-def add_features(df):
-    df["Return"] = df["Close"].pct_change()
-    df["MA3"] = df["Close"].rolling(3).mean()
-    df["MA6"] = df["Close"].rolling(6).mean()
-    df["Price_vs_MA"] = df["Close"] - df["MA3"]
-    df["Momentum"] = df["Close"] - df["Close"].shift(3)
-    
-    # RSI Calculation
-    delta = df["Close"].diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-    avg_gain = gain.rolling(14).mean()
-    avg_loss = loss.rolling(14).mean()
-    rs = avg_gain / avg_loss
-    df["RSI"] = 100 - (100 / (1 + rs))
-    
-    # Target for training (Did price go up next hour?)
-    df["Target"] = (df["Close"].shift(-1) > df["Close"]).astype(int)
-    
-    return df.dropna()
+FEATURE_COLS = ["Return", "MA3", "MA6", "Price_vs_MA", "Momentum"]
+START_INDEX = 100
+RETRAIN_FREQUENCY = 50
+RSI_UPPER = 70
+RSI_LOWER = 30
+TRADE_QUANTITY = 10
+TRADE_LOG_LIMIT = 50
+
+# =====================================================
+# WALK-FORWARD SIGNALS
+# =====================================================
+def rsi_signals(predictions, rsi, rsi_upper=RSI_UPPER, rsi_lower=RSI_LOWER):
+    """
+    Applies the RSI confirmation rules: 1 = BUY, -1 = SELL, 0 = HOLD.
+    """
+    buy = (predictions == 1) & (rsi < rsi_upper)
+    sell = (predictions == 0) & (rsi > rsi_lower)
+    return np.where(buy, 1, np.where(sell, -1, 0))
+
+
+def walk_forward_predictions(X, y, start_index=START_INDEX, retrain_frequency=RETRAIN_FREQUENCY,
+                             training_mode="full", max_train_rows=None):
+    """
+    Retrains every `retrain_frequency` rows on all rows before the block,
+    then predicts the whole block in one call. See training.TrendModel
+    for the training modes.
+    """
+    n = len(X)
+    predictions = np.zeros(n, dtype=int)
+    model = TrendModel(mode=training_mode, max_train_rows=max_train_rows)
+
+    for block_start in range(start_index, n, retrain_frequency):
+        block_end = min(block_start + retrain_frequency, n)
+
+        with span("fit"):
+            model.update(X[:block_start], y[:block_start])
+        with span("predict"):
+            predictions[block_start:block_end] = model.predict(X[block_start:block_end])
+
+    return predictions
+
+
+def walk_forward_signals(X, y, rsi, start_index=START_INDEX, retrain_frequency=RETRAIN_FREQUENCY,
+                         training_mode="full", max_train_rows=None,
+                         rsi_upper=RSI_UPPER, rsi_lower=RSI_LOWER):
+    """
+    Walk-forward predictions confirmed by RSI. Rows before `start_index`
+    get signal 0.
+    """
+    predictions = walk_forward_predictions(
+        X, y, start_index=start_index, retrain_frequency=retrain_frequency,
+        training_mode=training_mode, max_train_rows=max_train_rows
+    )
+    signals = rsi_signals(predictions, rsi, rsi_upper, rsi_lower)
+    signals[:start_index] = 0
+    return signals
+
+
+def feature_arrays(close, extra_columns=()):
+    """
+    Features and next-bar targets for an array of closes, with warm-up rows
+    (NaN in any feature or extra column) dropped like DataFrame.dropna.
+    Returns (valid mask, {name: array}, target).
+    """
+    with span("features"):
+        features = compute_features(close)
+        target = target_labels(close)
+        columns = [features[name] for name in FEATURE_NAMES] + list(extra_columns)
+        valid = ~np.isnan(np.column_stack(columns)).any(axis=1)
+    return valid, {name: values[valid] for name, values in features.items()}, target[valid]
+
+
+def pair_trades(signal, start_index=START_INDEX):
+    """
+    Entry/exit bar indices of long trades: entries where the signal turns
+    to BUY, exits where it leaves BUY. A trade still open at the end has no exit.
+    """
+    signal = np.asarray(signal)
+    prev = np.concatenate([[0], signal[:-1]])
+    idx = np.arange(len(signal))
+
+    entries = idx[(signal == 1) & (prev != 1) & (idx >= start_index)]
+    exits = idx[(signal != 1) & (prev == 1) & (idx >= start_index)]
+    return entries, exits[:len(entries)]
+
+# =====================================================
+# TRADE STATISTICS (whole trade log in one pass)
+# =====================================================
+SECONDS_PER_YEAR = 365.25 * 24 * 60 * 60
+
+# Holding-time histogram edges, in bars
+HOLDING_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+HOLDING_LABELS = ("1", "2-3", "4-7", "8-15", "16-31", "32-63", "64+")
+
+
+def max_drawdown(values):
+    """
+    Largest peak-to-trough fall of an equity curve, in percent (<= 0).
+    """
+    values = np.asarray(values, dtype=float)
+    if not len(values):
+        return 0.0
+    return float((values / np.maximum.accumulate(values) - 1).min() * 100)
+
+
+def risk_ratios(returns, timestamps):
+    """
+    Annualized (Sharpe, Sortino) of per-bar returns, with zero risk-free
+    rate. Bars per year are measured from the timestamps, so hourly bars
+    with market-hours gaps are scaled correctly.
+    """
+    returns = np.asarray(returns, dtype=float)
+    years = (timestamps[-1] - timestamps[0]) / SECONDS_PER_YEAR if len(timestamps) > 1 else 0
+    if len(returns) < 2 or years <= 0:
+        return 0.0, 0.0
+
+    scale = np.sqrt((len(returns) - 1) / years)
+    mean = returns.mean()
+    std = returns.std(ddof=1)
+    downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2))
+    sharpe = mean / std * scale if std > 0 else 0.0
+    sortino = mean / downside * scale if downside > 0 else 0.0
+    return float(sharpe), float(sortino)
+
+
+def trade_statistics(signal, prices, strategy_returns, strategy_value, timestamps,
+                     start_index=START_INDEX, quantity=TRADE_QUANTITY):
+    """
+    Pairs entries and exits and summarises every closed trade together
+    with the curve-based risk figures. Returns (trades, stats): `trades`
+    holds per-trade arrays (entry/exit bar, pnl, holding bars).
+    """
+    entries, exits = pair_trades(signal, start_index)
+    closed = entries[:len(exits)]
+    pnl = (prices[exits] - prices[closed]) * quantity
+    holding = exits - closed
+
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl < 0]
+    active = slice(start_index, None)
+    sharpe, sortino = risk_ratios(strategy_returns[active], timestamps[active])
+
+    # Position held during bar t is the signal of bar t-1
+    position = np.asarray(signal)[start_index:-1] if len(signal) > start_index else np.array([])
+
+    if len(holding):
+        percentiles = np.percentile(holding, [10, 25, 50, 75, 90])
+        counts = np.bincount(np.searchsorted(HOLDING_BUCKETS, holding, side="right"),
+                             minlength=len(HOLDING_BUCKETS) + 1)[1:]
+    else:
+        percentiles = np.zeros(5)
+        counts = np.zeros(len(HOLDING_BUCKETS), dtype=int)
+
+    stats = {
+        "totalTrades": int(len(exits)),
+        "openTrade": bool(len(entries) > len(exits)),
+        "winRate": round(float(len(wins) / len(pnl) * 100), 1) if len(pnl) else 0,
+        "tradePnL": round(float(pnl.sum()), 2),
+        "avgWin": round(float(wins.mean()), 2) if len(wins) else 0,
+        "avgLoss": round(float(losses.mean()), 2) if len(losses) else 0,
+        "profitFactor": round(float(wins.sum() / -losses.sum()), 2) if len(losses) else None,
+        "maxDrawdownPercent": round(max_drawdown(strategy_value[active]), 2),
+        "sharpe": round(sharpe, 2),
+        "sortino": round(sortino, 2),
+        "exposurePercent": round(float((position != 0).mean() * 100), 1) if len(position) else 0,
+        "longExposurePercent": round(float((position == 1).mean() * 100), 1) if len(position) else 0,
+        "holdingBars": {
+            "mean": round(float(holding.mean()), 2) if len(holding) else 0,
+            "p10": float(percentiles[0]),
+            "p25": float(percentiles[1]),
+            "median": float(percentiles[2]),
+            "p75": float(percentiles[3]),
+            "p90": float(percentiles[4]),
+            "max": int(holding.max()) if len(holding) else 0,
+            "histogram": dict(zip(HOLDING_LABELS, counts.tolist()))
+        }
+    }
+    trades = {"entries": entries, "exits": exits, "pnl": pnl, "holding": holding}
+    return trades, stats
+
+def trade_page(total, offset=None, limit=TRADE_LOG_LIMIT):
+    """
+    [first, last) event range for one page of the trade log. offset=None
+    selects the last `limit` events; limit=0 selects everything from offset.
+    """
+    if offset is None:
+        first = max(total - limit, 0) if limit > 0 else 0
+    else:
+        first = min(max(offset, 0), total)
+    last = total if limit <= 0 else min(first + limit, total)
+    return first, last
 
 # =====================================================
 # BACKTEST ENGINE
 # =====================================================
-def run_backtest_strategy(ticker, period="6mo", initial_capital=100000):
-    # 1. Fetch Data
+def run_backtest_strategy(ticker, period="6mo", initial_capital=100000,
+                          training_mode="full", max_train_rows=None,
+                          start_index=START_INDEX, retrain_frequency=RETRAIN_FREQUENCY,
+                          rsi_upper=RSI_UPPER, rsi_lower=RSI_LOWER,
+                          feature_cols=None, quantity=TRADE_QUANTITY, layout="records",
+                          points=DEFAULT_POINTS, downsample="lttb",
+                          trade_offset=None, trade_limit=TRADE_LOG_LIMIT):
+    """
+    layout="columns" returns chart_data as parallel arrays instead of row records.
+    points caps the chart size (0 = every bar); downsample is "lttb" or "minmax".
+    tradeLog holds `trade_limit` events from `trade_offset` (default: the
+    last ones; trade_limit=0 returns the whole log).
+    """
+    # 1. Fetch Data (memory-mapped column views, no DataFrame copy)
     if not ticker.endswith(".NS"):
         ticker = ticker + ".NS"
         
-    df = yf.download(ticker, period=period, interval="1h", progress=False)
+    with span("data"):
+        bars = get_store().get_arrays(ticker, interval="1h", period=period)
     
-    if df.empty:
+    if bars is None or len(bars) == 0:
         return {"error": "No data found"}
-        
-    # Flatten columns fix
-    df.columns = df.columns.get_level_values(0)
-    df.reset_index(inplace=True)
-
-    # Date Column Standardization
-    if 'Datetime' in df.columns:
-        df.rename(columns={'Datetime': 'Date'}, inplace=True)
     
-    # 2. Add AI Features
-    df = add_features(df)
+    # 2. Add AI Features (drop warm-up rows, like DataFrame.dropna)
+    valid, features, target = feature_arrays(bars["Close"], [bars[c] for c in BAR_COLUMNS])
+    prices = bars["Close"][valid]
+    timestamps = bars.ts[valid]
+    returns = features["Return"]
     
     # 3. Setup Backtest Variables
-    feature_cols = ["Return", "MA3", "MA6", "Price_vs_MA", "Momentum"]
-    scaler = StandardScaler()
-    model = LogisticRegression(max_iter=1000)
-    
-    signals = []
-    
-    # 4. The Loop (Walk-Forward Validation)
-    start_index = 100
-    retrain_frequency = 50 
-    
-    print(f"Starting backtest for {ticker} with {len(df)} rows...")
+    feature_cols = feature_cols or FEATURE_COLS
 
-    for i in range(start_index, len(df)):
-        
-        # A. Retrain periodically
-        if (i - start_index) % retrain_frequency == 0:
-            train_data = df.iloc[:i] 
-            X_train = train_data[feature_cols]
-            y_train = train_data["Target"]
-            X_train_scaled = scaler.fit_transform(X_train)
-            model.fit(X_train_scaled, y_train)
-        
-        # B. Predict
-        current_row = df.iloc[[i]][feature_cols]
-        current_rsi = df.iloc[i]["RSI"]
-        current_scaled = scaler.transform(current_row)
-        prediction = model.predict(current_scaled)[0] 
-        
-        # C. Strategy Rules
-        if prediction == 1 and current_rsi < 70:
-            signal = 1 # BUY
-        elif prediction == 0 and current_rsi > 30:
-            signal = -1 # SELL
-        else:
-            signal = 0 # HOLD
-            
-        signals.append(signal)
-
-    # 5. Calculate Returns
-    padding = [0] * start_index
-    df['Signal'] = padding + signals
+    # 4. Walk-Forward Validation
+    signal_col = walk_forward_signals(
+        np.column_stack([features[c] for c in feature_cols]),
+        target,
+        features["RSI"],
+        start_index=start_index,
+        retrain_frequency=retrain_frequency,
+        training_mode=training_mode,
+        max_train_rows=max_train_rows,
+        rsi_upper=rsi_upper,
+        rsi_lower=rsi_lower
+    )
     
-    # Shift signal by 1 (trade execution delay)
-    df['Strategy_Returns'] = df['Signal'].shift(1) * df['Return']
+    # Shift signal by 1 (trade execution delay); first row has no prior signal
+    strategy_returns = np.concatenate([[0.0], signal_col[:-1] * returns[1:]])
     
-    # Cumulative Returns (With the Fix for Zero-Bug)
-    df['Buy_Hold_Value'] = initial_capital * (1 + df['Return']).cumprod()
-    df['Strategy_Returns'] = df['Strategy_Returns'].fillna(0)
-    df['Strategy_Value'] = initial_capital * (1 + df['Strategy_Returns']).cumprod()
+    # Cumulative Returns
+    buy_hold_value = initial_capital * np.cumprod(1 + returns)
+    strategy_value = initial_capital * np.cumprod(1 + strategy_returns)
     
     # =====================================================
     # NEW: GENERATE TRADE LOG & STATS
     # =====================================================
-    trade_log = []
-    active_trade = None
-    win_count = 0
-    total_trades = 0
-    
-    # Extract arrays for fast looping
-    signal_col = df['Signal'].values
-    prices = df['Close'].values
-    dates = df['Date'].dt.strftime('%Y-%m-%d %H:%M').values
-    
-    # Loop to find Buy/Sell events
-    for i in range(start_index, len(df)):
-        current_signal = signal_col[i]
-        prev_signal = signal_col[i-1]
-        price = round(float(prices[i]), 2)
-        date = dates[i]
-
-        # BUY EVENT: Signal changes to 1
-        if current_signal == 1 and prev_signal != 1:
-            active_trade = {"entry_price": price}
-            trade_log.append({
-                "date": date, 
-                "signal": "BUY", 
-                "price": price, 
-                "quantity": 10, 
-                "profitLoss": None 
-            })
-
-        # SELL EVENT: Signal changes from 1 to something else
-        elif (current_signal == 0 or current_signal == -1) and prev_signal == 1:
-            if active_trade:
-                pnl = (price - active_trade["entry_price"]) * 10
-                trade_log.append({
-                    "date": date, 
-                    "signal": "SELL", 
-                    "price": price, 
-                    "quantity": 10, 
-                    "profitLoss": round(pnl, 2)
-                })
-                total_trades += 1
-                if pnl > 0: win_count += 1
-                active_trade = None
+    prices = np.round(prices, 2)
+    trades, trade_stats = trade_statistics(
+        signal_col, prices, strategy_returns, strategy_value, timestamps,
+        start_index=start_index, quantity=quantity
+    )
+    entries, exits, pnl = trades["entries"], trades["exits"], trades["pnl"]
+    total_trades = trade_stats["totalTrades"]
+
+    # BUY/SELL events in time order (entries and exits alternate)
+    events = np.empty(len(entries) + len(exits), dtype=int)
+    events[0::2] = entries
+    events[1::2] = exits
+
+    # Only the requested page of events gets formatted (default: the last 50)
+    first, last = trade_page(len(events), trade_offset, trade_limit)
+    position = np.arange(first, last)
+    is_sell = position % 2 == 1
+    page = events[first:last]
+    trade_log = records({
+        "date": format_dates(timestamps[page], bars.tz, unit="m"),
+        "signal": np.where(is_sell, "SELL", "BUY"),
+        "price": prices[page],
+        "quantity": np.full(len(page), quantity),
+        "profitLoss": [
+            round(float(pnl[p // 2]), 2) if sell else None
+            for p, sell in zip(position.tolist(), is_sell.tolist())
+        ]
+    })
 
     # Calculate Summaries
-    final_balance = df['Strategy_Value'].iloc[-1]
+    final_balance = strategy_value[-1]
     total_return = ((final_balance - initial_capital) / initial_capital) * 100
-    market_return = ((df['Buy_Hold_Value'].iloc[-1] - initial_capital) / initial_capital) * 100
-    win_rate = (win_count / total_trades * 100) if total_trades > 0 else 0
-
-    # 6. Format for Frontend
-    result_chart = []
-    for index, row in df.iloc[start_index::4].iterrows(): 
-        result_chart.append({
-            "date": row["Date"].strftime("%Y-%m-%d %H"),
-            "ai_strategy": round(row['Strategy_Value'], 2),
-            "buy_hold": round(row['Buy_Hold_Value'], 2)
-        })
+    market_return = ((buy_hold_value[-1] - initial_capital) / initial_capital) * 100
+
+    # 6. Format for Frontend (fixed-size chart that keeps peaks and troughs)
+    with span("downsample"):
+        rows = start_index + downsample_indices(
+            timestamps[start_index:],
+            [strategy_value[start_index:], buy_hold_value[start_index:]],
+            points=points, method=downsample
+        )
+    with span("serialization"):
+        result_chart = table({
+            "date": format_dates(timestamps[rows], bars.tz, unit="h"),
+            "ai_strategy": np.round(strategy_value[rows], 2),
+            "buy_hold": np.round(buy_hold_value[rows], 2)
+        }, layout)
         
     return {
         "chart_data": result_chart,
         "stats": {
             "totalProfit": round(final_balance - initial_capital, 2),
             "profitPercent": round(total_return, 2),
-            "vsMarket": round(final_balance - df['Buy_Hold_Value'].iloc[-1], 2),
+            "vsMarket": round(final_balance - buy_hold_value[-1], 2),
             "vsMarketPercent": round(total_return - market_return, 2),
             "tradesExecuted": total_trades
         },
-        "tradeLog": trade_log[-50:], # Return only last 50 trades
+        "tradeLog": trade_log, # One page of trade events (last 50 by default)
+        "tradeLogPage": {"offset": first, "limit": trade_limit, "total": len(events)},
         "summary": {
             "totalTrades": total_trades,
-            "winRate": round(win_rate, 1),
-            "avgProfitLoss": round((final_balance - initial_capital) / total_trades, 2) if total_trades > 0 else 0
+            "winRate": trade_stats["winRate"],
+            "avgProfitLoss": round((final_balance - initial_capital) / total_trades, 2) if total_trades > 0 else 0,
+            **{k: v for k, v in trade_stats.items() if k not in ("totalTrades", "winRate")}
         }
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,527 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import ExitStack
+import numpy as np
+import pandas as pd
+
+from columnar import ColumnarStore
+
+try:
+    import fcntl
+except ImportError:  # No cross-process locking (Windows): one worker per store
+    fcntl = None
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "bars.sqlite")
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# How long (seconds) a series is considered fresh before we ask the provider
+# for newer bars again. Hourly bars only change once an hour.
+DEFAULT_REFRESH_SECONDS = 60
+
+
+# =====================================================
+# HELPERS
+# =====================================================
+def period_to_timedelta(period):
+    """
+    Converts a yfinance style period ("30d", "6mo", "1y", "max") to a Timedelta.
+    Returns None for "max".
+    """
+    period = period.strip().lower()
+    if period == "max":
+        return None
+    if period == "ytd":
+        now = pd.Timestamp.now()
+        return now - pd.Timestamp(year=now.year, month=1, day=1)
+
+    units = {"wk": 7, "mo": 30, "y": 365, "d": 1}
+    for unit, days in units.items():
+        if period.endswith(unit):
+            return pd.Timedelta(days=int(period[:-len(unit)]) * days)
+
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def normalize_bars(df):
+    """
+    Brings a raw provider frame into the store layout:
+    a 'Date' column followed by Open/High/Low/Close/Volume.
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=["Date"] + BAR_COLUMNS)
+
+    df = df.copy()
+
+    # Flatten multi-index columns (yfinance returns (field, ticker) pairs)
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+
+    if "Date" not in df.columns and "Datetime" not in df.columns:
+        df = df.reset_index()
+    if "Datetime" in df.columns:
+        df = df.rename(columns={"Datetime": "Date"})
+    if "Date" not in df.columns:
+        df = df.rename(columns={df.columns[0]: "Date"})
+
+    df["Date"] = pd.to_datetime(df["Date"])
+    cols = ["Date"] + [c for c in BAR_COLUMNS if c in df.columns]
+    return df[cols].sort_values("Date").reset_index(drop=True)
+
+
+def to_epoch(dates):
+    """
+    Converts a date column to integer UTC epoch seconds.
+    """
+    dates = pd.to_datetime(dates)
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert("UTC").dt.tz_localize(None)
+    return ((dates - pd.Timestamp(0)) // pd.Timedelta(seconds=1)).astype("int64")
+
+
+def _from_epoch(seconds, tz):
+    dates = pd.to_datetime(pd.Series(seconds, dtype="int64"), unit="s")
+    if tz:
+        dates = dates.dt.tz_localize("UTC").dt.tz_convert(tz)
+    return dates
+
+
+# =====================================================
+# PROVIDERS
+# =====================================================
+class YFinanceProvider:
+    """
+    Fetches bars from Yahoo Finance.
+    """
+
+    def fetch(self, ticker, interval, start=None):
+        import yfinance as yf
+
+        if start is None:
+            df = yf.download(ticker, interval=interval, period="max", progress=False)
+        else:
+            df = yf.download(ticker, interval=interval, start=start.to_pydatetime(), progress=False)
+        return normalize_bars(df)
+
+    def fetch_many(self, tickers, interval, start=None):
+        """
+        One grouped yf.download call for several tickers.
+        """
+        import yfinance as yf
+
+        kwargs = {"period": "max"} if start is None else {"start": start.to_pydatetime()}
+        df = yf.download(tickers, interval=interval, group_by="ticker", progress=False, **kwargs)
+
+        frames = {}
+        present = set(df.columns.get_level_values(0)) if isinstance(df.columns, pd.MultiIndex) else set()
+        for ticker in tickers:
+            if ticker in present:
+                frames[ticker] = normalize_bars(df[ticker].dropna(how="all"))
+            else:
+                frames[ticker] = normalize_bars(None)
+        return frames
+
+
+class FileBarProvider:
+    """
+    Offline provider backed by CSV files named '<TICKER>_<interval>.csv'.
+    Used for tests and benchmarks; records every fetch in `calls`.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.calls = []
+
+    def _path(self, ticker, interval):
+        return os.path.join(self.root, f"{ticker}_{interval}.csv")
+
+    def save(self, ticker, interval, df):
+        os.makedirs(self.root, exist_ok=True)
+        normalize_bars(df).to_csv(self._path(ticker, interval), index=False)
+
+    def fetch(self, ticker, interval, start=None):
+        self.calls.append((ticker, interval, start))
+
+        path = self._path(ticker, interval)
+        if not os.path.exists(path):
+            return normalize_bars(None)
+
+        df = normalize_bars(pd.read_csv(path))
+        if start is not None:
+            if df["Date"].dt.tz is not None and start.tzinfo is None:
+                start = start.tz_localize("UTC")
+            elif df["Date"].dt.tz is None and start.tzinfo is not None:
+                start = start.tz_convert("UTC").tz_localize(None)
+            df = df[df["Date"] >= start]
+        return df.reset_index(drop=True)
+
+
+# =====================================================
+# SERIES LOCK (threads and processes)
+# =====================================================
+class SeriesLock:
+    """
+    Serializes refreshes of one series across threads and, through an
+    flock on a lock file, across every worker process sharing the store.
+    A worker that waited finds the bars fresh and skips the download.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if fcntl is not None:
+            try:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except BaseException:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._thread_lock.release()
+                raise
+        return self
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+
+# =====================================================
+# BAR STORE (SQLite, keyed by ticker + interval)
+# =====================================================
+class BarStore:
+    """
+    Local OHLCV cache shared by every endpoint.
+
+    The first request for a (ticker, interval) downloads the full period.
+    Later requests only ask the provider for bars from the last stored one
+    onwards (the last bar is re-fetched because it may still be forming).
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, provider=None,
+                 refresh_seconds=DEFAULT_REFRESH_SECONDS, clock=time.time, columns_root=None):
+        self.path = path
+        self.provider = provider or YFinanceProvider()
+        self.refresh_seconds = refresh_seconds
+        self.clock = clock
+
+        # Memory-mapped column files mirrored from SQLite for zero-copy reads
+        self.columns = ColumnarStore(columns_root or os.path.join(os.path.dirname(os.path.abspath(path)), "columns"))
+
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self.lock_dir = os.path.join(os.path.dirname(os.path.abspath(path)), "locks")
+
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self._init_schema()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _init_schema(self):
+        conn = self._connect()
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS bars (
+                    ticker TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL, volume REAL,
+                    PRIMARY KEY (ticker, interval, ts)
+                ) WITHOUT ROWID;
+
+                CREATE TABLE IF NOT EXISTS series (
+                    ticker TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    tz TEXT,
+                    covered_from INTEGER,
+                    checked_at REAL NOT NULL,
+                    PRIMARY KEY (ticker, interval)
+                );
+            """)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _lock_for(self, ticker, interval):
+        with self._locks_guard:
+            lock = self._locks.get((ticker, interval))
+            if lock is None:
+                name = hashlib.sha1(f"{self.path}|{ticker}|{interval}".encode()).hexdigest()[:16]
+                lock = self._locks[(ticker, interval)] = SeriesLock(os.path.join(self.lock_dir, f"{name}.lock"))
+            return lock
+
+    # ---------- metadata ----------
+    def _read_series(self, conn, ticker, interval):
+        row = conn.execute(
+            "SELECT tz, covered_from, checked_at FROM series WHERE ticker = ? AND interval = ?",
+            (ticker, interval)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"tz": row[0], "covered_from": row[1], "checked_at": row[2]}
+
+    def _last_ts(self, conn, ticker, interval):
+        row = conn.execute(
+            "SELECT MAX(ts) FROM bars WHERE ticker = ? AND interval = ?",
+            (ticker, interval)
+        ).fetchone()
+        return row[0]
+
+    # ---------- writes ----------
+    def _write(self, conn, ticker, interval, df):
+        if df.empty:
+            return
+        ts = to_epoch(df["Date"]).to_numpy()
+        values = [df[c].to_numpy(dtype=float) if c in df.columns else [None] * len(df) for c in BAR_COLUMNS]
+        rows = [(ticker, interval, int(t), *map(_as_float, v)) for t, *v in zip(ts, *values)]
+        conn.executemany(
+            "INSERT OR REPLACE INTO bars (ticker, interval, ts, open, high, low, close, volume) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+    # ---------- public API ----------
+    def _plan(self, conn, ticker, interval, wanted_from, now):
+        """
+        Decides what to fetch for one series: None when it is fresh,
+        otherwise (start, full) where full means the window is not covered yet.
+        """
+        meta = self._read_series(conn, ticker, interval)
+        covered = meta is not None and (
+            meta["covered_from"] is None
+            or (wanted_from is not None and meta["covered_from"] <= wanted_from)
+        )
+
+        if not covered:
+            start = None if wanted_from is None else pd.Timestamp(wanted_from, unit="s", tz="UTC")
+            return start, True
+        if now - meta["checked_at"] >= self.refresh_seconds:
+            last = self._last_ts(conn, ticker, interval)
+            return (pd.Timestamp(last, unit="s", tz="UTC") if last is not None else None), False
+        return None
+
+    def _apply(self, conn, ticker, interval, df, full, wanted_from, now):
+        meta = self._read_series(conn, ticker, interval)
+        if full:
+            if df.empty:
+                return False
+            tz = str(df["Date"].dt.tz) if df["Date"].dt.tz is not None else None
+            if meta is not None and meta["covered_from"] is not None and wanted_from is not None:
+                wanted_from = min(wanted_from, meta["covered_from"])
+        else:
+            tz = meta["tz"]
+            wanted_from = meta["covered_from"]
+
+        self._write(conn, ticker, interval, df)
+        conn.execute(
+            "INSERT OR REPLACE INTO series (ticker, interval, tz, covered_from, checked_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (ticker, interval, tz, wanted_from, now)
+        )
+        return not df.empty
+
+    def _export_columns(self, conn, ticker, interval):
+        meta = self._read_series(conn, ticker, interval)
+        rows = conn.execute(
+            "SELECT ts, open, high, low, close, volume FROM bars "
+            "WHERE ticker = ? AND interval = ? ORDER BY ts",
+            (ticker, interval)
+        ).fetchall()
+        if not rows:
+            return
+        data = np.array(rows, dtype=float)
+        self.columns.write(
+            ticker, interval,
+            data[:, 0].astype("int64"),
+            {name: data[:, i + 1] for i, name in enumerate(BAR_COLUMNS)},
+            meta["tz"] if meta else None
+        )
+
+    def _fetch_group(self, tickers, interval, start):
+        if len(tickers) > 1 and hasattr(self.provider, "fetch_many"):
+            return self.provider.fetch_many(tickers, interval, start=start)
+        return {t: self.provider.fetch(t, interval, start=start) for t in tickers}
+
+    def refresh_many(self, tickers, interval, period):
+        """
+        Makes sure the store covers `period` for every series and holds the
+        latest bars. Only missing bars are requested from the provider, and
+        series that need the same start are fetched in one grouped call.
+        """
+        span = period_to_timedelta(period)
+        now = self.clock()
+        wanted_from = None if span is None else int(now - span.total_seconds())
+        tickers = sorted(set(tickers))
+
+        with ExitStack() as stack:
+            # Sorted acquisition keeps concurrent batches deadlock-free
+            for ticker in tickers:
+                stack.enter_context(self._lock_for(ticker, interval))
+
+            conn = self._connect()
+            try:
+                plans = {}
+                for ticker in tickers:
+                    plan = self._plan(conn, ticker, interval, wanted_from, now)
+                    if plan is not None:
+                        plans[ticker] = plan
+
+                # Full downloads share a start; incremental ones use the earliest last bar
+                full = [t for t, (_, is_full) in plans.items() if is_full]
+                incremental = [t for t, (_, is_full) in plans.items() if not is_full]
+                starts = [plans[t][0] for t in incremental]
+                groups = []
+                if full:
+                    groups.append((full, plans[full[0]][0], True))
+                if incremental:
+                    start = None if any(s is None for s in starts) else min(starts)
+                    groups.append((incremental, start, False))
+
+                changed = []
+                for group, start, is_full in groups:
+                    frames = self._fetch_group(group, interval, start)
+                    for ticker in group:
+                        df = frames.get(ticker, normalize_bars(None))
+                        if self._apply(conn, ticker, interval, df, is_full, wanted_from, now):
+                            changed.append(ticker)
+                conn.commit()
+
+                for ticker in changed:
+                    self._export_columns(conn, ticker, interval)
+            finally:
+                conn.close()
+
+    def refresh(self, ticker, interval, period):
+        """
+        Single-series version of refresh_many.
+        """
+        self.refresh_many([ticker], interval, period)
+
+    def read(self, ticker, interval, period="max"):
+        """
+        Returns stored bars for the series without touching the provider.
+        """
+        span = period_to_timedelta(period)
+        since = -(2 ** 62) if span is None else int(self.clock() - span.total_seconds())
+
+        conn = self._connect()
+        try:
+            meta = self._read_series(conn, ticker, interval)
+            rows = conn.execute(
+                "SELECT ts, open, high, low, close, volume FROM bars "
+                "WHERE ticker = ? AND interval = ? AND ts >= ? ORDER BY ts",
+                (ticker, interval, since)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        df = pd.DataFrame(rows, columns=["ts"] + BAR_COLUMNS)
+        if df.empty:
+            return normalize_bars(None)
+
+        df.insert(0, "Date", _from_epoch(df.pop("ts"), meta["tz"] if meta else None))
+        return df
+
+    def get_bars(self, ticker, interval="1h", period="30d"):
+        """
+        Returns bars for the requested window, refreshing the store first.
+        """
+        self.refresh(ticker, interval, period)
+        return self.read(ticker, interval, period)
+
+    def read_arrays(self, ticker, interval, period="max"):
+        """
+        Like read, but returns a columnar.ColumnarSeries: memory-mapped
+        arrays sliced to the window without copying.
+        """
+        series = self.columns.open(ticker, interval)
+        if series is None:
+            # Store filled before the column files existed
+            with self._lock_for(ticker, interval):
+                conn = self._connect()
+                try:
+                    self._export_columns(conn, ticker, interval)
+                finally:
+                    conn.close()
+            series = self.columns.open(ticker, interval)
+            if series is None:
+                return None
+
+        span = period_to_timedelta(period)
+        return series.slice(None if span is None else int(self.clock() - span.total_seconds()))
+
+    def get_arrays(self, ticker, interval="1h", period="30d"):
+        """
+        Like get_bars, but returns the window as arrays (see read_arrays).
+        """
+        self.refresh(ticker, interval, period)
+        return self.read_arrays(ticker, interval, period)
+
+    def get_many_arrays(self, tickers, interval="1h", period="30d"):
+        """
+        Batch version of get_arrays: one grouped refresh, then a dict of series.
+        """
+        self.refresh_many(tickers, interval, period)
+        return {ticker: self.read_arrays(ticker, interval, period) for ticker in tickers}
+
+    def get_many(self, tickers, interval="1h", period="30d"):
+        """
+        Batch version of get_bars: one grouped refresh, then a dict of frames.
+        """
+        self.refresh_many(tickers, interval, period)
+        return {ticker: self.read(ticker, interval, period) for ticker in tickers}
+
+
+def _as_float(value):
+    if value is None or pd.isna(value):
+        return None
+    return float(value)
+
+
+# =====================================================
+# SHARED INSTANCE
+# =====================================================
+_default_store = None
+_default_store_guard = threading.Lock()
+
+
+def get_store():
+    """
+    Returns the process-wide bar store.
+    BAR_STORE_PATH overrides the SQLite location and BAR_FIXTURE_DIR switches
+    to the offline CSV provider.
+    """
+    global _default_store
+    with _default_store_guard:
+        if _default_store is None:
+            fixture_dir = os.getenv("BAR_FIXTURE_DIR")
+            provider = FileBarProvider(fixture_dir) if fixture_dir else YFinanceProvider()
+            _default_store = BarStore(
+                path=os.getenv("BAR_STORE_PATH", DEFAULT_DB_PATH),
+                provider=provider,
+                refresh_seconds=int(os.getenv("BAR_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS))
+            )
+        return _default_store
+
+
+def set_store(store):
+    """
+    Replaces the process-wide bar store (e.g. with a FileBarProvider in tests).
+    """
+    global _default_store
+    with _default_store_guard:
+        _default_store = store
@@ -0,0 +1,419 @@
+"""
+Offline benchmarks for the backend hot paths.
+
+    python bench.py                         # full suite -> bench_results.json
+    python bench.py --quick                 # small sizes only
+    python bench.py --compare old.json      # exit 1 on regressions
+    python bench.py --startup               # cold-start timings only
+
+Bars come from a seeded synthetic generator through a stub provider, so
+no network (yfinance) or Gemini access is needed and runs are comparable
+across commits.
+"""
+import os
+
+# Benchmarks stay in-process and offline
+os.environ.setdefault("LLM_STUB", "1")
+os.environ.setdefault("CPU_WORKERS", "0")
+os.environ["NEWS_REFRESH_SECONDS"] = "0"
+os.environ["SNAPSHOT_UNIVERSE"] = ""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore, FileBarProvider, get_store, normalize_bars, set_store
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+END_DAY = pd.Timestamp("2024-06-28")
+TZ = "Asia/Kolkata"
+BARS_PER_DAY = 7  # NSE hourly bars: 09:15 ... 15:15
+
+# Calendar days per benchmark size
+PERIODS = {"30d": 30, "6mo": 182, "1y": 365, "5y": 1825}
+QUICK_PERIODS = ["30d", "6mo"]
+TICKER_COUNTS = [1, 50, 500]
+QUICK_TICKER_COUNTS = [1, 50]
+
+SEQUENTIAL_TREND_MAX = 50
+
+REPEAT = 5
+STARTUP_RUNS = 3
+REGRESSION_THRESHOLD = 1.25  # new median / old median
+MIN_REGRESSION_S = 0.001  # ignore slowdowns below timer noise
+
+
+# =====================================================
+# SYNTHETIC DATA
+# =====================================================
+def synthetic_bars(ticker, interval="1h", days=max(PERIODS.values()), seed=None, end=END_DAY):
+    """
+    Seeded random-walk OHLCV bars on NSE trading hours, ending on `end`.
+    The same ticker always gets the same bars.
+    """
+    seed = zlib.crc32(f"{ticker}/{interval}".encode()) if seed is None else seed
+    rng = np.random.default_rng(seed)
+
+    trading_days = pd.bdate_range(end=end, periods=int(days * 5 / 7) + 1)
+    if interval == "1h":
+        offsets = pd.Timedelta(hours=9, minutes=15) + pd.to_timedelta(np.arange(BARS_PER_DAY), unit="h")
+        dates = pd.DatetimeIndex((trading_days.values[:, None] + offsets.values[None, :]).ravel())
+        volatility = 0.004
+    else:
+        dates = trading_days
+        volatility = 0.015
+
+    n = len(dates)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, volatility, n)))
+    open_ = close * (1 + rng.normal(0, volatility / 4, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, volatility / 2, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, volatility / 2, n)))
+
+    return pd.DataFrame({
+        "Date": dates.tz_localize(TZ),
+        "Open": open_,
+        "High": high,
+        "Low": low,
+        "Close": close,
+        "Volume": rng.integers(10_000, 1_000_000, n).astype(float)
+    })
+
+
+class SyntheticBarProvider:
+    """
+    Stub provider serving synthetic_bars(); counts fetches in `calls`.
+    """
+
+    def __init__(self, days=max(PERIODS.values())):
+        self.days = days
+        self.calls = 0
+
+    def fetch(self, ticker, interval, start=None):
+        self.calls += 1
+        df = synthetic_bars(ticker, interval, self.days)
+        if start is not None:
+            start = pd.Timestamp(start)
+            if start.tzinfo is None:
+                start = start.tz_localize("UTC")
+            df = df[df["Date"] >= start]
+        return normalize_bars(df)
+
+    def fetch_many(self, tickers, interval, start=None):
+        return {t: self.fetch(t, interval, start) for t in tickers}
+
+
+def install_store(root):
+    """
+    Points the shared bar store at the synthetic provider, with the clock
+    pinned just after the last bar so reads never refetch.
+    """
+    last_bar = synthetic_bars("CLOCK", "1h", 1)["Date"].iloc[-1]
+    now = last_bar.timestamp() + 600
+    store = BarStore(os.path.join(root, "bars.sqlite"), SyntheticBarProvider(), clock=lambda: now)
+    set_store(store)
+    return store
+
+
+def universe(count):
+    return [f"SYN{i:03d}.NS" for i in range(count)]
+
+
+# =====================================================
+# MEASUREMENT
+# =====================================================
+def measure(fn, repeat=REPEAT):
+    """
+    Warm-up call, `repeat` timed calls, then one traced call for peak memory.
+    """
+    fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "best_s": round(min(times), 6),
+        "median_s": round(statistics.median(times), 6),
+        "peak_mb": round(peak / 2 ** 20, 3),
+        "repeat": repeat
+    }
+
+
+def _reset_caches():
+    # Endpoints are coalesced and models cached; benchmark the real work
+    from model_registry import get_registry
+    from singleflight import flights
+
+    flights.clear()
+    get_registry().clear()
+
+
+# =====================================================
+# CASES
+# =====================================================
+def function_cases(periods):
+    from api import serialize_history
+    from backtester import run_backtest_strategy
+    from features import add_features, compute_features
+    from main import run_monte_carlo, run_trend_analysis
+
+    for period in periods:
+        days = PERIODS[period]
+        df = synthetic_bars("BENCH.NS", "1h", days)
+        close = df["Close"].to_numpy()
+        featured = add_features(df.copy())
+
+        yield "compute_features", period, lambda close=close: compute_features(close)
+        yield "add_features", period, lambda df=df: add_features(df.copy())
+        yield "run_trend_analysis", period, lambda f=featured: run_trend_analysis(f.copy())
+        yield "run_monte_carlo", period, lambda f=featured: run_monte_carlo(f, seed=0)
+        yield "run_backtest_strategy", period, lambda p=period: run_backtest_strategy("BENCH", period=p)
+        yield "serialize_history", period, lambda p=period: serialize_history(
+            get_store().get_arrays("BENCH.NS", interval="1d", period=p)
+        )
+
+
+def screen_cases(ticker_counts):
+    from features import add_features
+    from main import run_trend_analysis
+    from screener import screen_series
+
+    for count in ticker_counts:
+        frames = {t: synthetic_bars(t, "1h", PERIODS["30d"]) for t in universe(count)}
+        closes = {t: df["Close"].to_numpy() for t, df in frames.items()}
+        yield "screen_series", f"{count} tickers", lambda c=closes: screen_series(c)
+
+        # Baseline: one sklearn fit per ticker (linear in count, so the
+        # largest universe is skipped)
+        if count <= SEQUENTIAL_TREND_MAX:
+            featured = [add_features(df.copy()) for df in frames.values()]
+            yield "trend_per_ticker", f"{count} tickers", lambda f=featured: [
+                run_trend_analysis(df.copy()) for df in f
+            ]
+
+
+def endpoint_cases(client, periods, ticker_counts):
+    from api import MAX_BATCH_TICKERS
+
+    def get(*urls):
+        def call():
+            _reset_caches()
+            for url in urls:
+                response = client.get(url)
+                if response.status_code != 200 or response.content.startswith(b'{"error"'):
+                    raise RuntimeError(f"{url} failed: {response.text[:200]}")
+        return call
+
+    yield "GET /technical", "30d", get("/technical/BENCH")
+    for period in periods:
+        yield "GET /backtest", period, get(f"/backtest/BENCH?period={period}")
+        yield "GET /history", period, get(f"/history/BENCH?period={period}")
+
+    for count in ticker_counts:
+        # Larger universes are sent as several batches of at most MAX_BATCH_TICKERS
+        names = universe(count)
+        batches = [",".join(names[i:i + MAX_BATCH_TICKERS]) for i in range(0, count, MAX_BATCH_TICKERS)]
+        yield "GET /batch/history", f"{count} tickers", get(*(f"/batch/history?tickers={b}" for b in batches))
+        yield "GET /batch/technical", f"{count} tickers", get(*(f"/batch/technical?tickers={b}" for b in batches))
+
+
+# =====================================================
+# STARTUP (fresh interpreter per run)
+# =====================================================
+# Runs in a child process; must not import bench (or anything heavy) first
+STARTUP_PROBE = """
+import json, resource, time
+start = time.perf_counter()
+import api
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(api.app) as client:
+    ready = time.perf_counter()
+    client.get("/history/BENCH?period=1y").raise_for_status()
+    first = time.perf_counter()
+    client.get("/history/BENCH?period=1y&points=100").raise_for_status()
+    warm = time.perf_counter()
+print(json.dumps({
+    "import_api_s": imported - start,
+    "first_history_s": first - ready,
+    "warm_history_s": warm - first,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+}))
+"""
+
+
+def startup_cases(runs=STARTUP_RUNS):
+    """
+    Cold-start timings of a new API worker: importing api, then the first
+    /history request against an empty bar store (offline CSV provider).
+    """
+    backend = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as root:
+        fixtures = os.path.join(root, "fixtures")
+        today = pd.Timestamp.now().normalize()
+        FileBarProvider(fixtures).save("BENCH.NS", "1d", synthetic_bars("BENCH.NS", "1d", 730, end=today))
+
+        for i in range(runs):
+            env = dict(
+                os.environ,
+                BAR_FIXTURE_DIR=fixtures,
+                BAR_STORE_PATH=os.path.join(root, f"run{i}", "bars.sqlite"),
+                NEWS_REFRESH_SECONDS="0",
+                LLM_STUB="1"
+            )
+            started = time.perf_counter()
+            out = subprocess.run([sys.executable, "-c", STARTUP_PROBE], cwd=backend, env=env,
+                                 capture_output=True, text=True)
+            if out.returncode != 0:
+                raise RuntimeError(f"Startup probe failed: {out.stderr[-500:]}")
+            sample = json.loads(out.stdout.strip().splitlines()[-1])
+            sample["process_s"] = time.perf_counter() - started
+            samples.append(sample)
+
+    results = []
+    for metric in ("process_s", "import_api_s", "first_history_s", "warm_history_s"):
+        times = [s[metric] for s in samples]
+        results.append({
+            "name": f"startup {metric[:-2]}",
+            "size": "cold",
+            "best_s": round(min(times), 6),
+            "median_s": round(statistics.median(times), 6),
+            "peak_mb": round(max(s["peak_rss_mb"] for s in samples), 3),
+            "repeat": runs
+        })
+    return results
+
+
+# =====================================================
+# RUNNER
+# =====================================================
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _print_row(row):
+    throughput = f"   {row['tickers_per_second']:9.1f} tickers/s" if "tickers_per_second" in row else ""
+    print(f"{row['name']:<24} {row['size']:<12} median {row['median_s'] * 1000:9.2f} ms"
+          f"   peak {row['peak_mb']:8.2f} MB{throughput}")
+
+
+def run_suite(quick=False, repeat=REPEAT, only=None, startup_only=False):
+    """
+    Runs every case and returns the report dict (see --output).
+    """
+    # Startup runs first, in child processes, before this process warms up
+    results = []
+    if not only or "startup" in only:
+        for row in startup_cases():
+            results.append(row)
+            _print_row(row)
+    if startup_only:
+        return _report(results, quick)
+
+    from fastapi.testclient import TestClient
+
+    import api
+
+    periods = QUICK_PERIODS if quick else list(PERIODS)
+    ticker_counts = QUICK_TICKER_COUNTS if quick else TICKER_COUNTS
+
+    with tempfile.TemporaryDirectory(prefix="bench_") as root:
+        install_store(root)
+        with TestClient(api.app) as client:
+            cases = (list(function_cases(periods)) + list(screen_cases(ticker_counts))
+                     + list(endpoint_cases(client, periods, ticker_counts)))
+            for name, size, fn in cases:
+                if only and only not in name:
+                    continue
+                row = dict(name=name, size=size, **measure(fn, repeat))
+                if size.endswith(" tickers") and row["median_s"]:
+                    row["tickers_per_second"] = round(int(size.split()[0]) / row["median_s"], 1)
+                results.append(row)
+                _print_row(row)
+
+    return _report(results, quick)
+
+
+def _report(results, quick):
+    return {
+        "meta": {
+            "commit": _commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "quick": quick
+        },
+        "results": results
+    }
+
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    """
+    Returns the cases whose median time grew by more than `threshold`.
+    """
+    baseline = {(r["name"], r["size"]): r for r in old["results"]}
+    regressions = []
+    for row in new["results"]:
+        before = baseline.get((row["name"], row["size"]))
+        if before is None or not before["median_s"]:
+            continue
+        ratio = row["median_s"] / before["median_s"]
+        slower = row["median_s"] - before["median_s"] > MIN_REGRESSION_S
+        flag = "REGRESSION" if ratio > threshold and slower else ""
+        print(f"{row['name']:<24} {row['size']:<12} x{ratio:6.2f} {flag}")
+        if flag:
+            regressions.append(dict(row, ratio=round(ratio, 3)))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline backend benchmarks")
+    parser.add_argument("--quick", action="store_true", help="small sizes only")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--only", help="run cases whose name contains this text")
+    parser.add_argument("--startup", action="store_true", help="cold-start timings only")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    report = run_suite(quick=args.quick, repeat=args.repeat, only=args.only, startup_only=args.startup)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above x{args.threshold}")
+            sys.exit(1)
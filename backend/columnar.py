@@ -0,0 +1,148 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+VERSIONS_TO_KEEP = 2
+
+
+# =====================================================
+# DATE FORMATTING (vectorized)
+# =====================================================
+def local_datetimes(ts, tz):
+    """
+    Epoch seconds -> naive datetime64[s] in the series' local timezone.
+    """
+    dates = pd.to_datetime(np.asarray(ts, dtype="int64"), unit="s")
+    if tz:
+        dates = dates.tz_localize("UTC").tz_convert(tz).tz_localize(None)
+    return dates.values.astype("datetime64[s]")
+
+
+def format_dates(ts, tz, unit="D"):
+    """
+    Formats epoch seconds in one NumPy call.
+    unit "D" -> '2024-01-31', "h" -> '2024-01-31 09', "m" -> '2024-01-31 09:15'
+    """
+    text = np.datetime_as_string(local_datetimes(ts, tz), unit=unit)
+    return np.char.replace(text, "T", " ")
+
+
+# =====================================================
+# SERIES (memory-mapped column views)
+# =====================================================
+class ColumnarSeries:
+    """
+    Bars of one ticker/interval as NumPy arrays. Arrays are memory-mapped
+    read-only; slicing returns views, never copies.
+    """
+
+    def __init__(self, ts, columns, tz):
+        self.ts = ts
+        self.columns = columns
+        self.tz = tz
+
+    def __len__(self):
+        return len(self.ts)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def offset(self, ts):
+        """
+        Index of the first bar at or after `ts` (epoch seconds).
+        """
+        return int(np.searchsorted(self.ts, ts, side="left"))
+
+    def slice(self, start_ts=None, end_ts=None):
+        lo = 0 if start_ts is None else self.offset(start_ts)
+        hi = len(self.ts) if end_ts is None else int(np.searchsorted(self.ts, end_ts, side="right"))
+        return ColumnarSeries(self.ts[lo:hi], {k: v[lo:hi] for k, v in self.columns.items()}, self.tz)
+
+    def dates(self, unit="D"):
+        return format_dates(self.ts, self.tz, unit)
+
+
+# =====================================================
+# STORE (one .npy per column, per ticker and interval)
+# =====================================================
+class ColumnarStore:
+    """
+    Layout: <root>/<interval>/<ticker>/<version>/{ts,Open,...}.npy + meta.json
+    and a 'current' symlink that is swapped atomically on every write, so
+    readers in other processes never see a half-written series.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._open = {}
+        self._lock = threading.Lock()
+
+    def _series_dir(self, ticker, interval):
+        return os.path.join(self.root, interval, ticker)
+
+    def write(self, ticker, interval, ts, columns, tz):
+        series_dir = self._series_dir(ticker, interval)
+        version = uuid.uuid4().hex
+        version_dir = os.path.join(series_dir, version)
+        os.makedirs(version_dir)
+
+        np.save(os.path.join(version_dir, "ts.npy"), np.asarray(ts, dtype="int64"))
+        for name in COLUMNS:
+            np.save(os.path.join(version_dir, f"{name}.npy"), np.asarray(columns[name], dtype=float))
+        with open(os.path.join(version_dir, "meta.json"), "w") as f:
+            json.dump({"tz": tz}, f)
+
+        link = os.path.join(series_dir, "current")
+        tmp_link = os.path.join(series_dir, f".current-{version}")
+        os.symlink(version, tmp_link)
+        os.replace(tmp_link, link)
+
+        # Old versions can go: open memmaps keep their pages until unmapped
+        versions = sorted(
+            (d for d in os.listdir(series_dir) if d not in ("current",) and not d.startswith(".")),
+            key=lambda d: os.path.getmtime(os.path.join(series_dir, d))
+        )
+        for old in versions[:-VERSIONS_TO_KEEP]:
+            shutil.rmtree(os.path.join(series_dir, old), ignore_errors=True)
+
+    def open(self, ticker, interval):
+        """
+        Returns the current ColumnarSeries, or None if the series was never written.
+        """
+        link = os.path.join(self._series_dir(ticker, interval), "current")
+        try:
+            version = os.readlink(link)
+        except OSError:
+            return None
+
+        key = (ticker, interval)
+        with self._lock:
+            cached = self._open.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+        version_dir = os.path.join(self._series_dir(ticker, interval), version)
+        try:
+            ts = np.load(os.path.join(version_dir, "ts.npy"), mmap_mode="r")
+            columns = {
+                name: np.load(os.path.join(version_dir, f"{name}.npy"), mmap_mode="r") for name in COLUMNS
+            }
+            with open(os.path.join(version_dir, "meta.json")) as f:
+                tz = json.load(f)["tz"]
+        except FileNotFoundError:
+            # Replaced by a newer version while we were opening it
+            return self.open(ticker, interval)
+
+        series = ColumnarSeries(ts, columns, tz)
+        with self._lock:
+            self._open[key] = (version, series)
+        return series
@@ -0,0 +1,92 @@
+import numpy as np
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+DEFAULT_POINTS = 500
+METHODS = ("lttb", "minmax")
+
+
+# =====================================================
+# SINGLE CURVE
+# =====================================================
+def lttb(x, y, points):
+    """
+    Largest-Triangle-Three-Buckets: indices of `points` rows that keep the
+    visual shape of y(x). The first and last rows are always kept.
+    """
+    n = len(y)
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+
+    selected = np.empty(points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[hi:next_hi].mean()
+        avg_y = y[hi:next_hi].mean()
+
+        # Keep the row forming the largest triangle with the previous pick
+        # and the average of the next bucket
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def minmax(y, points):
+    """
+    Min/max bucketing: the lowest and highest row of each equal bucket,
+    so every peak and trough survives. The first and last rows are kept.
+    """
+    n = len(y)
+    if points >= n:
+        return np.arange(n)
+    if points < 4:
+        return np.unique([0, n - 1])
+
+    y = np.asarray(y, dtype=float)
+    buckets = (points - 2) // 2
+    edges = np.linspace(0, n, buckets + 1).astype(int)[:-1]
+    bucket_of = np.repeat(np.arange(buckets), np.diff(np.append(edges, n)))
+
+    picks = []
+    for reduce in (np.minimum, np.maximum):
+        extreme = reduce.reduceat(y, edges)
+        hits = np.flatnonzero(y == extreme[bucket_of])
+        # First hit per bucket
+        picks.append(hits[np.unique(bucket_of[hits], return_index=True)[1]])
+    return np.unique(np.concatenate(picks + [[0, n - 1]]))
+
+
+# =====================================================
+# SHARED X AXIS
+# =====================================================
+def downsample_indices(x, curves, points=DEFAULT_POINTS, method="lttb"):
+    """
+    Row indices to keep for curves that share one x axis. The budget is
+    split between the curves and their picks are merged, so at most
+    `points` rows are returned. points <= 0 (or None) keeps every row.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}'. Use one of {METHODS}")
+
+    n = len(x)
+    if not points or points <= 0 or points >= n:
+        return np.arange(n)
+
+    budget = max(points // len(curves), 3)
+    picks = [lttb(x, y, budget) if method == "lttb" else minmax(y, budget) for y in curves]
+    picks = np.unique(np.concatenate(picks))
+
+    # Budgets under 3 rows per curve overshoot; thin the merged picks
+    # evenly, still keeping the first and last rows
+    if len(picks) > points:
+        picks = picks[np.linspace(0, len(picks) - 1, points).round().astype(int)]
+    return picks
@@ -0,0 +1,236 @@
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from bar_store import to_epoch
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+FEATURE_NAMES = ["Return", "MA3", "MA6", "Price_vs_MA", "Momentum", "RSI"]
+RSI_WINDOW = 14
+
+# Closes needed to compute every feature of the newest bar
+STATE_SIZE = RSI_WINDOW + 1
+
+# Leading rows of any window that compute_features leaves as NaN
+WARMUP_ROWS = {"Return": 1, "MA3": 2, "MA6": 5, "Price_vs_MA": 2, "Momentum": 3, "RSI": RSI_WINDOW}
+
+
+# =====================================================
+# BATCH MODE (NumPy arrays)
+# =====================================================
+# Every helper works along the last axis, so a (tickers, bars) array of
+# closes is handled in one call
+def _rolling_mean(values, window):
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        out[..., window - 1:] = sliding_window_view(values, window, axis=-1).mean(axis=-1)
+    return out
+
+
+def _shift(values, periods):
+    out = np.full(values.shape, np.nan)
+    out[..., periods:] = values[..., :-periods]
+    return out
+
+
+def compute_features(close):
+    """
+    Computes every feature for an array of closes in one pass.
+    Returns a dict of arrays (same semantics as the pandas rolling version).
+    A 2-D array is treated as one series per row.
+    """
+    close = np.asarray(close, dtype=float)
+
+    prev = _shift(close, 1)
+    ma3 = _rolling_mean(close, 3)
+    ma6 = _rolling_mean(close, 6)
+
+    delta = close - prev
+    gain = np.where(np.isnan(delta), np.nan, np.clip(delta, 0, None))
+    loss = np.where(np.isnan(delta), np.nan, -np.clip(delta, None, 0))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = _rolling_mean(gain, RSI_WINDOW) / _rolling_mean(loss, RSI_WINDOW)
+        rsi = 100 - (100 / (1 + rs))
+        ret = close / prev - 1
+
+    return {
+        "Return": ret,
+        "MA3": ma3,
+        "MA6": ma6,
+        "Price_vs_MA": close - ma3,
+        "Momentum": close - _shift(close, 3),
+        "RSI": rsi
+    }
+
+
+def target_labels(close):
+    """
+    1 where the next bar closes higher, else 0 (the last bar gets 0).
+    """
+    close = np.asarray(close, dtype=float)
+    return (_shift(close[..., ::-1], 1)[..., ::-1] > close).astype(int)
+
+
+def add_features(df, target=False, dropna=False):
+    """
+    Adds technical features to a bar DataFrame.
+    target=True adds the next-bar 'Target' label, dropna=True drops warm-up rows.
+    """
+    close = df["Close"].to_numpy(dtype=float)
+
+    for name, values in compute_features(close).items():
+        df[name] = values
+
+    if target:
+        # Did price go up next bar?
+        df["Target"] = target_labels(close)
+
+    return df.dropna() if dropna else df
+
+
+# =====================================================
+# STREAMING MODE (ring buffer per series)
+# =====================================================
+def _features_from_window(closes):
+    """
+    Features of the last close in `closes` (at most STATE_SIZE values).
+    """
+    n = len(closes)
+    close = closes[-1]
+    nan = float("nan")
+
+    ma3 = sum(closes[-3:]) / 3 if n >= 3 else nan
+    features = {
+        "Return": close / closes[-2] - 1 if n >= 2 else nan,
+        "MA3": ma3,
+        "MA6": sum(closes[-6:]) / 6 if n >= 6 else nan,
+        "Price_vs_MA": close - ma3,
+        "Momentum": close - closes[-4] if n >= 4 else nan,
+        "RSI": nan
+    }
+
+    if n >= STATE_SIZE:
+        window = closes[-STATE_SIZE:]
+        deltas = [b - a for a, b in zip(window[:-1], window[1:])]
+        avg_gain = sum(d for d in deltas if d > 0) / RSI_WINDOW
+        avg_loss = sum(-d for d in deltas if d < 0) / RSI_WINDOW
+        if avg_loss:
+            features["RSI"] = 100 - (100 / (1 + avg_gain / avg_loss))
+        elif avg_gain:
+            features["RSI"] = 100.0
+
+    return features
+
+
+class StreamingFeatures:
+    """
+    O(1) feature updates for one series. Only the last STATE_SIZE closes
+    are kept, which is everything the widest window (RSI) needs.
+    """
+
+    def __init__(self):
+        self.closes = deque(maxlen=STATE_SIZE)
+
+    def seed(self, closes):
+        self.closes.extend(float(c) for c in closes[-STATE_SIZE:])
+        return self
+
+    def update(self, close):
+        """
+        Appends a finished bar and returns its features.
+        """
+        self.closes.append(float(close))
+        return _features_from_window(list(self.closes))
+
+    def peek(self, close):
+        """
+        Features for a bar that may still change (not committed to the state).
+        """
+        return _features_from_window(list(self.closes)[1 - STATE_SIZE:] + [float(close)])
+
+
+class FeatureEngine:
+    """
+    Keeps per-ticker streaming state plus the features of committed bars.
+
+    features_for() reuses features for bars it has already seen and only
+    computes the new ones. The newest bar is treated as still forming: it is
+    computed with peek() and recomputed on the next call. The first rows of
+    every window are NaN warm-ups, as in compute_features on the same frame,
+    however much history is cached.
+    """
+
+    def __init__(self, max_rows=5000):
+        self.max_rows = max_rows
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _cold_start(self, ticker, ts, close):
+        feats = compute_features(close)
+        matrix = np.column_stack([feats[name] for name in FEATURE_NAMES])
+        self._series[ticker] = {
+            "ts": ts[:-1][-self.max_rows:],
+            "features": matrix[:-1][-self.max_rows:],
+            "state": StreamingFeatures().seed(close[:-1])
+        }
+        return matrix
+
+    def features_for(self, ticker, df):
+        """
+        Returns a copy of `df` with feature columns added.
+        """
+        ts = to_epoch(df["Date"]).to_numpy()
+        close = df["Close"].to_numpy(dtype=float)
+
+        with self._lock:
+            entry = self._series.get(ticker)
+            known = 0
+            if entry is not None and len(entry["ts"]):
+                known = int(np.searchsorted(ts, entry["ts"][-1], side="right"))
+                start = np.searchsorted(entry["ts"], ts[0])
+                cached_ts = entry["ts"][start:start + known]
+                if known == 0 or not np.array_equal(cached_ts, ts[:known]):
+                    entry = None
+
+            if entry is None:
+                matrix = self._cold_start(ticker, ts, close)
+            else:
+                cached = entry["features"][start:start + known]
+                state = entry["state"]
+                new_rows = [
+                    [row[name] for name in FEATURE_NAMES]
+                    for row in (state.update(c) for c in close[known:-1])
+                ]
+                latest = state.peek(close[-1]) if known < len(close) else None
+
+                if new_rows:
+                    entry["ts"] = np.concatenate([entry["ts"], ts[known:-1]])[-self.max_rows:]
+                    entry["features"] = np.vstack([entry["features"], new_rows])[-self.max_rows:]
+
+                parts = [cached] + ([np.array(new_rows)] if new_rows else [])
+                if latest is not None:
+                    parts.append(np.array([[latest[name] for name in FEATURE_NAMES]]))
+                matrix = np.vstack(parts)
+
+        out = df.copy()
+        for i, name in enumerate(FEATURE_NAMES):
+            values = matrix[:, i].copy()
+            values[:WARMUP_ROWS[name]] = np.nan
+            out[name] = values
+        return out
+
+
+# =====================================================
+# SHARED INSTANCE
+# =====================================================
+_default_engine = FeatureEngine()
+
+
+def get_feature_engine():
+    return _default_engine
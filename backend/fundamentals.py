@@ -0,0 +1,367 @@
+import asyncio
+import json
+import math
+import numbers
+import os
+import sqlite3
+import threading
+import time
+
+from shared_cache import get_shared_cache, hold_lease
+from workers import pools
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+DEFAULT_FUNDAMENTALS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "fundamentals.sqlite")
+
+# field -> (source, TTL seconds). "quote" fields come from yfinance's cheap
+# fast_info, "info" fields from the slow Ticker.info call
+PRICE_TTL = int(os.getenv("OVERVIEW_PRICE_TTL", 60))
+FIELDS = {
+    "currentPrice": ("quote", PRICE_TTL),
+    "previousClose": ("quote", PRICE_TTL),
+    "marketCap": ("quote", 15 * 60),
+    "fiftyTwoWeekHigh": ("quote", 6 * 60 * 60),
+    "fiftyTwoWeekLow": ("quote", 6 * 60 * 60),
+    "trailingPE": ("info", 6 * 60 * 60),
+    "longBusinessSummary": ("info", 3 * 24 * 60 * 60),
+}
+
+OVERVIEW_CONCURRENCY = int(os.getenv("OVERVIEW_CONCURRENCY", 4))
+OVERVIEW_POLL_SECONDS = int(os.getenv("OVERVIEW_POLL_SECONDS", 60))
+
+
+def _normalize(ticker):
+    ticker = ticker.strip().upper()
+    return ticker if ticker.endswith(".NS") else ticker + ".NS"
+
+
+def _fields_of(source):
+    return [name for name, (src, _) in FIELDS.items() if src == source]
+
+
+def _plain(value):
+    # fast_info hands back numpy scalars and NaN for missing data; store
+    # plain floats and None so the values round-trip through JSON
+    if isinstance(value, numbers.Real) and not isinstance(value, bool):
+        value = float(value)
+        return value if math.isfinite(value) else None
+    return value
+
+
+# =====================================================
+# PROVIDERS
+# =====================================================
+class YFinanceInfoProvider:
+    """
+    fetch(ticker, source) -> {field: value} for the fields of that source.
+    Prices come from fast_info (last_price, previous_close), not from the
+    currentPrice/previousClose of Ticker.info.
+    """
+
+    def fetch(self, ticker, source):
+        import yfinance as yf
+
+        stock = yf.Ticker(ticker)
+        if source == "quote":
+            quote = stock.fast_info
+            return {
+                "currentPrice": quote.last_price,
+                "previousClose": quote.previous_close,
+                "marketCap": quote.market_cap,
+                "fiftyTwoWeekHigh": quote.year_high,
+                "fiftyTwoWeekLow": quote.year_low,
+            }
+        info = stock.info
+        return {name: info.get(name) for name in _fields_of(source)}
+
+
+class FileInfoProvider:
+    """
+    Offline provider backed by '<TICKER>.json' files holding Ticker.info
+    style dicts. Used for tests and benchmarks; records every fetch in `calls`.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.calls = []
+
+    def save(self, ticker, info):
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, f"{ticker}.json"), "w") as f:
+            json.dump(info, f)
+
+    def fetch(self, ticker, source):
+        self.calls.append((ticker, source))
+        path = os.path.join(self.root, f"{ticker}.json")
+        if not os.path.exists(path):
+            raise ValueError("Invalid ticker or no data available")
+        with open(path) as f:
+            info = json.load(f)
+        values = {name: info.get(name) for name in _fields_of(source)}
+        if "currentPrice" in values:
+            values["currentPrice"] = info.get("currentPrice") or info.get("regularMarketPrice")
+        return values
+
+
+# =====================================================
+# FUNDAMENTALS STORE
+# =====================================================
+class FundamentalsStore:
+    """
+    Per-field cache of company fundamentals: an in-memory dict in front of
+    a SQLite table that every worker shares and that survives restarts.
+
+    get() is a dict lookup whenever every field has a value. Fields past
+    their TTL are still served while a background task refreshes their
+    source; only fields never fetched make the caller wait.
+    """
+
+    def __init__(self, path=DEFAULT_FUNDAMENTALS_PATH, provider=None, clock=time.time):
+        self.path = path
+        self.provider = provider
+        self.clock = clock
+
+        self._fields = {}    # ticker -> {field: (value, fetched_at)}
+        self._refreshing = {}  # (ticker, source) -> task
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.errors = 0
+
+        self._schema_ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._schema_ready:
+            # Created on first use so importing the API does not touch disk
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS fundamentals (
+                    ticker TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    value TEXT,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (ticker, field)
+                )
+            """)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.commit()
+            self._schema_ready = True
+        return conn
+
+    def _provider(self):
+        if self.provider is None:
+            fixture_dir = os.getenv("OVERVIEW_FIXTURE_DIR")
+            self.provider = FileInfoProvider(fixture_dir) if fixture_dir else YFinanceInfoProvider()
+        return self.provider
+
+    # ---------- persistence ----------
+    def load(self, tickers=None):
+        """
+        Pulls rows written by this or another worker into memory.
+        """
+        conn = self._connect()
+        try:
+            if tickers is None:
+                rows = conn.execute("SELECT ticker, field, value, fetched_at FROM fundamentals").fetchall()
+            else:
+                marks = ",".join("?" * len(tickers))
+                rows = conn.execute(
+                    f"SELECT ticker, field, value, fetched_at FROM fundamentals WHERE ticker IN ({marks})",
+                    list(tickers)
+                ).fetchall()
+        finally:
+            conn.close()
+
+        with self._lock:
+            for ticker, field, value, fetched_at in rows:
+                current = self._fields.setdefault(ticker, {}).get(field)
+                if field in FIELDS and (current is None or current[1] < fetched_at):
+                    self._fields[ticker][field] = (json.loads(value), fetched_at)
+        return len(rows)
+
+    def _save(self, ticker, values, fetched_at):
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO fundamentals VALUES (?, ?, ?, ?)",
+                [(ticker, field, json.dumps(value), fetched_at) for field, value in values.items()]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    # ---------- freshness ----------
+    def _due(self, ticker):
+        """
+        (sources with a never-fetched field, sources with a stale field).
+        """
+        now = self.clock()
+        entry = self._fields.get(ticker, {})
+        missing, stale = set(), set()
+        for field, (source, ttl) in FIELDS.items():
+            cached = entry.get(field)
+            if cached is None:
+                missing.add(source)
+            elif now - cached[1] > ttl:
+                stale.add(source)
+        return missing, stale - missing
+
+    # ---------- refresh ----------
+    def refresh(self, ticker, source):
+        """
+        Fetches one source for a ticker, unless another worker already
+        stored a fresh copy. Blocking; run it on the I/O pool.
+        """
+        self.load([ticker])
+        missing, stale = self._due(ticker)
+        if source not in missing and source not in stale:
+            return
+
+        values = {field: _plain(value) for field, value in self._provider().fetch(ticker, source).items()}
+        fetched_at = self.clock()
+        self.fetches += 1
+        self._save(ticker, values, fetched_at)
+        with self._lock:
+            entry = self._fields.setdefault(ticker, {})
+            for field, value in values.items():
+                entry[field] = (value, fetched_at)
+
+    async def _refresh(self, ticker, source):
+        key = (ticker, source)
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.ensure_future(pools.run_io(self.refresh, ticker, source))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+        return await asyncio.shield(task)
+
+    def _revalidate(self, ticker, source):
+        async def run():
+            try:
+                await self._refresh(ticker, source)
+            except Exception as e:
+                self.errors += 1
+                print(f"Fundamentals refresh failed for {ticker} ({source}): {e}")
+
+        if (ticker, source) not in self._refreshing:
+            asyncio.create_task(run())
+
+    # ---------- public API ----------
+    async def get(self, ticker):
+        """
+        {field: value} for every field. Stale fields are returned as they
+        are and refreshed in the background.
+        """
+        ticker = _normalize(ticker)
+        missing, stale = self._due(ticker)
+
+        if missing:
+            self.misses += 1
+            await self._refresh_missing(ticker, missing)
+            missing, stale = self._due(ticker)
+        elif stale:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+
+        for source in stale:
+            self._revalidate(ticker, source)
+
+        entry = self._fields.get(ticker, {})
+        return {field: entry[field][0] if field in entry else None for field in FIELDS}
+
+    async def _refresh_missing(self, ticker, missing):
+        # Another worker may have fetched it already
+        await pools.run_io(self.load, [ticker])
+        missing, _ = self._due(ticker)
+        await asyncio.gather(*(self._refresh(ticker, source) for source in missing))
+
+    async def warm(self, tickers, concurrency=OVERVIEW_CONCURRENCY):
+        """
+        Bulk refresh of every missing or stale source for `tickers`.
+        Returns the number of sources fetched.
+        """
+        tickers = [_normalize(t) for t in tickers]
+        await pools.run_io(self.load, tickers)
+        semaphore = asyncio.Semaphore(concurrency)
+        before = self.fetches
+
+        async def refresh(ticker, source):
+            async with semaphore:
+                try:
+                    await self._refresh(ticker, source)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Fundamentals warm-up failed for {ticker} ({source}): {e}")
+
+        jobs = []
+        for ticker in tickers:
+            missing, stale = self._due(ticker)
+            jobs.extend(refresh(ticker, source) for source in missing | stale)
+        await asyncio.gather(*jobs)
+        return self.fetches - before
+
+    async def run_forever(self, tickers, poll_seconds=OVERVIEW_POLL_SECONDS):
+        """
+        Keeps `tickers` warm. With several workers only the holder of the
+        "fundamentals" lease fetches; the others reload what it stores.
+        """
+        while True:
+            try:
+                leader = await pools.run_io(hold_lease, get_shared_cache(), "fundamentals",
+                                            max(poll_seconds * 5, 60))
+                if leader:
+                    fetched = await self.warm(tickers)
+                    if fetched:
+                        print(f"Fundamentals refreshed: {fetched} sources")
+                else:
+                    await pools.run_io(self.load, [_normalize(t) for t in tickers])
+            except Exception as e:
+                print(f"Fundamentals cycle failed: {e}")
+            await asyncio.sleep(poll_seconds)
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "tickers": len(self._fields),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "fetches": self.fetches,
+            "errors": self.errors,
+            "refreshing": len(self._refreshing),
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+# =====================================================
+# OVERVIEW PAYLOAD
+# =====================================================
+def format_overview(fields):
+    """
+    /overview response from cached fields (missing data handled safely).
+    """
+    current_price = fields["currentPrice"] or 0
+    prev_close = fields["previousClose"] or 0
+    pe_ratio = fields["trailingPE"] or 0
+    price_change = current_price - prev_close
+
+    return {
+        "current_price": round(current_price, 2),
+        "price_change": round(price_change, 2),
+        "change_percent": round((price_change / prev_close) * 100 if prev_close else 0, 2),
+        "market_cap": fields["marketCap"] or 0,
+        "pe_ratio": round(pe_ratio, 2) if pe_ratio else "N/A",
+        "high_52": round(fields["fiftyTwoWeekHigh"] or 0, 2),
+        "low_52": round(fields["fiftyTwoWeekLow"] or 0, 2),
+        "description": fields["longBusinessSummary"] or "No description available."
+    }
+
+
+fundamentals_store = FundamentalsStore(os.getenv("FUNDAMENTALS_STORE_PATH", DEFAULT_FUNDAMENTALS_PATH))
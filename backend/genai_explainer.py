@@ -1,18 +1,77 @@
+import json
 import os
 import time
-from google import genai
+from types import SimpleNamespace
 from dotenv import load_dotenv
+from metrics import record, span
 
 # 1. Load Environment Variables
 load_dotenv()
 api_key = os.getenv("GEMINI_API_KEY")
 
-# 2. Initialize the Client
+# Reliable fallback headlines if AI fails
+FALLBACK_HEADLINES = [
+    {"title": "Sensex rallies 500 points on global cues", "sentiment": "positive"},
+    {"title": "Banking stocks under pressure ahead of RBI policy", "sentiment": "negative"},
+    {"title": "Rupee opens flat against US Dollar", "sentiment": "neutral"},
+    {"title": "Reliance Industries hits fresh 52-week high", "sentiment": "positive"},
+    {"title": "FIIs sell equities worth ₹2,000 Cr on Monday", "sentiment": "negative"}
+]
+
+
+# ==========================================
+#  OFFLINE STUB CLIENT (LLM_STUB=1)
+# ==========================================
+class StubClient:
+    """
+    Local stand-in for genai.Client with the same models / aio.models
+    surface. Returns canned text instantly and counts calls.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.models = SimpleNamespace(generate_content=self._generate)
+        self.aio = SimpleNamespace(models=SimpleNamespace(
+            generate_content=self._generate_async,
+            generate_content_stream=self._generate_stream
+        ))
+
+    def _generate(self, model, contents):
+        self.calls += 1
+        if "headlines" in contents:
+            return SimpleNamespace(text=json.dumps(FALLBACK_HEADLINES))
+        return SimpleNamespace(text="• Stub insight: offline LLM client in use.")
+
+    async def _generate_async(self, model, contents):
+        return self._generate(model, contents)
+
+    async def _generate_stream(self, model, contents):
+        text = self._generate(model, contents).text
+
+        async def chunks():
+            for word in text.split(" "):
+                yield SimpleNamespace(text=word + " ")
+        return chunks()
+
+
+# 2. Initialize the Client (on first use, so importing this module stays cheap)
 # Note: Ensure you have the latest library: pip install -U google-genai
-client = genai.Client(api_key=api_key)
+_client = None
 
-def generate_explanation(context_data):
-    prompt = f"""
+
+def get_client():
+    global _client
+    if _client is None:
+        if os.getenv("LLM_STUB"):
+            _client = StubClient()
+        else:
+            from google import genai
+            _client = genai.Client(api_key=api_key)
+    return _client
+
+
+def build_prompt(context_data):
+    return f"""
     You are an expert quantitative technical analyst.
     
     The Data:
@@ -37,6 +96,14 @@ def generate_explanation(context_data):
     Generate the insights now:
     """
 
+
+def is_busy_error(error_msg):
+    return "429" in error_msg or "503" in error_msg or "RESOURCE_EXHAUSTED" in error_msg
+
+
+def generate_explanation(context_data):
+    prompt = build_prompt(context_data)
+
     # --- RETRY LOGIC ---
     max_retries = 3
     
@@ -44,17 +111,18 @@ def generate_explanation(context_data):
         try:
             # FIX: Using the specific versioned ID 'gemini-1.5-flash-001' 
             # If this fails, you can fallback to 'gemini-pro'
-            response = client.models.generate_content(
-                model="gemini-flash-latest", 
-                contents=prompt
-            )
+            with span("llm"):
+                response = get_client().models.generate_content(
+                    model="gemini-flash-latest", 
+                    contents=prompt
+                )
             return response.text.strip()
 
         except Exception as e:
             error_msg = str(e)
             
             # Handle Quota (429) or Overload (503) or Not Found (404 - try fallback)
-            if "429" in error_msg or "503" in error_msg or "RESOURCE_EXHAUSTED" in error_msg:
+            if is_busy_error(error_msg):
                 wait_time = 5 * (attempt + 1)
                 print(f"⚠️ API Busy. Pausing for {wait_time}s...")
                 time.sleep(wait_time)
@@ -63,7 +131,7 @@ def generate_explanation(context_data):
                  # Fallback for 404: Try the standard Pro model if Flash isn't found
                 print("⚠️ Flash model not found. Falling back to Gemini Pro...")
                 try:
-                    response = client.models.generate_content(
+                    response = get_client().models.generate_content(
                         model="gemini-pro", 
                         contents=prompt
                     )
@@ -76,6 +144,64 @@ def generate_explanation(context_data):
     
     return "AI Unavailable: Service overloaded. Please try again later."
 
+
+async def generate_explanation_stream(context_data, model="gemini-flash-latest"):
+    """
+    Yields the explanation text chunk by chunk as Gemini produces it.
+    Errors are raised to the caller (the insight queue owns retries).
+    """
+    started = time.perf_counter()
+    with span("llm"):
+        stream = await get_client().aio.models.generate_content_stream(
+            model=model,
+            contents=build_prompt(context_data)
+        )
+        first = True
+        async for chunk in stream:
+            if chunk.text:
+                if first:
+                    record("llm_first_token", time.perf_counter() - started)
+                    first = False
+                yield chunk.text
+
+
+# ==========================================
+#  MARKET HEADLINES (/news/ticker)
+# ==========================================
+HEADLINES_PROMPT = """
+Generate 8 short, realistic "breaking news" headlines for the Indian Stock Market (Nifty 50, Sensex, Bank Nifty, and top stocks like Reliance/TCS).
+
+Requirements:
+1. Mix of Positive (Bullish), Negative (Bearish), and Neutral news.
+2. Keep headlines under 10 words.
+3. Output strictly valid JSON format.
+
+Output Structure:
+[
+    {"title": "Nifty reclaims 22,000 mark amid heavy buying", "sentiment": "positive"},
+    {"title": "TCS shares dip 2% after quarterly results miss", "sentiment": "negative"}
+]
+
+Return ONLY the JSON array. No markdown formatting.
+"""
+
+
+async def generate_headlines_async():
+    """
+    Uses Gemini Flash to generate realistic 'Live' Indian market headlines.
+    Raises on failure so callers can keep their previous headlines.
+    """
+    with span("llm"):
+        response = await get_client().aio.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=HEADLINES_PROMPT
+        )
+
+    # Clean the response text (remove markdown backticks if Gemini adds them)
+    cleaned_text = response.text.strip().replace("```json", "").replace("```", "")
+    return json.loads(cleaned_text)
+
+
 # Test Block
 if __name__ == "__main__":
     print("Testing AI Connection...")
@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+from genai_explainer import generate_explanation_stream, is_busy_error
+from llm_cache import explanation_key, explanations
+from workers import pools
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", 15))
+INSIGHT_WORKERS = int(os.getenv("INSIGHT_WORKERS", pools.limits["llm"]))
+MAX_ATTEMPTS = 3
+MAX_JOBS = 2000
+FALLBACK_MODEL = "gemini-pro"
+
+
+# =====================================================
+# SHARED RATE LIMITER
+# =====================================================
+class RateLimiter:
+    """
+    Async rate limiter shared by every Gemini call in the process.
+    Calls are spaced 60 / rate_per_minute seconds apart, and a 429
+    pauses all callers at once instead of each one sleeping on its own.
+    """
+
+    def __init__(self, rate_per_minute=GEMINI_RPM, clock=time.monotonic):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self.clock = clock
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+
+    async def acquire(self):
+        now = self.clock()
+        slot = max(now, self._next_slot, self._paused_until)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def pause(self, seconds):
+        self._paused_until = max(self._paused_until, self.clock() + seconds)
+
+
+# =====================================================
+# INSIGHT JOBS
+# =====================================================
+class InsightJob:
+    """
+    One explanation being generated. Subscribers replay the chunks produced
+    so far and then follow new ones until the job is done.
+    """
+
+    def __init__(self, job_id, key, context):
+        self.id = job_id
+        self.key = key
+        self.context = context
+        self.chunks = []
+        self.done = False
+        self.failed = False
+        self.attempts = 0
+        self.model = "gemini-flash-latest"
+        self._changed = asyncio.Event()
+
+    @property
+    def text(self):
+        return "".join(self.chunks).strip()
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def append(self, chunk):
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error=None):
+        if error is not None:
+            self.failed = True
+            self.chunks = [error]
+        self.done = True
+        self._notify()
+
+    async def stream(self):
+        sent = 0
+        while True:
+            changed = self._changed
+            while sent < len(self.chunks):
+                yield self.chunks[sent]
+                sent += 1
+            if self.done:
+                return
+            await changed.wait()
+
+    async def wait(self):
+        async for _ in self.stream():
+            pass
+        return self.text
+
+
+def _job_id(key):
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+
+
+# =====================================================
+# BACKGROUND QUEUE
+# =====================================================
+class InsightQueue:
+    """
+    Bounded pool of background workers that stream Gemini explanations.
+    Identical contexts (same explanation_key bucket) share one job, and
+    finished texts go into the shared explanation cache.
+    """
+
+    def __init__(self, workers=INSIGHT_WORKERS, limiter=None):
+        self.workers = workers
+        self.limiter = limiter or RateLimiter()
+        self._jobs = OrderedDict()
+        self._queue = None
+        self._tasks = []
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def submit(self, context):
+        """
+        Returns the job for this context, starting one if needed.
+        """
+        key = explanation_key(context)
+        job_id = _job_id(key)
+
+        job = self._jobs.get(job_id)
+        fresh = job is not None and not job.failed and (not job.done or explanations.peek(key)[0])
+        if fresh:
+            self._jobs.move_to_end(job_id)
+            return job
+
+        job = InsightJob(job_id, key, context)
+        hit, text = explanations.peek(key)
+        if hit:
+            job.append(text)
+            job.finish()
+        else:
+            if self._queue is None:
+                self.start()
+            self._queue.put_nowait(job)
+
+        self._jobs[job_id] = job
+        while len(self._jobs) > MAX_JOBS:
+            self._jobs.popitem(last=False)
+        return job
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await pools.run_llm(self._run, job)
+            except Exception as e:
+                job.finish(error=f"AI Analysis Error: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job):
+        job.attempts += 1
+        await self.limiter.acquire()
+
+        try:
+            async for chunk in generate_explanation_stream(job.context, model=job.model):
+                job.append(chunk)
+        except Exception as e:
+            error_msg = str(e)
+            retryable = not job.chunks and job.attempts < MAX_ATTEMPTS
+
+            if retryable and is_busy_error(error_msg):
+                # Shared backoff: every queued call waits, nobody sleeps in a request
+                print(f"⚠️ API Busy. Pausing insight queue for {5 * job.attempts}s...")
+                self.limiter.pause(5 * job.attempts)
+                self._queue.put_nowait(job)
+            elif retryable and "404" in error_msg and job.model != FALLBACK_MODEL:
+                print("⚠️ Flash model not found. Falling back to Gemini Pro...")
+                job.model = FALLBACK_MODEL
+                self._queue.put_nowait(job)
+            elif is_busy_error(error_msg):
+                job.finish(error="AI Unavailable: Service overloaded. Please try again later.")
+            else:
+                job.finish(error=f"AI Analysis Error: {error_msg}")
+            return
+
+        job.finish()
+        explanations.put(job.key, job.text)
+
+
+insight_queue = InsightQueue()
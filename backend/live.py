@@ -0,0 +1,411 @@
+import asyncio
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from bar_store import FileBarProvider, get_store, to_epoch
+from features import StreamingFeatures, add_features
+from main import FEATURE_COLS, run_trend_analysis, trend_signal
+from metrics import span
+from model_registry import get_registry, model_key
+from serialization import dumps
+from singleflight import SingleFlight
+from training import TrendModel
+from workers import pools
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+LIVE_INTERVAL = "1h"
+LIVE_HISTORY_PERIOD = "30d"
+LIVE_POLL_SECONDS = float(os.getenv("LIVE_POLL_SECONDS", 30))
+
+# Updates buffered per subscriber; a slow client loses the oldest ones
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", 100))
+LIVE_MAX_TICKERS = 50
+
+# LIVE_REPLAY_DIR replays '<TICKER>_<interval>.csv' files (FileBarProvider
+# layout) instead of polling the bar store: the first LIVE_REPLAY_WARMUP
+# bars seed the state, then every poll releases the next bar
+LIVE_REPLAY_WARMUP = int(os.getenv("LIVE_REPLAY_WARMUP", 200))
+
+
+def _normalize(ticker):
+    ticker = ticker.strip().upper()
+    return ticker if ticker.endswith(".NS") else ticker + ".NS"
+
+
+# =====================================================
+# BAR SOURCES
+# =====================================================
+# history(ticker) -> (ts, close) arrays or None
+# poll(since)     -> {ticker: (ts, close)} for bars at or after since[ticker]
+class StoreBarSource:
+    """
+    Live bars from the bar store (one grouped refresh per poll).
+    """
+
+    def __init__(self, interval=LIVE_INTERVAL, period=LIVE_HISTORY_PERIOD):
+        self.interval = interval
+        self.period = period
+
+    def history(self, ticker):
+        series = get_store().get_arrays(ticker, self.interval, self.period)
+        if series is None or not len(series):
+            return None
+        return series.ts, series["Close"]
+
+    def poll(self, since):
+        out = {}
+        for ticker, series in get_store().get_many_arrays(list(since), self.interval, self.period).items():
+            if series is not None:
+                recent = series.slice(since[ticker])
+                out[ticker] = (recent.ts, recent["Close"])
+        return out
+
+
+class ReplayBarSource:
+    """
+    Offline source: replays stored CSV bars one bar per poll, so the live
+    pipeline can be exercised without a market feed.
+    """
+
+    def __init__(self, root, interval=LIVE_INTERVAL, warmup=LIVE_REPLAY_WARMUP, bars_per_poll=1):
+        self.provider = FileBarProvider(root)
+        self.interval = interval
+        self.warmup = warmup
+        self.bars_per_poll = bars_per_poll
+        self._bars = {}    # ticker -> (ts, close)
+        self._cursor = {}  # ticker -> bars released so far
+
+    def _load(self, ticker):
+        if ticker not in self._bars:
+            df = self.provider.fetch(ticker, self.interval)
+            ts = to_epoch(df["Date"]).to_numpy(dtype="int64")
+            self._bars[ticker] = (ts, df["Close"].to_numpy(dtype=float))
+            self._cursor[ticker] = min(self.warmup, len(ts))
+        return self._bars[ticker]
+
+    def history(self, ticker):
+        ts, close = self._load(ticker)
+        end = self._cursor[ticker]
+        return (ts[:end], close[:end]) if end else None
+
+    def poll(self, since):
+        out = {}
+        for ticker in since:
+            ts, close = self._load(ticker)
+            end = min(self._cursor[ticker] + self.bars_per_poll, len(ts))
+            self._cursor[ticker] = end
+            start = int(np.searchsorted(ts[:end], since[ticker], side="left"))
+            out[ticker] = (ts[start:end], close[start:end])
+        return out
+
+
+def default_source():
+    replay_dir = os.getenv("LIVE_REPLAY_DIR")
+    return ReplayBarSource(replay_dir) if replay_dir else StoreBarSource()
+
+
+# =====================================================
+# MODEL TRAINING
+# =====================================================
+def _model_key(ticker, interval, bar_ts):
+    return model_key(ticker, interval, FEATURE_COLS, pd.Timestamp(bar_ts, unit="s"))
+
+
+def train_trend_model(ts, close):
+    """
+    Fresh TrendModel trained on bars up to the last one, like
+    run_trend_analysis does for /technical. Kept top-level so it can be
+    sent to a worker process.
+    """
+    df = pd.DataFrame({"Date": pd.to_datetime(ts, unit="s", utc=True), "Close": close})
+    add_features(df)
+    model = TrendModel()
+    run_trend_analysis(df, trend_model=model)
+    return model
+
+
+# =====================================================
+# PER-TICKER STATE
+# =====================================================
+class LiveTicker:
+    """
+    Streaming features plus the cached trend model for one ticker.
+    The newest bar is treated as forming: its features are peeked, and it
+    is committed to the feature state once a later bar shows up.
+    """
+
+    def __init__(self, ticker, interval=LIVE_INTERVAL):
+        self.ticker = ticker
+        self.interval = interval
+        self.features = StreamingFeatures()
+        self.model = None
+        self.model_ts = None  # bar the model was trained for
+        self.bar_ts = None
+        self.close = None
+        self.message = None
+
+    def seed(self, ts, close):
+        """
+        Builds the state from history; the model comes from the registry
+        (trained once on a miss, exactly like /technical).
+        """
+        self.bar_ts, self.close = int(ts[-1]), float(close[-1])
+
+        registry = get_registry()
+        key = _model_key(self.ticker, self.interval, self.bar_ts)
+        model = registry.get(key)
+        if model is None:
+            model = train_trend_model(ts, close)
+            registry.put(key, model)
+        self.model, self.model_ts = model, self.bar_ts
+
+        self.features.seed(close[:-1])
+        return self.evaluate()
+
+    def _adopt_newer_model(self):
+        # Reuse a model someone else trained on this bar; the hub retrains otherwise
+        model = get_registry().get(_model_key(self.ticker, self.interval, self.bar_ts))
+        if model is not None:
+            self.model, self.model_ts = model, self.bar_ts
+
+    @property
+    def model_stale(self):
+        return self.model_ts != self.bar_ts
+
+    def advance(self, ts, close):
+        """
+        Applies polled bars. Returns True when the forming bar changed.
+        """
+        changed = False
+        for bar_ts, bar_close in zip(ts.tolist(), close.tolist()):
+            if bar_ts < self.bar_ts:
+                continue
+            if bar_ts > self.bar_ts:
+                # A new bar finishes the forming one
+                self.features.update(self.close)
+                self.bar_ts, self.close = bar_ts, bar_close
+                self._adopt_newer_model()
+                changed = True
+            elif bar_close != self.close:
+                self.close = bar_close
+                changed = True
+        return changed
+
+    def evaluate(self):
+        """
+        Prediction for the forming bar, encoded once for every subscriber.
+        """
+        feats = self.features.peek(self.close)
+        update = {
+            "type": "update",
+            "ticker": self.ticker,
+            "bar_ts": self.bar_ts,
+            "date": pd.Timestamp(self.bar_ts, unit="s", tz="UTC").isoformat(),
+            "price": round(self.close, 2),
+            "trend": None,
+            "confidence": None,
+            "signal": None,
+            "rsi": None,
+            "model_ts": self.model_ts
+        }
+
+        row = [feats[name] for name in FEATURE_COLS]
+        if not any(math.isnan(v) for v in row + [feats["RSI"]]):
+            prediction = self.model.predict([row])[0]
+            trend = "UP" if prediction == 1 else "DOWN"
+            update.update({
+                "trend": trend,
+                "confidence": round(float(self.model.predict_proba([row]).max()), 4),
+                "signal": trend_signal(trend, feats["RSI"]),
+                "rsi": round(float(feats["RSI"]), 2)
+            })
+
+        self.message = dumps(update).decode()
+        return self.message
+
+
+# =====================================================
+# SUBSCRIPTIONS
+# =====================================================
+class Subscription:
+    """
+    One client's queue of encoded updates.
+    """
+
+    def __init__(self, maxsize=LIVE_QUEUE_SIZE):
+        self.tickers = set()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def push(self, message):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def next(self):
+        return await self.queue.get()
+
+
+class LiveHub:
+    """
+    Fans bar updates out to subscribers. Each poll advances every
+    subscribed ticker once and encodes one message per changed ticker,
+    however many clients are listening to it.
+    """
+
+    def __init__(self, source=None, poll_seconds=LIVE_POLL_SECONDS, interval=LIVE_INTERVAL):
+        self.source = source
+        self.poll_seconds = poll_seconds
+        self.interval = interval
+
+        self._tickers = {}      # ticker -> LiveTicker
+        self._subscribers = {}  # ticker -> set of Subscription
+        self._seeding = SingleFlight(ttl=0)
+        self._retraining = SingleFlight(ttl=0)
+        self._task = None
+
+        self.polls = 0
+        self.computations = 0
+        self.deliveries = 0
+        self.retrains = 0
+
+    def _source(self):
+        if self.source is None:
+            self.source = default_source()
+        return self.source
+
+    def _seed(self, ticker):
+        history = self._source().history(ticker)
+        if history is None:
+            raise ValueError("Invalid ticker or no data available")
+        state = LiveTicker(ticker, self.interval)
+        with span("live_seed"):
+            state.seed(*history)
+        return state
+
+    async def _state(self, ticker):
+        state = self._tickers.get(ticker)
+        if state is None:
+            state = await self._seeding.run(ticker, pools.run_io, self._seed, ticker)
+            self._tickers.setdefault(ticker, state)
+        return self._tickers[ticker]
+
+    async def subscribe(self, subscription, tickers):
+        """
+        Adds tickers to a subscription and pushes their current state.
+        Returns {ticker: error} for tickers that could not be seeded.
+        """
+        errors = {}
+        for ticker in (_normalize(t) for t in tickers if t.strip()):
+            if ticker in subscription.tickers:
+                continue
+            if len(subscription.tickers) >= LIVE_MAX_TICKERS:
+                errors[ticker] = f"At most {LIVE_MAX_TICKERS} tickers per subscription"
+                continue
+            try:
+                state = await self._state(ticker)
+            except Exception as e:
+                errors[ticker] = str(e)
+                continue
+            subscription.tickers.add(ticker)
+            self._subscribers.setdefault(ticker, set()).add(subscription)
+            subscription.push(state.message)
+
+        if self._subscribers and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self.run())
+        return errors
+
+    def unsubscribe(self, subscription, tickers=None):
+        names = set(subscription.tickers) if tickers is None else {_normalize(t) for t in tickers if t.strip()}
+        for ticker in names & subscription.tickers:
+            subscription.tickers.discard(ticker)
+            listeners = self._subscribers.get(ticker)
+            if listeners is not None:
+                listeners.discard(subscription)
+                if not listeners:
+                    # Nobody listens: drop the state, re-seeded on the next subscribe
+                    del self._subscribers[ticker]
+                    self._tickers.pop(ticker, None)
+
+    def _advance(self, states):
+        with span("live_update"):
+            bars = self._source().poll({ticker: state.bar_ts for ticker, state in states.items()})
+            return [ticker for ticker, (ts, close) in bars.items() if states[ticker].advance(ts, close)]
+
+    def _evaluate(self, states, tickers):
+        with span("live_update"):
+            return {ticker: states[ticker].evaluate() for ticker in tickers}
+
+    async def _train(self, ticker, bar_ts):
+        # Registry first (another worker or /technical may have trained it),
+        # then a fit on the CPU pool over the history up to this bar
+        registry = get_registry()
+        key = _model_key(ticker, self.interval, bar_ts)
+        model = await pools.run_io(registry.get, key)
+        if model is None:
+            ts, close = await pools.run_io(self._source().history, ticker)
+            upto = ts <= bar_ts
+            model = await pools.run_cpu(train_trend_model, ts[upto], close[upto])
+            await pools.run_io(registry.put, key, model)
+            self.retrains += 1
+        return model
+
+    async def _refresh_model(self, state):
+        bar_ts = state.bar_ts
+        try:
+            model = await self._retraining.run((state.ticker, bar_ts), self._train, state.ticker, bar_ts)
+        except Exception as e:
+            # Keep predicting with the previous model
+            print(f"Live retrain failed for {state.ticker}: {e}")
+            return
+        if state.bar_ts == bar_ts:
+            state.model, state.model_ts = model, bar_ts
+
+    async def poll_once(self):
+        states = {t: self._tickers[t] for t in self._subscribers if t in self._tickers}
+        if not states:
+            return 0
+        changed = await pools.run_io(self._advance, states)
+        # A committed bar makes the model one bar old: retrain before predicting
+        await asyncio.gather(*(self._refresh_model(states[t]) for t in changed if states[t].model_stale))
+        updates = await pools.run_io(self._evaluate, states, changed)
+        self.polls += 1
+        self.computations += len(updates)
+        for ticker, message in updates.items():
+            for subscription in self._subscribers.get(ticker, ()):
+                subscription.push(message)
+                self.deliveries += 1
+        return len(updates)
+
+    async def run(self):
+        # Stops by itself once the last subscriber leaves
+        while self._subscribers:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                await self.poll_once()
+            except Exception as e:
+                print(f"Live poll failed: {e}")
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def stats(self):
+        return {
+            "tickers": len(self._tickers),
+            "subscriptions": len({id(s) for subs in self._subscribers.values() for s in subs}),
+            "polls": self.polls,
+            "computations": self.computations,
+            "deliveries": self.deliveries,
+            "retrains": self.retrains,
+            "poll_seconds": self.poll_seconds
+        }
+
+
+live_hub = LiveHub()
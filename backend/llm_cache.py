@@ -0,0 +1,132 @@
+import asyncio
+import math
+import os
+import time
+
+from genai_explainer import FALLBACK_HEADLINES, generate_headlines_async
+from shared_cache import get_object, get_shared_cache, hold_lease, set_object
+from singleflight import SingleFlight
+from workers import pools
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+EXPLANATION_TTL = int(os.getenv("EXPLANATION_TTL", 15 * 60))
+EXPLANATION_MAX_ENTRIES = int(os.getenv("EXPLANATION_MAX_ENTRIES", 5000))
+NEWS_REFRESH_SECONDS = int(os.getenv("NEWS_REFRESH_SECONDS", 300))
+NEWS_RETRY_SECONDS = 30
+NEWS_SHARED_KEY = "news:headlines"
+
+# Bucket sizes: contexts that land in the same bucket share one explanation
+RSI_BUCKET = 5
+CONFIDENCE_BUCKET = 0.05
+PRICE_SIGNIFICANT_DIGITS = 3
+
+ERROR_PREFIXES = ("AI Analysis Error", "AI Model Error", "AI Unavailable")
+
+
+# =====================================================
+# EXPLANATION CACHE
+# =====================================================
+def _bucket(value, step):
+    return round(round(float(value) / step) * step, 6)
+
+
+def _significant(value, digits=PRICE_SIGNIFICANT_DIGITS):
+    value = float(value)
+    if value == 0 or not math.isfinite(value):
+        return value
+    return round(value, digits - 1 - int(math.floor(math.log10(abs(value)))))
+
+
+def explanation_key(context):
+    """
+    Buckets the numeric inputs so near-identical contexts share a key.
+    """
+    return (
+        context["trend"],
+        context["signal"],
+        _bucket(context["confidence"], CONFIDENCE_BUCKET),
+        _bucket(context["rsi"], RSI_BUCKET),
+        _significant(context["risk_lower"]),
+        _significant(context["risk_upper"]),
+    )
+
+
+def _is_good_explanation(text):
+    return isinstance(text, str) and not text.startswith(ERROR_PREFIXES)
+
+
+# Finished explanations per bucket, filled by the insight queue (insights.py)
+explanations = SingleFlight(
+    ttl=EXPLANATION_TTL,
+    max_entries=EXPLANATION_MAX_ENTRIES,
+    cacheable=_is_good_explanation
+)
+
+
+# =====================================================
+# NEWS CACHE (refreshed in the background)
+# =====================================================
+class NewsCache:
+    """
+    Holds the latest generated headlines for every /news/ticker request.
+    run_forever() refreshes them on a schedule; until the first success,
+    requests fall back to FALLBACK_HEADLINES.
+
+    With several workers only the holder of the "news" lease calls Gemini;
+    the others pick its headlines up from the shared cache.
+    """
+
+    def __init__(self, refresh_seconds=NEWS_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.headlines = None
+        self.updated_at = None
+        self._last_attempt = None
+        self._flight = SingleFlight(ttl=0)
+
+    async def refresh(self):
+        self._last_attempt = time.time()
+        try:
+            headlines = await pools.run_llm(generate_headlines_async)
+        except Exception as e:
+            print(f"AI Error: {e}")
+            return self.headlines
+        self.headlines = headlines
+        self.updated_at = time.time()
+        await pools.run_io(set_object, get_shared_cache(), NEWS_SHARED_KEY,
+                           (headlines, self.updated_at), ex=self.refresh_seconds * 3 or None)
+        return headlines
+
+    async def _adopt_shared(self):
+        shared = await pools.run_io(get_object, get_shared_cache(), NEWS_SHARED_KEY)
+        if shared is not None and (self.updated_at is None or shared[1] > self.updated_at):
+            self.headlines, self.updated_at = shared
+        return self.headlines
+
+    async def get(self):
+        if self.headlines is None:
+            await self._adopt_shared()
+        retry_due = self._last_attempt is None or time.time() - self._last_attempt >= NEWS_RETRY_SECONDS
+        if self.headlines is None and retry_due:
+            await self._flight.run("news", self.refresh)
+        return self.headlines or FALLBACK_HEADLINES
+
+    async def run_forever(self):
+        while True:
+            leader = await pools.run_io(hold_lease, get_shared_cache(), "news", self.refresh_seconds * 2)
+            if leader:
+                await self._flight.run("news", self.refresh)
+            else:
+                await self._adopt_shared()
+            await asyncio.sleep(self.refresh_seconds)
+
+    def stats(self):
+        return {
+            "has_headlines": self.headlines is not None,
+            "updated_at": self.updated_at,
+            "refresh_seconds": self.refresh_seconds
+        }
+
+
+news_cache = NewsCache()
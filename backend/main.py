@@ -1,80 +1,74 @@
 import pandas as pd
 import numpy as np
+import argparse
 import json
-import sys
-import yfinance as yf
-from sklearn.linear_model import LogisticRegression
-from sklearn.preprocessing import StandardScaler
-from genai_explainer import generate_explanation
+from training import TrendModel
+from model_registry import get_registry, model_key
+from bar_store import get_store, to_epoch
+from features import add_features, get_feature_engine
+from monte_carlo import simulate_final_prices, summarize
+from metrics import span
+from workers import pools
 
 
 # =====================================================
 # DATA LOADING
 # =====================================================
 
-def load_data(ticker):
+def load_data(ticker, interval="1h", period="30d"):
 
     if not ticker.endswith(".NS"):
         ticker = ticker + ".NS"
 
-    df = yf.download(
-        ticker,
-        interval="1h",
-        period="30d",
-        progress=False
-    )
+    # Served from the local bar store; only new bars are downloaded
+    with span("data"):
+        df = get_store().get_bars(ticker, interval=interval, period=period)
 
     if df.empty:
         raise ValueError("Invalid ticker or no data available")
 
-    # FIX: flatten multi-index columns
-    df.columns = df.columns.get_level_values(0)
-
-    df.reset_index(inplace=True)
     return df
 
 
-
-# =====================================================
-# FEATURE ENGINEERING
-# =====================================================
-
-def add_features(df):
+def load_many(tickers, interval="1h", period="30d"):
     """
-    Adds technical features.
+    Batch load_data: one grouped refresh of the bar store for all tickers.
+    Returns {ticker: DataFrame}; tickers without data map to an empty frame.
     """
-    df["Return"] = df["Close"].pct_change()
-    df["MA3"] = df["Close"].rolling(3).mean()
-    df["MA6"] = df["Close"].rolling(6).mean()
-    df["Price_vs_MA"] = df["Close"] - df["MA3"]
-    df["Momentum"] = df["Close"] - df["Close"].shift(3)
-
-    # RSI
-    delta = df["Close"].diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-
-    avg_gain = gain.rolling(14).mean()
-    avg_loss = loss.rolling(14).mean()
-    rs = avg_gain / avg_loss
+    tickers = [t if t.endswith(".NS") else t + ".NS" for t in tickers]
+    with span("data"):
+        return get_store().get_many(tickers, interval=interval, period=period)
 
-    df["RSI"] = 100 - (100 / (1 + rs))
-
-    return df
 
 
 # =====================================================
 # TREND ANALYSIS (ML + RSI)
 # =====================================================
 
-def run_trend_analysis(df):
+FEATURE_COLS = ["Return", "MA3", "MA6", "Price_vs_MA", "Momentum"]
+
+
+def trend_signal(trend, rsi):
+    """
+    RSI confirmation: BUY/SELL only when RSI is not already stretched.
+    """
+    if trend == "UP" and rsi < 70:
+        return "BUY"
+    if trend == "DOWN" and rsi > 30:
+        return "SELL"
+    return "HOLD"
+
+
+def run_trend_analysis(df, trend_model=None):
     """
     Runs ML trend prediction and RSI confirmation.
+    Pass a training.TrendModel to reuse its state between calls; only bars
+    newer than the last update are then used to update it.
     """
 
     df["Target"] = (df["Close"].shift(-1) > df["Close"]).astype(int)
 
-    feature_cols = ["Return", "MA3", "MA6", "Price_vs_MA", "Momentum"]
+    feature_cols = FEATURE_COLS
 
     df_clean = df.dropna(subset=feature_cols + ["RSI"]).copy()
 
@@ -87,31 +81,26 @@ def run_trend_analysis(df):
     X = train_df[feature_cols]
     y = train_df["Target"]
 
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-
-    model = LogisticRegression(max_iter=1000)
-    model.fit(X_scaled, y)
+    # Row keys let a reused model skip bars it has already seen
+    if "Date" in train_df.columns:
+        keys = to_epoch(train_df["Date"]).to_numpy()
+    else:
+        keys = train_df.index.to_numpy()
 
-    latest_scaled = scaler.transform(latest_row)
+    model = trend_model or TrendModel()
+    with span("fit"):
+        model.update(X, y, keys=keys)
 
-    prediction = model.predict(latest_scaled)[0]
-    confidence = model.predict_proba(latest_scaled).max()
+    with span("predict"):
+        prediction = model.predict(latest_row)[0]
+        confidence = model.predict_proba(latest_row).max()
 
     trend = "UP" if prediction == 1 else "DOWN"
 
-    # RSI confirmation
-    if trend == "UP" and latest_rsi < 70:
-        signal = "BUY"
-    elif trend == "DOWN" and latest_rsi > 30:
-        signal = "SELL"
-    else:
-        signal = "HOLD"
-
     return {
         "trend": trend,
         "confidence": round(float(confidence), 4),
-        "signal": signal,
+        "signal": trend_signal(trend, latest_rsi),
         "rsi": round(float(latest_rsi), 2),
         "price": round(float(last_price), 2)
     }
@@ -121,45 +110,116 @@ def run_trend_analysis(df):
 # MONTE CARLO SIMULATION
 # =====================================================
 
-def run_monte_carlo(df, hours=6, simulations=1000):
+def run_monte_carlo(df, hours=6, simulations=1000, model="normal",
+                    percentiles=(5, 95), seed=None):
     """
     Risk estimation using Monte Carlo simulation.
+    model: "normal", "bootstrap", "gbm" or "garch" (see monte_carlo.py).
     """
 
-    returns = df["Return"].dropna().tail(100)
-
-    mean_return = returns.mean()
-    std_return = returns.std()
-
-    last_price = df["Close"].iloc[-1]
+    returns = df["Return"].dropna().tail(100).to_numpy()
+    last_price = float(df["Close"].iloc[-1])
 
-    final_prices = []
+    with span("simulation"):
+        final_prices = simulate_final_prices(
+            returns, last_price,
+            hours=hours, simulations=simulations, model=model, seed=seed
+        )
 
-    for _ in range(simulations):
-        price = last_price
-        for _ in range(hours):
-            r = np.random.normal(mean_return, std_return)
-            price *= (1 + r)
-        final_prices.append(price)
+    # lower/upper always reflect the 5th/95th percentile
+    percentiles = sorted(set(percentiles) | {5, 95})
+    summary = summarize(final_prices, percentiles)
 
     return {
-        "lower": round(float(np.percentile(final_prices, 5)), 2),
-        "upper": round(float(np.percentile(final_prices, 95)), 2),
-        "mean": round(float(np.mean(final_prices)), 2),
-        "hours": hours
+        "lower": summary["percentiles"]["5"],
+        "upper": summary["percentiles"]["95"],
+        "mean": summary["mean"],
+        "hours": hours,
+        "percentiles": summary["percentiles"]
     }
 
 
+# =====================================================
+# FULL PIPELINE (used by the API worker pool)
+# =====================================================
+# The feature engine and the model registry live in the calling process,
+# so their caches and stats are shared by every request; only the fit,
+# prediction and Monte Carlo go to the CPU pool.
+
+def prepare_frame(ticker, df, interval="1h"):
+    """
+    Adds features and looks up the model trained on this bar.
+    Returns (featured df, registry key, cached model or None).
+    """
+    if not ticker.endswith(".NS"):
+        ticker = ticker + ".NS"
+
+    with span("features"):
+        df = get_feature_engine().features_for(ticker, df)
+
+    # The model is keyed by the last bar, so repeated requests within the
+    # same bar skip training
+    key = model_key(ticker, interval, FEATURE_COLS, df["Date"].iloc[-1])
+    return df, key, get_registry().get(key)
+
+
+def analyze_features(df, model=None):
+    """
+    Trend prediction (training `model` only on bars it has not seen, a new
+    one when None) and Monte Carlo. Returns (trend, mc, model).
+    Kept top-level so it can be sent to a worker process.
+    """
+    # Seeding by the last bar keeps the risk range stable within a bar,
+    # so repeated requests map to the same cached explanation
+    seed = int(pd.Timestamp(df["Date"].iloc[-1]).timestamp())
+
+    model = model or TrendModel()
+    return run_trend_analysis(df, trend_model=model), run_monte_carlo(df, seed=seed), model
+
+
+def analyze_frame(ticker, df):
+    """
+    Features, cached trend model and Monte Carlo on bars that are already
+    loaded, all in this process.
+    """
+    df, key, cached = prepare_frame(ticker, df)
+    trend, mc, model = analyze_features(df, cached)
+    if cached is None:
+        get_registry().put(key, model)
+    return trend, mc
+
+
+async def analyze_frame_async(ticker, df):
+    """
+    analyze_frame for the API: the fit and Monte Carlo run on the CPU pool,
+    the registry lookup and store stay here.
+    """
+    df, key, cached = await pools.run_io(prepare_frame, ticker, df)
+    trend, mc, model = await pools.run_cpu(analyze_features, df, cached)
+    if cached is None:
+        await pools.run_io(get_registry().put, key, model)
+    return trend, mc
+
+
+def analyze_ticker(ticker):
+    """
+    Loads bars and runs analyze_frame.
+    """
+    return analyze_frame(ticker, load_data(ticker))
+
+
 # =====================================================
 # MAIN CONTROLLER
 # =====================================================
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python main.py TICKER")
-        return
+    parser = argparse.ArgumentParser(description="Trend + risk analysis for one NSE ticker")
+    parser.add_argument("ticker")
+    parser.add_argument("--no-ai", action="store_true",
+                        help="skip the Gemini explanation (no google-genai import, no network call)")
+    args = parser.parse_args()
 
-    ticker = sys.argv[1]
+    ticker = args.ticker
 
     df = load_data(ticker)
     df = add_features(df)
@@ -180,6 +240,13 @@ def main():
         }
         
     }
+
+    if args.no_ai:
+        print(json.dumps(final_output, indent=2))
+        return
+
+    from genai_explainer import generate_explanation
+
     ai_insight = generate_explanation({
         "trend": trend_result["trend"],
         "signal": trend_result["signal"],
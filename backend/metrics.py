@@ -0,0 +1,176 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+NAMESPACE = "algoholics"
+
+# Seconds; covers sub-millisecond feature updates up to slow Gemini calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}"
+
+
+# =====================================================
+# METRIC TYPES
+# =====================================================
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(dict(key))} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                labels = dict(key)
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_labels(dict(labels, le=bound))} {count}")
+                lines.append(f"{self.name}_bucket{_labels(dict(labels, le='+Inf'))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(labels)} {series[-2]:.6f}")
+                lines.append(f"{self.name}_count{_labels(labels)} {series[-1]}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(f"{NAMESPACE}_stage_seconds", "Time spent per pipeline stage")
+REQUEST_SECONDS = Histogram(f"{NAMESPACE}_request_seconds", "HTTP request latency by route")
+REQUESTS = Counter(f"{NAMESPACE}_requests_total", "HTTP requests by route and status")
+ERRORS = Counter(f"{NAMESPACE}_stage_errors_total", "Exceptions raised inside a stage")
+
+
+# =====================================================
+# SPANS
+# =====================================================
+# Spans recorded inside a worker are collected and handed back to the
+# event loop (see traced_call), so process-pool work is counted too
+_collector = ContextVar("metrics_collector", default=None)
+
+# Per-request stage list when profiling is switched on for that request
+_profile = ContextVar("request_profile", default=None)
+
+
+def record(stage, seconds):
+    collector = _collector.get()
+    if collector is not None:
+        collector.append((stage, seconds))
+        return
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    profile = _profile.get()
+    if profile is not None:
+        profile.append((stage, seconds))
+
+
+def record_all(spans):
+    for stage, seconds in spans:
+        record(stage, seconds)
+
+
+@contextmanager
+def span(stage):
+    """
+    Times a block as one pipeline stage: with span("fit"): ...
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.inc(stage=stage)
+        raise
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def traced_call(fn, *args, **kwargs):
+    """
+    Runs fn in a worker and returns (result, spans recorded during the call).
+    Kept top-level so it can be sent to a process pool.
+    """
+    spans = []
+    token = _collector.set(spans)
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        _collector.reset(token)
+    return result, spans
+
+
+# =====================================================
+# REQUEST PROFILING
+# =====================================================
+def start_profile():
+    profile = []
+    _profile.set(profile)
+    return profile
+
+
+def profiling():
+    return _profile.get() is not None
+
+
+def server_timing(profile):
+    """
+    Server-Timing header value: stages summed, in first-seen order.
+    """
+    totals = {}
+    for stage, seconds in profile:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in totals.items())
+
+
+# =====================================================
+# EXPOSITION
+# =====================================================
+def render(gauges=None):
+    """
+    Prometheus text format. `gauges` maps metric name -> list of
+    (labels dict, value), sampled at scrape time.
+    """
+    lines = []
+    for metric in (STAGE_SECONDS, REQUEST_SECONDS, REQUESTS, ERRORS):
+        lines.extend(metric.render())
+    for name, samples in (gauges or {}).items():
+        full_name = f"{NAMESPACE}_{name}"
+        lines.append(f"# TYPE {full_name} gauge")
+        for labels, value in samples:
+            lines.append(f"{full_name}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,216 @@
+import glob
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Models published to the shared cache outlive a bar by at most this long
+DEFAULT_SHARED_TTL = 6 * 60 * 60
+
+
+def model_key(ticker, interval, feature_cols, last_bar):
+    """
+    Registry key: (ticker, interval, feature-set hash, last bar timestamp).
+    A new bar produces a new key, so cached models invalidate themselves.
+    """
+    features = hashlib.sha1(",".join(feature_cols).encode()).hexdigest()[:10]
+    return (ticker, interval, features, int(pd.Timestamp(last_bar).timestamp()))
+
+
+# =====================================================
+# MODEL REGISTRY (LRU in memory, optional joblib on disk)
+# =====================================================
+class ModelRegistry:
+    """
+    Caches trained models. Eviction is least-recently-used once either
+    `max_entries` or `max_bytes` (pickled size) is exceeded.
+
+    With a `shared` cache (shared_cache.py) every trained model is also
+    published there, so other workers load it instead of retraining.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, disk_dir=None,
+                 shared=None, shared_ttl=DEFAULT_SHARED_TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+
+        self._entries = OrderedDict()  # key -> (model, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    # ---------- disk ----------
+    def _series_prefix(self, key):
+        ticker, interval, features, _ = key
+        return os.path.join(self.disk_dir, f"{ticker}_{interval}_{features}_")
+
+    def _disk_path(self, key):
+        return f"{self._series_prefix(key)}{key[3]}.joblib"
+
+    def _load_from_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            import joblib
+            return joblib.load(path)
+        except Exception:
+            return None
+
+    def _save_to_disk(self, key, model):
+        # Drop models trained on older bars of the same series
+        for old in glob.glob(self._series_prefix(key) + "*.joblib"):
+            os.remove(old)
+        import joblib
+        joblib.dump(model, self._disk_path(key))
+
+    # ---------- shared ----------
+    @staticmethod
+    def _shared_key(key):
+        return "model:" + ":".join(str(part) for part in key)
+
+    def _load_from_shared(self, key):
+        if self.shared is None:
+            return None, 0
+        try:
+            blob = self.shared.get(self._shared_key(key))
+            return (None, 0) if blob is None else (pickle.loads(blob), len(blob))
+        except Exception as e:
+            print(f"Shared model read failed: {e}")
+            return None, 0
+
+    # ---------- memory ----------
+    def _insert(self, key, model, size):
+        # A newer bar invalidates every older model for the same series
+        stale = [k for k in self._entries if k[:3] == key[:3] and k != key]
+        for k in stale:
+            self._bytes -= self._entries.pop(k)[1]
+
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (model, size)
+        self._bytes += size
+
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    # ---------- public API ----------
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        model = self._load_from_disk(key)
+        if model is not None:
+            with self._lock:
+                self.disk_hits += 1
+                self._insert(key, model, len(pickle.dumps(model)))
+            return model
+
+        model, size = self._load_from_shared(key)
+        with self._lock:
+            if model is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+            self._insert(key, model, size)
+        return model
+
+    def put(self, key, model):
+        blob = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._insert(key, model, len(blob))
+        if self.disk_dir:
+            self._save_to_disk(key, model)
+        if self.shared is not None:
+            try:
+                self.shared.set(self._shared_key(key), blob, ex=self.shared_ttl)
+            except Exception as e:
+                print(f"Shared model write failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            found = self.hits + self.disk_hits + self.shared_hits
+            lookups = found + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(found / lookups, 4) if lookups else 0.0
+            }
+
+
+# =====================================================
+# SHARED INSTANCE
+# =====================================================
+_default_registry = None
+_default_registry_guard = threading.Lock()
+
+
+def get_registry():
+    """
+    Returns the process-wide model registry.
+    MODEL_CACHE_DIR enables the on-disk store; MODEL_CACHE_MAX_ENTRIES and
+    MODEL_CACHE_MAX_MB bound the in-memory cache. When SHARED_CACHE_URL is
+    set, models are shared with the other workers through it.
+    """
+    global _default_registry
+    with _default_registry_guard:
+        if _default_registry is None:
+            shared = None
+            if os.getenv("SHARED_CACHE_URL"):
+                from shared_cache import get_shared_cache
+                shared = get_shared_cache()
+            _default_registry = ModelRegistry(
+                max_entries=int(os.getenv("MODEL_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                max_bytes=int(float(os.getenv("MODEL_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 2 ** 20)) * 2 ** 20),
+                disk_dir=os.getenv("MODEL_CACHE_DIR"),
+                shared=shared,
+                shared_ttl=int(os.getenv("MODEL_SHARED_TTL", DEFAULT_SHARED_TTL))
+            )
+        return _default_registry
+
+
+def set_registry(registry):
+    """
+    Replaces the process-wide model registry.
+    """
+    global _default_registry
+    with _default_registry_guard:
+        _default_registry = registry
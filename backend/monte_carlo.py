@@ -0,0 +1,112 @@
+import numpy as np
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+MODELS = ("normal", "bootstrap", "gbm", "garch")
+
+# Paths simulated per batch. Memory stays around chunk_size * hours * 8 bytes.
+DEFAULT_CHUNK_SIZE = 50_000
+
+# GARCH(1,1) persistence used with variance targeting
+GARCH_ALPHA = 0.08
+GARCH_BETA = 0.90
+
+
+# =====================================================
+# PATH GENERATORS
+# Each returns the growth factor (final / last price) for a batch of paths.
+# =====================================================
+def _normal_growth(rng, returns, n, hours):
+    steps = rng.normal(returns.mean(), returns.std(ddof=1), size=(n, hours))
+    return np.prod(1 + steps, axis=1)
+
+
+def _bootstrap_growth(rng, returns, n, hours):
+    idx = rng.integers(0, len(returns), size=(n, hours))
+    return np.prod(1 + returns[idx], axis=1)
+
+
+def _gbm_growth(rng, returns, n, hours):
+    log_r = np.log1p(returns)
+    sigma = log_r.std(ddof=1)
+    drift = log_r.mean()
+    shocks = rng.standard_normal(size=(n, hours))
+    return np.exp(drift * hours + sigma * shocks.sum(axis=1))
+
+
+def _garch_state(returns):
+    """
+    Variance-targeted GARCH(1,1): returns (omega, last conditional variance).
+    """
+    centred = returns - returns.mean()
+    long_run = centred.var()
+    omega = long_run * (1 - GARCH_ALPHA - GARCH_BETA)
+
+    var = long_run
+    for eps in centred:
+        var = omega + GARCH_ALPHA * eps ** 2 + GARCH_BETA * var
+    return omega, var
+
+
+def _garch_growth(rng, returns, n, hours, state):
+    omega, var0 = state
+    mu = returns.mean()
+    var = np.full(n, var0)
+    growth = np.ones(n)
+    for _ in range(hours):
+        eps = np.sqrt(var) * rng.standard_normal(n)
+        growth *= 1 + mu + eps
+        var = omega + GARCH_ALPHA * eps ** 2 + GARCH_BETA * var
+    return growth
+
+
+# =====================================================
+# ENGINE
+# =====================================================
+def simulate_final_prices(returns, last_price, hours=6, simulations=1000,
+                          model="normal", seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Simulates `simulations` price paths `hours` steps ahead and returns
+    the final prices as a 1-D array. Paths are drawn in chunks so memory
+    does not grow with the number of simulations.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model '{model}'. Choose from {MODELS}")
+
+    returns = np.asarray(returns, dtype=float)
+    returns = returns[np.isfinite(returns)]
+    if len(returns) < 2:
+        raise ValueError("Not enough returns to simulate")
+
+    rng = np.random.default_rng(seed)
+    garch_state = _garch_state(returns) if model == "garch" else None
+
+    final_prices = np.empty(simulations)
+    for start in range(0, simulations, chunk_size):
+        n = min(chunk_size, simulations - start)
+
+        if model == "normal":
+            growth = _normal_growth(rng, returns, n, hours)
+        elif model == "bootstrap":
+            growth = _bootstrap_growth(rng, returns, n, hours)
+        elif model == "gbm":
+            growth = _gbm_growth(rng, returns, n, hours)
+        else:
+            growth = _garch_growth(rng, returns, n, hours, garch_state)
+
+        final_prices[start:start + n] = last_price * growth
+
+    return final_prices
+
+
+def summarize(final_prices, percentiles=(5, 95)):
+    """
+    Returns mean and the requested percentiles of the simulated prices.
+    """
+    values = np.percentile(final_prices, percentiles)
+    return {
+        "mean": round(float(final_prices.mean()), 2),
+        # "5" for both 5 and 5.0, "2.5" for 2.5
+        "percentiles": {f"{p:g}": round(float(v), 2) for p, v in zip(percentiles, values)}
+    }
@@ -0,0 +1,377 @@
+import asyncio
+import csv
+import glob
+import os
+import re
+import sys
+import uuid
+
+import numpy as np
+
+from backtester import (
+    FEATURE_COLS, RETRAIN_FREQUENCY, RSI_LOWER, RSI_UPPER, START_INDEX,
+    feature_arrays, max_drawdown, risk_ratios, walk_forward_signals
+)
+from bar_store import BAR_COLUMNS, get_store
+from columnar import format_dates
+from downsampling import DEFAULT_POINTS, downsample_indices
+from metrics import span
+from serialization import records, table
+from workers import pools
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+MAX_PORTFOLIO_TICKERS = 200
+
+# Per side, in basis points of traded value
+DEFAULT_COST_BPS = 10
+DEFAULT_SLIPPAGE_BPS = 5
+
+# Names that stay in the portfolio are only resized once their position is
+# this far (as a fraction) from the target, so a change elsewhere does not
+# trade every holding
+DEFAULT_REBALANCE_BAND = 0.25
+
+# Full trade logs are written here as CSV; only the newest are kept
+TRADE_LOG_DIR = os.getenv(
+    "PORTFOLIO_LOG_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "portfolio")
+)
+TRADE_LOGS_TO_KEEP = 50
+TRADE_LOG_COLUMNS = ["date", "ticker", "side", "shares", "price", "value", "cost"]
+
+STRATEGY_PARAMS = ("start_index", "retrain_frequency", "training_mode", "max_train_rows",
+                   "rsi_upper", "rsi_lower", "feature_cols")
+
+
+# =====================================================
+# SIGNALS PER TICKER (walk-forward, same rules as backtester)
+# =====================================================
+def ticker_signals(ts, close, bar_columns=(), start_index=START_INDEX,
+                   retrain_frequency=RETRAIN_FREQUENCY, training_mode="full", max_train_rows=None,
+                   rsi_upper=RSI_UPPER, rsi_lower=RSI_LOWER, feature_cols=None):
+    """
+    Walk-forward BUY/SELL/HOLD signals for one ticker's bars.
+    bar_columns are the OHLCV arrays; rows with a NaN in any of them are
+    dropped like in run_backtest_strategy, so both give the same signals.
+    Returns (ts, close, signal) without the feature warm-up rows.
+    Kept top-level so it can be sent to a worker process.
+    """
+    close = np.asarray(close, dtype=float)
+    valid, features, target = feature_arrays(close, bar_columns)
+    if valid.sum() <= start_index:
+        raise ValueError("Not enough data")
+
+    signal = walk_forward_signals(
+        np.column_stack([features[c] for c in feature_cols or FEATURE_COLS]),
+        target,
+        features["RSI"],
+        start_index=start_index,
+        retrain_frequency=retrain_frequency,
+        training_mode=training_mode,
+        max_train_rows=max_train_rows,
+        rsi_upper=rsi_upper,
+        rsi_lower=rsi_lower
+    )
+    return np.asarray(ts)[valid], close[valid], signal
+
+
+def align(series):
+    """
+    Puts every ticker on the union of their timestamps.
+    series: list of (ts, close, signal). Returns (index, close[T, N],
+    signal[T, N]); closes are carried forward over missing bars (NaN before
+    a ticker's first bar) and signals are carried forward too (0 before).
+    """
+    index = np.unique(np.concatenate([ts for ts, _, _ in series]))
+    close = np.full((len(index), len(series)), np.nan)
+    signal = np.zeros((len(index), len(series)), dtype=int)
+
+    for j, (ts, values, signals) in enumerate(series):
+        pos = np.searchsorted(ts, index, side="right") - 1
+        seen = pos >= 0
+        close[seen, j] = values[pos[seen]]
+        signal[seen, j] = signals[pos[seen]]
+    return index, close, signal
+
+
+# =====================================================
+# SIMULATION (vectorized across tickers)
+# =====================================================
+def _write_trades(writer, date, tickers, delta, fill, fee):
+    traded = np.flatnonzero(delta)
+    writer.writerows(zip(
+        [date] * len(traded),
+        [tickers[j] for j in traded],
+        np.where(delta[traded] > 0, "BUY", "SELL"),
+        np.abs(delta[traded]).astype(int).tolist(),
+        np.round(fill[traded], 2).tolist(),
+        np.round(np.abs(delta[traded]) * fill[traded], 2).tolist(),
+        np.round(fee[traded], 2).tolist()
+    ))
+
+
+def simulate(index, close, signal, tickers, initial_capital=1000000,
+             cost_bps=DEFAULT_COST_BPS, slippage_bps=DEFAULT_SLIPPAGE_BPS,
+             max_weight=None, rebalance_every=0, rebalance_band=DEFAULT_REBALANCE_BAND,
+             lot_size=1, trade_writer=None, tz=None):
+    """
+    Long-only, equal weight across names with a BUY signal, rebalanced at
+    the bar close whenever that set changes (and every `rebalance_every`
+    bars if set). Sizing, fills, costs and P&L attribution are computed
+    for all tickers at once; the loop only walks the time axis.
+    Trades are written to `trade_writer` (a csv.writer) as they happen.
+    """
+    n_bars, n_names = close.shape
+    cost = cost_bps / 1e4
+    slip = slippage_bps / 1e4
+
+    cash = float(initial_capital)
+    shares = np.zeros(n_names)
+    equity = np.empty(n_bars)
+    invested = np.empty(n_bars)
+    pnl = np.zeros(n_names)
+    costs = np.zeros(n_names)
+    trades = np.zeros(n_names, dtype=int)
+    turnover = 0.0
+
+    held = np.zeros(n_names, dtype=bool)
+    prev_price = np.zeros(n_names)
+    dates = format_dates(index, tz, unit="m") if trade_writer is not None else None
+
+    for t in range(n_bars):
+        listed = ~np.isnan(close[t])
+        price = np.where(listed, close[t], 0.0)
+
+        # Mark to market (unlisted names hold no shares)
+        pnl += shares * np.where(listed, price - prev_price, 0.0)
+
+        want = (signal[t] == 1) & listed
+        scheduled = rebalance_every and t % rebalance_every == 0
+        if scheduled or not np.array_equal(want, held):
+            value = cash + shares @ price
+            weight = want / max(want.sum(), 1)
+            if max_weight:
+                weight = np.minimum(weight, max_weight)
+
+            # Size against the fill price, leaving room for the fees
+            budget = weight * value / (1 + cost)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                target = np.where(listed, np.floor(budget / (price * (1 + slip)) / lot_size) * lot_size, 0.0)
+            delta = np.nan_to_num(target - shares)
+            keep = want & held & (np.abs(delta) <= rebalance_band * target)
+            delta[keep] = 0.0
+
+            # Positions kept inside the band can leave too little cash for
+            # the buys; scale them down rather than borrow
+            buys = delta > 0
+            requested = delta.copy()
+            buy_cost = delta[buys] @ price[buys] * (1 + slip) * (1 + cost)
+            available = cash - delta[~buys] @ price[~buys] * (1 - slip) * (1 - cost)
+            if available <= 0:
+                delta[buys] = 0.0
+            elif buy_cost > available:
+                delta[buys] = np.floor(delta[buys] * available / buy_cost / lot_size) * lot_size
+
+            if delta.any():
+                fill = price * (1 + np.sign(delta) * slip)
+                notional = np.abs(delta) * fill
+                fee = notional * cost
+                friction = fee + np.abs(delta) * price * slip
+
+                cash -= delta @ fill + fee.sum()
+                costs += friction
+                pnl -= friction
+                trades += delta != 0
+                turnover += notional.sum()
+                shares = shares + delta
+
+                if trade_writer is not None:
+                    _write_trades(trade_writer, dates[t], tickers, delta, fill, fee)
+            # A buy cut short by cash is not held yet, so the next bar retries it
+            held = want & (shares > 0) & (delta >= requested)
+
+        equity[t] = cash + shares @ price
+        invested[t] = shares @ price
+        prev_price = np.where(listed, price, prev_price)
+
+    return {
+        "equity": equity,
+        "exposure": np.divide(invested, equity, out=np.zeros(n_bars), where=equity > 0),
+        "pnl": pnl,
+        "costs": costs,
+        "trades": trades,
+        "turnover": float(turnover),
+        "final_shares": shares,
+        "final_price": prev_price
+    }
+
+
+# =====================================================
+# TRADE LOG FILES
+# =====================================================
+def trade_log_path(run_id):
+    """
+    CSV path for a run, or None for ids that are not ours.
+    """
+    if not re.fullmatch(r"[0-9a-f]{32}", run_id or ""):
+        return None
+    return os.path.join(TRADE_LOG_DIR, f"{run_id}.csv")
+
+
+def _prune_trade_logs():
+    logs = sorted(glob.glob(os.path.join(TRADE_LOG_DIR, "*.csv")), key=os.path.getmtime)
+    for old in logs[:-TRADE_LOGS_TO_KEEP]:
+        os.remove(old)
+
+
+# =====================================================
+# PORTFOLIO BACKTEST
+# =====================================================
+def portfolio_report(ready, tz, errors, initial_capital=1000000,
+                     cost_bps=DEFAULT_COST_BPS, slippage_bps=DEFAULT_SLIPPAGE_BPS,
+                     max_weight=None, rebalance_every=0, rebalance_band=DEFAULT_REBALANCE_BAND,
+                     lot_size=1, layout="records", points=DEFAULT_POINTS, downsample="lttb"):
+    """
+    Aligns the per-ticker signals on one time index, simulates them
+    together and builds the response. ready: {ticker: (ts, close, signal)}.
+    Kept top-level so it can be sent to a worker process.
+    """
+    names = list(ready)
+    index, close, signal = align([ready[t] for t in names])
+
+    run_id = uuid.uuid4().hex
+    os.makedirs(TRADE_LOG_DIR, exist_ok=True)
+    with open(trade_log_path(run_id), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(TRADE_LOG_COLUMNS)
+        with span("simulation"):
+            sim = simulate(index, close, signal, names, initial_capital=initial_capital,
+                           cost_bps=cost_bps, slippage_bps=slippage_bps, max_weight=max_weight,
+                           rebalance_every=rebalance_every, rebalance_band=rebalance_band,
+                           lot_size=lot_size, trade_writer=writer, tz=tz)
+    _prune_trade_logs()
+
+    equity = sim["equity"]
+    sharpe, sortino = risk_ratios(np.diff(equity) / equity[:-1], index[1:])
+    final_value = sim["final_shares"] * sim["final_price"]
+    order = np.argsort(-sim["pnl"])
+    attribution = records({
+        "ticker": [names[j] for j in order],
+        "profitLoss": np.round(sim["pnl"][order], 2),
+        "contributionPercent": np.round(sim["pnl"][order] / initial_capital * 100, 3),
+        "costs": np.round(sim["costs"][order], 2),
+        "trades": sim["trades"][order],
+        "finalWeight": np.round(final_value[order] / equity[-1], 4) if equity[-1] > 0 else np.zeros(len(names))
+    })
+
+    with span("downsample"):
+        rows = downsample_indices(index, [equity], points=points, method=downsample)
+    with span("serialization"):
+        chart = table({
+            "date": format_dates(index[rows], tz, unit="h"),
+            "equity": np.round(equity[rows], 2),
+            "exposure": np.round(sim["exposure"][rows], 4)
+        }, layout)
+
+    return {
+        "runId": run_id,
+        "tickers": len(names),
+        "bars": len(index),
+        "chart_data": chart,
+        "stats": {
+            "finalEquity": round(float(equity[-1]), 2),
+            "totalProfit": round(float(equity[-1] - initial_capital), 2),
+            "profitPercent": round(float((equity[-1] - initial_capital) / initial_capital * 100), 2),
+            "maxDrawdownPercent": round(max_drawdown(equity), 2),
+            "sharpe": round(sharpe, 2),
+            "sortino": round(sortino, 2),
+            "avgExposure": round(float(sim["exposure"].mean()), 4),
+            "tradesExecuted": int(sim["trades"].sum()),
+            "turnover": round(sim["turnover"], 2),
+            "costs": round(float(sim["costs"].sum()), 2)
+        },
+        "attribution": attribution,
+        "tradeLogUrl": f"/portfolio/trades/{run_id}",
+        "errors": errors
+    }
+
+
+async def _signals_or_error(job, strategy):
+    try:
+        return await pools.run_cpu(ticker_signals, *job, **strategy)
+    except Exception as e:
+        return e
+
+
+async def run_portfolio_backtest(tickers, period="6mo", initial_capital=1000000,
+                                 cost_bps=DEFAULT_COST_BPS, slippage_bps=DEFAULT_SLIPPAGE_BPS,
+                                 max_weight=None, rebalance_every=0, rebalance_band=DEFAULT_REBALANCE_BAND,
+                                 lot_size=1, layout="records", points=DEFAULT_POINTS, downsample="lttb",
+                                 **strategy):
+    """
+    Backtests one rebalanced portfolio over many tickers.
+    Walk-forward signals are computed per ticker on the shared CPU pool,
+    then every ticker is aligned on one time index and simulated together.
+    The full trade log goes to a CSV file (see trade_log_path) instead of
+    the response.
+    """
+    unknown = set(strategy) - set(STRATEGY_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown strategy parameters: {sorted(unknown)}")
+
+    tickers = list(dict.fromkeys(t if t.endswith(".NS") else t + ".NS" for t in tickers))
+    if not tickers:
+        raise ValueError("No tickers given")
+    if len(tickers) > MAX_PORTFOLIO_TICKERS:
+        raise ValueError(f"At most {MAX_PORTFOLIO_TICKERS} tickers per portfolio")
+
+    with span("data"):
+        bars = await pools.run_io(get_store().get_many_arrays, tickers, interval="1h", period=period)
+
+    errors = []
+    jobs = {}
+    for ticker in tickers:
+        series = bars.get(ticker)
+        if series is None or not len(series):
+            errors.append({"ticker": ticker, "error": "No data found"})
+        else:
+            jobs[ticker] = (np.asarray(series.ts), np.asarray(series["Close"]),
+                            [np.asarray(series[c]) for c in BAR_COLUMNS])
+
+    # One task per ticker; the cpu limit queues the rest
+    results = await asyncio.gather(*(_signals_or_error(job, strategy) for job in jobs.values()))
+    ready = {}
+    for ticker, result in zip(jobs, results):
+        if isinstance(result, Exception):
+            errors.append({"ticker": ticker, "error": str(result)})
+        else:
+            ready[ticker] = result
+
+    if not ready:
+        return {"error": "No ticker has enough data", "errors": errors}
+
+    tz = next(bars[t].tz for t in ready)
+    return await pools.run_cpu(
+        portfolio_report, ready, tz, errors, initial_capital=initial_capital,
+        cost_bps=cost_bps, slippage_bps=slippage_bps, max_weight=max_weight,
+        rebalance_every=rebalance_every, rebalance_band=rebalance_band,
+        lot_size=lot_size, layout=layout, points=points, downsample=downsample
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python portfolio.py TICKER [TICKER ...]")
+        sys.exit(1)
+
+    report = asyncio.run(run_portfolio_backtest(sys.argv[1:]))
+    pools.shutdown()
+    if "error" in report:
+        print(report)
+        sys.exit(1)
+    print(report["stats"])
+    for row in report["attribution"][:10]:
+        print(row)
+    print("Trade log:", trade_log_path(report["runId"]))
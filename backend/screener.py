@@ -0,0 +1,230 @@
+import sys
+import time
+
+import numpy as np
+
+from bar_store import get_store
+from features import compute_features, target_labels
+from main import FEATURE_COLS, trend_signal
+from metrics import span
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+MAX_SCREEN_TICKERS = 1000
+
+# sklearn LogisticRegression defaults, so a batched fit gives the same
+# model as TrendModel().update() on one ticker
+DEFAULT_C = 1.0
+NEWTON_MAX_ITER = 50
+NEWTON_TOL = 1e-8
+LINE_SEARCH_STEPS = 20
+LOSS_RTOL = 1e-10
+
+
+# =====================================================
+# BATCHED LOGISTIC REGRESSION
+# =====================================================
+def _sigmoid(z):
+    # tanh form never overflows
+    return 0.5 * (1 + np.tanh(0.5 * z))
+
+
+def fit_logistic_batch(X, y, mask, C=DEFAULT_C, max_iter=NEWTON_MAX_ITER, tol=NEWTON_TOL):
+    """
+    Fits one L2-regularized logistic regression per ticker, all at once.
+
+    X: (tickers, rows, features), y and mask: (tickers, rows); rows where
+    mask is 0 are padding. Minimizes C * log-loss + ||coef||^2 / 2 with an
+    unpenalized intercept (sklearn's objective) by Newton's method: every
+    iteration solves the stack of (features+1)^2 Hessians in one call, with
+    a per-ticker backtracking line search.
+    Every ticker needs both classes among its rows.
+    Returns (coef (tickers, features), intercept (tickers,), iterations).
+    """
+    n, rows, f = X.shape
+    Xb = np.concatenate([X, np.ones((n, rows, 1))], axis=2)
+    XbT = Xb.transpose(0, 2, 1)
+    weight = np.asarray(mask, dtype=float) * C
+    y = np.asarray(y, dtype=float)
+
+    penalty = np.ones(f + 1)
+    penalty[-1] = 0.0
+
+    def objective(w, z):
+        return (weight * (np.logaddexp(0, z) - y * z)).sum(axis=1) + 0.5 * (penalty * w ** 2).sum(axis=1)
+
+    w = np.zeros((n, f + 1))
+    z = np.zeros((n, rows))  # logits, kept in step with w
+    loss = objective(w, z)
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        p = _sigmoid(z)
+        grad = np.einsum("nrf,nr->nf", Xb, weight * (p - y)) + penalty * w
+        hess = XbT @ (Xb * (weight * p * (1 - p))[..., None]) + np.diag(penalty)
+        step = np.linalg.solve(hess, grad[..., None])[..., 0]
+        dz = np.einsum("nrf,nf->nr", Xb, step)
+
+        # Halve the step only for the tickers whose loss went up (beyond
+        # rounding noise, which converged tickers would otherwise chase)
+        t = np.ones(n)
+        limit = loss + LOSS_RTOL * np.abs(loss)
+        for _ in range(LINE_SEARCH_STEPS):
+            candidate, candidate_z = w - t[:, None] * step, z - t[:, None] * dz
+            new_loss = objective(candidate, candidate_z)
+            worse = new_loss > limit
+            if not worse.any():
+                break
+            t[worse] *= 0.5
+        accept = ~worse
+        w[accept], z[accept], loss[accept] = candidate[accept], candidate_z[accept], new_loss[accept]
+
+        if np.abs(t[:, None] * step).max() < tol:
+            break
+
+    return w[:, :f], w[:, f], iterations
+
+
+# =====================================================
+# SCREENING
+# =====================================================
+def stack_closes(series):
+    """
+    One (tickers, bars) matrix from per-ticker closes, right-aligned so
+    every row ends on its latest bar; shorter histories are NaN-padded at
+    the front. Returns (names, matrix, errors).
+    """
+    errors = []
+    names = []
+    for ticker, close in series.items():
+        if close is None or not len(close):
+            errors.append({"ticker": ticker, "error": "Invalid ticker or no data available"})
+        else:
+            names.append(ticker)
+
+    matrix = np.full((len(names), max((len(series[t]) for t in names), default=0)), np.nan)
+    for i, ticker in enumerate(names):
+        close = series[ticker]
+        matrix[i, matrix.shape[1] - len(close):] = close
+    return names, matrix, errors
+
+
+def screen_series(series, max_train_rows=None, C=DEFAULT_C):
+    """
+    Trend, confidence and RSI-confirmed signal for many tickers from one
+    batched fit. series: {ticker: array of closes (or None)}.
+    Each ticker gets its own model, trained on the same rows as
+    run_trend_analysis on its bars. Kept top-level so it can be sent to a
+    worker process.
+    """
+    start = time.perf_counter()
+    names, close, errors = stack_closes(series)
+    n_bars = close.shape[1]
+
+    # Features for every ticker in one pass over the shared matrix
+    with span("features"):
+        features = compute_features(close)
+        target = target_labels(close)
+        X = np.stack([features[name] for name in FEATURE_COLS], axis=-1)
+        valid = ~np.isnan(X).any(axis=-1) & ~np.isnan(features["RSI"])
+
+    # The newest valid bar is predicted; the ones before it are training rows
+    latest = n_bars - 1 - np.argmax(valid[:, ::-1], axis=1) if n_bars else np.zeros(0, dtype=int)
+    train = valid.copy()
+    train[np.arange(len(names)), latest] = False
+    if max_train_rows:
+        train &= np.cumsum(train[:, ::-1], axis=1)[:, ::-1] <= max_train_rows
+
+    counts = train.sum(axis=1)
+    ups = (target * train).sum(axis=1)
+    usable = (counts >= 2) & (ups > 0) & (ups < counts)
+    for i in np.flatnonzero(~usable):
+        reason = "Not enough data" if counts[i] < 2 else "Training data has a single class"
+        errors.append({"ticker": names[i], "error": reason})
+
+    rows = np.flatnonzero(usable)
+    X, train, target, latest = X[rows], train[rows], target[rows], latest[rows]
+    results = []
+    iterations = 0
+    if len(rows):
+        # Per-ticker standardization over the training rows (population
+        # std, like RunningScaler); padding rows are zeroed and masked out
+        mask = train.astype(float)
+        n = mask.sum(axis=1)[:, None]
+        X = np.where(train[..., None], X, 0.0)
+        mean = X.sum(axis=1) / n
+        scale = np.sqrt(((X - mean[:, None]) ** 2 * mask[..., None]).sum(axis=1) / n)
+        scale[scale < 10 * np.finfo(float).eps] = 1.0
+        latest_x = np.stack([features[name][rows, latest] for name in FEATURE_COLS], axis=-1)
+        X = np.where(train[..., None], (X - mean[:, None]) / scale[:, None], 0.0)
+
+        with span("fit"):
+            coef, intercept, iterations = fit_logistic_batch(X, target, mask, C=C)
+
+        with span("predict"):
+            z = (((latest_x - mean) / scale) * coef).sum(axis=1) + intercept
+            prob_up = _sigmoid(z)
+            confidence = np.maximum(prob_up, 1 - prob_up)
+            rsi = features["RSI"][rows, latest]
+            price = close[rows, latest]
+
+        for k, i in enumerate(rows):
+            trend = "UP" if z[k] > 0 else "DOWN"
+            results.append({
+                "ticker": names[i],
+                "trend": trend,
+                "confidence": round(float(confidence[k]), 4),
+                "signal": trend_signal(trend, rsi[k]),
+                "rsi": round(float(rsi[k]), 2),
+                "price": round(float(price[k]), 2)
+            })
+
+    seconds = time.perf_counter() - start
+    return {
+        "results": results,
+        "errors": errors,
+        "stats": {
+            "tickers": len(results),
+            "bars": n_bars,
+            "iterations": iterations,
+            "compute_seconds": round(seconds, 4),
+            "tickers_per_second": round(len(results) / seconds, 1) if seconds > 0 else None
+        }
+    }
+
+
+def load_closes(tickers, interval="1h", period="30d"):
+    """
+    {ticker: closes or None} with one grouped refresh of the bar store.
+    """
+    tickers = [t if t.endswith(".NS") else t + ".NS" for t in tickers]
+    with span("data"):
+        bars = get_store().get_many_arrays(tickers, interval, period)
+    return {t: None if s is None or not len(s) else s["Close"] for t, s in bars.items()}
+
+
+def run_screen(tickers, interval="1h", period="30d", max_train_rows=None):
+    """
+    Loads bars and screens them. tickers_per_second counts the batched
+    compute only; loading is reported as load_seconds.
+    """
+    start = time.perf_counter()
+    closes = load_closes(tickers[:MAX_SCREEN_TICKERS], interval, period)
+    load_seconds = time.perf_counter() - start
+
+    report = screen_series(closes, max_train_rows=max_train_rows)
+    report["stats"]["load_seconds"] = round(load_seconds, 4)
+    return report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python screener.py TICKER [TICKER ...]")
+        sys.exit(1)
+
+    report = run_screen(sys.argv[1:])
+    for row in sorted(report["results"], key=lambda r: -r["confidence"]):
+        print(row)
+    for row in report["errors"]:
+        print(row)
+    print(report["stats"])
@@ -0,0 +1,95 @@
+import datetime
+import json
+import math
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+LAYOUTS = ("records", "columns")
+
+
+# =====================================================
+# ENCODING
+# =====================================================
+def _default(value):
+    # Types orjson does not encode natively (pandas Timestamps) and NumPy
+    # types for the stdlib encoder
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _plain(value):
+    # Stdlib fallback: the same values orjson would write, with NaN and
+    # infinity as null instead of the invalid NaN/Infinity literals
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, (np.ndarray, np.generic, datetime.date)):
+        return _plain(_default(value))
+    return value
+
+
+def dumps(content):
+    """
+    Encodes content to JSON bytes. NumPy arrays and scalars are encoded
+    natively by orjson; NaN becomes null and datetimes ISO 8601 strings,
+    with or without orjson.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(_plain(content), separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with dumps(). Returning an instance from an
+    endpoint skips FastAPI's jsonable_encoder pass, and the encoded body
+    can be cached and sent again as-is.
+    """
+
+    def render(self, content):
+        return dumps(content)
+
+
+# =====================================================
+# COLUMN -> PAYLOAD
+# =====================================================
+def _values(column):
+    return column.tolist() if isinstance(column, np.ndarray) else list(column)
+
+
+def records(columns):
+    """
+    {name: array} -> [{name: value, ...}, ...], converting each column once.
+    """
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*(_values(columns[n]) for n in names))]
+
+
+def table(columns, layout="records"):
+    """
+    Row records (the default) or the compact 'columns' layout of parallel
+    arrays: {"date": [...], "close": [...]}.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout '{layout}'. Use one of {LAYOUTS}")
+    if layout == "columns":
+        return {name: _values(values) for name, values in columns.items()}
+    return records(columns)
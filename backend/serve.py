@@ -0,0 +1,55 @@
+import argparse
+import os
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SHARED_CACHE = os.path.join(BACKEND_DIR, ".cache", "shared.sqlite")
+
+
+def configure(workers):
+    """
+    Environment every worker inherits. Explicit settings win.
+
+    - SHARED_CACHE_URL: one SQLite file for models, headlines and leases
+      (point it at redis://... to share across hosts)
+    - CPU_CONCURRENCY / CPU_WORKERS: the cores are split between workers
+      instead of every worker starting a pool sized to the whole machine
+    """
+    cores = os.cpu_count() or 2
+    per_worker = str(max(cores // workers, 1))
+    if workers > 1:
+        os.environ.setdefault("SHARED_CACHE_URL", f"sqlite:///{DEFAULT_SHARED_CACHE}")
+    os.environ.setdefault("CPU_CONCURRENCY", per_worker)
+    os.environ.setdefault("CPU_WORKERS", per_worker)
+
+
+# =====================================================
+# ENTRY POINT
+# =====================================================
+def main():
+    """
+    Multi-worker server: python serve.py --workers 4
+
+    Workers share the bar store (SQLite + column files, refreshes locked
+    per series across processes), trained models and news headlines
+    through the shared cache, and elect one worker to run the snapshot
+    and news refreshers. /metrics and the /stats endpoints report the
+    worker that answered.
+    """
+    parser = argparse.ArgumentParser(description="Run the API with several worker processes")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    args = parser.parse_args()
+
+    configure(args.workers)
+    print(f"Starting {args.workers} workers (shared cache: {os.getenv('SHARED_CACHE_URL', 'memory://')})")
+
+    import uvicorn
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers, app_dir=BACKEND_DIR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+# memory:// (single process), sqlite:///path/to/cache.sqlite (every worker
+# on one host) or redis://host:6379/0 (any Redis-compatible server)
+DEFAULT_URL = "memory://"
+DEFAULT_MEMORY_ENTRIES = 10000
+
+# Expired SQLite rows are swept every this many writes
+SQLITE_PURGE_EVERY = 500
+
+
+
+# =====================================================
+# BACKENDS
+# =====================================================
+# Every backend speaks the same Redis subset on bytes values:
+#   get(key) -> bytes | None
+#   set(key, value, ex=None, nx=False) -> bool  (False when nx and key exists)
+#   delete(key)
+class MemoryCache:
+    """
+    In-process stand-in for a shared backend (tests, single worker).
+    """
+
+    url = DEFAULT_URL
+
+    def __init__(self, max_entries=DEFAULT_MEMORY_ENTRIES, clock=time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= self.clock():
+            del self._entries[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._live(key) is not None:
+                return False
+            self._entries.pop(key, None)
+            self._entries[key] = (value, None if ex is None else self.clock() + ex)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def size(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    Key-value table in one SQLite file (WAL), shared by every process that
+    opens the same path.
+    """
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.url = f"sqlite:///{path}"
+        self.clock = clock
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS kv (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL
+            )
+        """)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.commit()
+
+    def _conn(self):
+        # One connection per thread; autocommit keeps each write its own transaction
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, self.clock())
+        ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def set(self, key, value, ex=None, nx=False):
+        now = self.clock()
+        expires_at = None if ex is None else now + ex
+        conn = self._conn()
+        if nx:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM kv WHERE key = ? AND expires_at <= ?", (key, now))
+                stored = conn.execute(
+                    "INSERT OR IGNORE INTO kv VALUES (?, ?, ?)", (key, value, expires_at)
+                ).rowcount == 1
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        else:
+            conn.execute("INSERT OR REPLACE INTO kv VALUES (?, ?, ?)", (key, value, expires_at))
+            stored = True
+
+        self._writes += 1
+        if self._writes % SQLITE_PURGE_EVERY == 0:
+            conn.execute("DELETE FROM kv WHERE expires_at <= ?", (now,))
+        return stored
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def size(self):
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM kv WHERE expires_at IS NULL OR expires_at > ?", (self.clock(),)
+        ).fetchone()[0]
+
+
+class RedisCache:
+    """
+    Any Redis-compatible server (Redis, Valkey, KeyDB, ...). Needs the
+    optional `redis` package.
+    """
+
+    def __init__(self, url):
+        import redis
+        parts = urlsplit(url)
+        # Credentials stay out of stats
+        self.url = parts._replace(netloc=parts.netloc.rpartition("@")[2]).geturl()
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self._client.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        return bool(self._client.set(key, value, ex=None if ex is None else max(int(ex), 1), nx=nx))
+
+    def delete(self, key):
+        self._client.delete(key)
+
+    def size(self):
+        return self._client.dbsize()
+
+
+def open_cache(url):
+    if url.startswith("memory://"):
+        return MemoryCache()
+    if url.startswith("sqlite://"):
+        return SQLiteCache(url[len("sqlite:///"):] if url.startswith("sqlite:///") else url[len("sqlite://"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache(url)
+    raise ValueError(f"Unsupported SHARED_CACHE_URL '{url}'")
+
+
+# =====================================================
+# HELPERS
+# =====================================================
+def get_object(cache, key):
+    """
+    Unpickled value, or None when missing (or unreadable).
+    """
+    try:
+        blob = cache.get(key)
+        return None if blob is None else pickle.loads(blob)
+    except Exception as e:
+        print(f"Shared cache read failed for {key}: {e}")
+        return None
+
+
+def set_object(cache, key, value, ex=None):
+    try:
+        return cache.set(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ex=ex)
+    except Exception as e:
+        print(f"Shared cache write failed for {key}: {e}")
+        return False
+
+
+def worker_id():
+    # Read at call time: forked workers must not reuse the parent's pid
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def hold_lease(cache, name, ttl, owner=None):
+    """
+    Leader election: True while this worker owns `name`. Call again before
+    `ttl` seconds pass to keep the lease; if the holder dies it expires and
+    another worker takes over.
+    """
+    key = f"lease:{name}"
+    owner = owner or worker_id()
+    try:
+        if cache.set(key, owner.encode(), ex=ttl, nx=True):
+            return True
+        if cache.get(key) == owner.encode():
+            cache.set(key, owner.encode(), ex=ttl)
+            return True
+    except Exception as e:
+        print(f"Lease check failed for {name}: {e}")
+    return False
+
+
+# =====================================================
+# SHARED INSTANCE
+# =====================================================
+_default_cache = None
+_default_cache_guard = threading.Lock()
+
+
+def get_shared_cache():
+    """
+    Returns the process-wide shared cache selected by SHARED_CACHE_URL.
+    """
+    global _default_cache
+    with _default_cache_guard:
+        if _default_cache is None:
+            _default_cache = open_cache(os.getenv("SHARED_CACHE_URL", DEFAULT_URL))
+        return _default_cache
+
+
+def set_shared_cache(cache):
+    """
+    Replaces the process-wide shared cache (e.g. with a MemoryCache in tests).
+    """
+    global _default_cache
+    with _default_cache_guard:
+        _default_cache = cache
+
+
+def stats():
+    cache = get_shared_cache()
+    try:
+        entries = cache.size()
+    except Exception:
+        entries = None
+    return {"backend": type(cache).__name__, "url": cache.url, "worker": worker_id(), "entries": entries}
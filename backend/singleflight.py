@@ -0,0 +1,148 @@
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+
+from metrics import profiling
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+DEFAULT_TTL = 5.0
+DEFAULT_MAX_ENTRIES = 2048
+
+
+def _cacheable(result):
+    # Endpoints report failures as {"error": ...}; never cache those
+    return not (isinstance(result, dict) and "error" in result)
+
+
+# =====================================================
+# SINGLE-FLIGHT + SHORT TTL RESULT CACHE
+# =====================================================
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one in-flight computation.
+    Successful results are then kept for `ttl` seconds.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, clock=time.monotonic,
+                 cacheable=_cacheable):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.cacheable = cacheable
+
+        self._inflight = {}
+        self._results = OrderedDict()  # key -> (expires_at, result)
+
+        self.requests = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+
+    def _cached(self, key):
+        entry = self._results.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] < self.clock():
+            del self._results[key]
+            return False, None
+        self._results.move_to_end(key)
+        return True, entry[1]
+
+    def _store(self, key, result, ttl):
+        if ttl <= 0 or not self.cacheable(result):
+            return
+        self._results[key] = (self.clock() + ttl, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    async def run(self, key, coro_fn, *args, ttl=None, **kwargs):
+        self.requests += 1
+
+        hit, result = self._cached(key)
+        if hit:
+            self.cache_hits += 1
+            return result
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        self.executions += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await coro_fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        else:
+            self._store(key, result, self.ttl if ttl is None else ttl)
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def peek(self, key):
+        """
+        Returns (hit, result) from the TTL cache without computing anything.
+        """
+        return self._cached(key)
+
+    def put(self, key, result, ttl=None):
+        """
+        Stores a result computed elsewhere (e.g. by a background job).
+        """
+        self._store(key, result, self.ttl if ttl is None else ttl)
+
+    def clear(self):
+        """
+        Drops every cached result (in-flight calls are left alone).
+        """
+        self._results.clear()
+
+    def stats(self):
+        shared = self.coalesced + self.cache_hits
+        return {
+            "requests": self.requests,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache_hits,
+            "in_flight": len(self._inflight),
+            "cached_results": len(self._results),
+            "coalescing_ratio": round(shared / self.requests, 4) if self.requests else 0.0
+        }
+
+
+flights = SingleFlight()
+
+
+def coalesce(name, ttl=None):
+    """
+    Endpoint decorator: identical concurrent requests (same endpoint and
+    parameters) share one computation. Tickers are normalised (upper-case,
+    '.NS' suffix) before the call so 'RELIANCE' and 'reliance.ns' coalesce too.
+    Profiled requests (metrics.profiling()) bypass the cache.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(**kwargs):
+            params = dict(kwargs)
+            if "ticker" in params:
+                ticker = params["ticker"].upper()
+                params["ticker"] = ticker if ticker.endswith(".NS") else ticker + ".NS"
+            if profiling():
+                # A profiled request does its own work so the breakdown is real
+                return await fn(**params)
+            key = (name,) + tuple(sorted(params.items()))
+            return await flights.run(key, fn, ttl=ttl, **params)
+        return wrapper
+    return decorator
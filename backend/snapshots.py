@@ -0,0 +1,269 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from main import analyze_frame_async, load_data, load_many
+from shared_cache import get_shared_cache, hold_lease
+from workers import pools
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+DEFAULT_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "snapshots.sqlite")
+
+# Tickers kept precomputed: SNAPSHOT_UNIVERSE="RELIANCE,TCS,..." or
+# SNAPSHOT_UNIVERSE_FILE with one ticker per line
+SNAPSHOT_CONCURRENCY = int(os.getenv("SNAPSHOT_CONCURRENCY", 8))
+SNAPSHOT_POLL_SECONDS = int(os.getenv("SNAPSHOT_POLL_SECONDS", 60))
+
+# Snapshots older than this are not served (the request computes on demand)
+SNAPSHOT_MAX_AGE = int(os.getenv("SNAPSHOT_MAX_AGE", 2 * 60 * 60))
+
+
+def _normalize(ticker):
+    ticker = ticker.strip().upper()
+    return ticker if ticker.endswith(".NS") else ticker + ".NS"
+
+
+def load_universe():
+    names = os.getenv("SNAPSHOT_UNIVERSE", "").split(",")
+    path = os.getenv("SNAPSHOT_UNIVERSE_FILE")
+    if path:
+        with open(path) as f:
+            names += f.read().split()
+    return list(dict.fromkeys(_normalize(n) for n in names if n.strip()))
+
+
+def _last_bar_ts(df):
+    return int(pd.Timestamp(df["Date"].iloc[-1]).timestamp())
+
+
+# =====================================================
+# SNAPSHOT STORE (SQLite, survives restarts)
+# =====================================================
+class SnapshotStore:
+    """
+    Latest trend + Monte Carlo result per ticker, tagged with the bar it
+    was computed on.
+    """
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        conn = self._connect()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    ticker TEXT PRIMARY KEY,
+                    bar_ts INTEGER NOT NULL,
+                    computed_at REAL NOT NULL,
+                    trend TEXT NOT NULL,
+                    risk TEXT NOT NULL
+                )
+            """)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def put(self, ticker, bar_ts, trend, mc, computed_at=None):
+        computed_at = time.time() if computed_at is None else computed_at
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?)",
+                    (ticker, bar_ts, computed_at, json.dumps(trend), json.dumps(mc))
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+    def load_all(self):
+        """
+        Returns {ticker: snapshot dict} for every stored ticker.
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT ticker, bar_ts, computed_at, trend, risk FROM snapshots").fetchall()
+        finally:
+            conn.close()
+        return {
+            ticker: {"bar_ts": bar_ts, "computed_at": computed_at,
+                     "trend": json.loads(trend), "mc": json.loads(risk)}
+            for ticker, bar_ts, computed_at, trend, risk in rows
+        }
+
+
+# =====================================================
+# SCHEDULER
+# =====================================================
+class SnapshotScheduler:
+    """
+    Polls the bar store for the universe and recomputes a ticker's
+    snapshot only when a new bar has arrived. Endpoints read snapshots
+    with get(); tickers outside the universe (or with stale snapshots)
+    are computed on demand.
+
+    With several workers only the holder of the "snapshots" lease runs the
+    cycle; the others reload the snapshots it writes to the shared store.
+    """
+
+    def __init__(self, universe=None, store=None, concurrency=SNAPSHOT_CONCURRENCY,
+                 poll_seconds=SNAPSHOT_POLL_SECONDS, max_age=SNAPSHOT_MAX_AGE, clock=time.time):
+        self.universe = [_normalize(t) for t in (load_universe() if universe is None else universe)]
+        self.store = store
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.max_age = max_age
+        self.clock = clock
+
+        self._snapshots = None
+        self._latest_bar = {}
+        self._errors = {}
+        self.cycles = 0
+        self.leader = False
+        self.computed = 0
+        self.served = 0
+        self.on_demand = 0
+
+    def _store(self):
+        if self.store is None:
+            self.store = SnapshotStore(os.getenv("SNAPSHOT_STORE_PATH", DEFAULT_SNAPSHOT_PATH))
+        return self.store
+
+    def _loaded(self):
+        # Snapshots from the previous run are reused until a newer bar shows up
+        if self._snapshots is None:
+            self._snapshots = self._store().load_all()
+        return self._snapshots
+
+    def _save(self, ticker, bar_ts, trend, mc):
+        snapshot = {"bar_ts": bar_ts, "computed_at": self.clock(), "trend": trend, "mc": mc}
+        self._store().put(ticker, bar_ts, trend, mc, computed_at=snapshot["computed_at"])
+        self._loaded()[ticker] = snapshot
+
+    def is_stale(self, ticker):
+        snapshot = self._loaded().get(ticker)
+        if snapshot is None:
+            return True
+        if self.clock() - snapshot["computed_at"] > self.max_age:
+            return True
+        return snapshot["bar_ts"] < self._latest_bar.get(ticker, snapshot["bar_ts"])
+
+    def lookup(self, ticker):
+        """
+        (trend, mc) from a fresh snapshot, or None.
+        """
+        ticker = _normalize(ticker)
+        if ticker not in self.universe or self.is_stale(ticker):
+            return None
+        snapshot = self._loaded()[ticker]
+        return snapshot["trend"], snapshot["mc"]
+
+    async def get(self, ticker):
+        """
+        Snapshot lookup with on-demand fallback.
+        """
+        ticker = _normalize(ticker)
+        hit = self.lookup(ticker)
+        if hit is not None:
+            self.served += 1
+            return hit
+
+        self.on_demand += 1
+        df = await pools.run_io(load_data, ticker)
+        trend, mc = await analyze_frame_async(ticker, df)
+        if ticker in self.universe:
+            await pools.run_io(self._save, ticker, _last_bar_ts(df), trend, mc)
+        return trend, mc
+
+    async def run_once(self):
+        """
+        One refresh cycle: a grouped bar refresh for the whole universe, then
+        recompute every ticker whose last bar changed.
+        """
+        frames = await pools.run_io(load_many, self.universe)
+        snapshots = await pools.run_io(self._loaded)
+
+        due = []
+        for ticker, df in frames.items():
+            if df.empty:
+                self._errors[ticker] = "No data available"
+                continue
+            bar_ts = _last_bar_ts(df)
+            self._latest_bar[ticker] = bar_ts
+            snapshot = snapshots.get(ticker)
+            if snapshot is None or snapshot["bar_ts"] != bar_ts or self.is_stale(ticker):
+                due.append((ticker, bar_ts))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def compute(ticker, bar_ts):
+            async with semaphore:
+                try:
+                    trend, mc = await analyze_frame_async(ticker, frames[ticker])
+                    await pools.run_io(self._save, ticker, bar_ts, trend, mc)
+                    self._errors.pop(ticker, None)
+                    self.computed += 1
+                except Exception as e:
+                    self._errors[ticker] = str(e)
+
+        await asyncio.gather(*(compute(t, ts) for t, ts in due))
+        self.cycles += 1
+        return len(due)
+
+    def _reload(self):
+        self._snapshots = self._store().load_all()
+
+    async def run_forever(self):
+        while True:
+            try:
+                # Lease outlives a slow cycle; a dead leader is replaced after it expires
+                self.leader = await pools.run_io(hold_lease, get_shared_cache(), "snapshots",
+                                                 max(self.poll_seconds * 5, 60))
+                if self.leader:
+                    updated = await self.run_once()
+                    if updated:
+                        print(f"Snapshots refreshed for {updated} tickers")
+                else:
+                    await pools.run_io(self._reload)
+            except Exception as e:
+                print(f"Snapshot cycle failed: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    def stats(self):
+        now = self.clock()
+        snapshots = self._loaded() if self.universe else {}
+        tickers = {}
+        for ticker in self.universe:
+            snapshot = snapshots.get(ticker)
+            tickers[ticker] = {
+                "bar_ts": snapshot["bar_ts"] if snapshot else None,
+                "age_seconds": round(now - snapshot["computed_at"], 1) if snapshot else None,
+                "stale": self.is_stale(ticker),
+                "error": self._errors.get(ticker)
+            }
+        return {
+            "universe": len(self.universe),
+            "fresh": sum(not t["stale"] for t in tickers.values()),
+            "cycles": self.cycles,
+            "leader": self.leader,
+            "computed": self.computed,
+            "served": self.served,
+            "on_demand": self.on_demand,
+            "tickers": tickers
+        }
+
+
+snapshot_scheduler = SnapshotScheduler()
@@ -0,0 +1,222 @@
+import asyncio
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+from backtester import (
+    FEATURE_COLS, RETRAIN_FREQUENCY, RSI_LOWER, RSI_UPPER, START_INDEX, TRADE_QUANTITY,
+    max_drawdown, pair_trades, rsi_signals, walk_forward_predictions
+)
+from features import FEATURE_NAMES, add_features
+from main import load_many
+from workers import pools
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+DEFAULT_GRID = {
+    "start_index": [START_INDEX],
+    "retrain_frequency": [RETRAIN_FREQUENCY],
+    "training_mode": ["full"],
+    "max_train_rows": [None],
+    "feature_cols": [FEATURE_COLS],
+    "rsi_upper": [RSI_UPPER],
+    "rsi_lower": [RSI_LOWER],
+    "quantity": [TRADE_QUANTITY],
+}
+
+# Parameters that change the trained model; the rest only change the rules
+MODEL_PARAMS = ("start_index", "retrain_frequency", "training_mode", "max_train_rows", "feature_cols")
+RULE_PARAMS = ("rsi_upper", "rsi_lower", "quantity")
+
+# Columns written once per ticker and memory-mapped by the workers
+ARRAY_COLUMNS = FEATURE_NAMES + ["Target", "Close"]
+
+
+def expand_grid(grid):
+    """
+    Cartesian product of a {param: [values]} grid, filled with defaults.
+    """
+    grid = dict(DEFAULT_GRID, **(grid or {}))
+    unknown = set(grid) - set(DEFAULT_GRID)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+# =====================================================
+# SHARED ARRAYS (one .npy per column per ticker, memory-mapped)
+# =====================================================
+def _write_arrays(root, ticker, df):
+    folder = os.path.join(root, ticker)
+    os.makedirs(folder, exist_ok=True)
+    for col in ARRAY_COLUMNS:
+        np.save(os.path.join(folder, f"{col}.npy"), df[col].to_numpy(dtype=float))
+
+
+_mapped = {}
+
+
+def _load_arrays(root, ticker):
+    # Cached per worker process; pages are shared through the OS page cache.
+    # Pool workers outlive a sweep, so maps of deleted sweep folders are dropped
+    for stale in [k for k in _mapped if not os.path.isdir(k[0])]:
+        del _mapped[stale]
+
+    key = (root, ticker)
+    if key not in _mapped:
+        folder = os.path.join(root, ticker)
+        _mapped[key] = {
+            col: np.load(os.path.join(folder, f"{col}.npy"), mmap_mode="r") for col in ARRAY_COLUMNS
+        }
+    return _mapped[key]
+
+
+# =====================================================
+# WORKER TASK
+# =====================================================
+def _evaluate(returns, close, signal, start_index, quantity, initial_capital):
+    strategy_returns = np.concatenate([[0.0], signal[:-1] * returns[1:]])
+    strategy_value = initial_capital * np.cumprod(1 + strategy_returns)
+    buy_hold_value = initial_capital * np.cumprod(1 + returns)
+
+    prices = np.round(close, 2)
+    entries, exits = pair_trades(signal, start_index)
+    pnl = (prices[exits] - prices[entries[:len(exits)]]) * quantity
+
+    final_balance = strategy_value[-1]
+    total_return = (final_balance - initial_capital) / initial_capital * 100
+    market_return = (buy_hold_value[-1] - initial_capital) / initial_capital * 100
+
+    return {
+        "profitPercent": round(float(total_return), 2),
+        "vsMarketPercent": round(float(total_return - market_return), 2),
+        "maxDrawdownPercent": round(max_drawdown(strategy_value), 2),
+        "totalTrades": int(len(exits)),
+        "winRate": round(float((pnl > 0).mean() * 100), 1) if len(exits) else 0.0,
+        "tradePnL": round(float(pnl.sum()), 2),
+    }
+
+
+def _run_model_group(root, ticker, model_params, rule_sets, initial_capital):
+    """
+    Trains the walk-forward model once and scores every rule set on it.
+    """
+    arrays = _load_arrays(root, ticker)
+    X = np.column_stack([arrays[c] for c in model_params["feature_cols"]])
+    y = arrays["Target"].astype(int)
+    rsi = arrays["RSI"]
+    start_index = model_params["start_index"]
+
+    if len(X) <= start_index:
+        return [dict(ticker=ticker, **model_params, **rules, error="Not enough data") for rules in rule_sets]
+
+    predictions = walk_forward_predictions(
+        X, y,
+        start_index=start_index,
+        retrain_frequency=model_params["retrain_frequency"],
+        training_mode=model_params["training_mode"],
+        max_train_rows=model_params["max_train_rows"]
+    )
+
+    results = []
+    for rules in rule_sets:
+        signal = rsi_signals(predictions, rsi, rules["rsi_upper"], rules["rsi_lower"])
+        signal[:start_index] = 0
+        stats = _evaluate(arrays["Return"], arrays["Close"], signal, start_index,
+                          rules["quantity"], initial_capital)
+        results.append(dict(ticker=ticker, **model_params, **rules, **stats))
+    return results
+
+
+# =====================================================
+# SWEEP
+# =====================================================
+def _write_all(root, frames):
+    """
+    Computes features once per ticker and writes them for the workers.
+    Returns (tickers written, error rows).
+    """
+    ready, errors = [], []
+    for ticker, df in frames.items():
+        if df.empty:
+            errors.append({"ticker": ticker, "error": "No data found"})
+            continue
+        _write_arrays(root, ticker, add_features(df, target=True, dropna=True))
+        ready.append(ticker)
+    return ready, errors
+
+
+async def _score_group(root, ticker, model_params, rule_sets, initial_capital):
+    try:
+        return await pools.run_cpu(_run_model_group, root, ticker, model_params, rule_sets, initial_capital)
+    except Exception as e:
+        return [dict(ticker=ticker, **model_params, **rules, error=str(e)) for rules in rule_sets]
+
+
+async def run_sweep(tickers, grid=None, period="6mo", initial_capital=100000,
+                    rank_by="profitPercent", top=None):
+    """
+    Backtests every grid configuration on every ticker on the shared CPU
+    pool and returns the results ranked by `rank_by` (descending).
+    """
+    configs = expand_grid(grid)
+    frames = await pools.run_io(load_many, tickers, interval="1h", period=period)
+
+    # Group configs so each distinct model is trained once per ticker
+    groups = {}
+    for config in configs:
+        model_params = {k: config[k] for k in MODEL_PARAMS}
+        key = tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in model_params.items())
+        groups.setdefault(key, (model_params, []))[1].append({k: config[k] for k in RULE_PARAMS})
+
+    root = tempfile.mkdtemp(prefix="sweep_")
+    try:
+        # Features are computed once per ticker, then shared read-only
+        ready, results = await pools.run_io(_write_all, root, frames)
+
+        # One task per (ticker, model); the cpu limit queues the rest
+        batches = await asyncio.gather(*(
+            _score_group(root, ticker, model_params, rule_sets, initial_capital)
+            for ticker in ready
+            for model_params, rule_sets in groups.values()
+        ))
+        for batch in batches:
+            results.extend(batch)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    ranked = sorted(
+        (r for r in results if "error" not in r),
+        key=lambda r: r[rank_by], reverse=True
+    )
+    for i, row in enumerate(ranked, start=1):
+        row["rank"] = i
+
+    return {
+        "configurations": len(configs),
+        "tickers": len(tickers),
+        "results": ranked[:top] if top else ranked,
+        "errors": [r for r in results if "error" in r],
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python sweep.py TICKER [TICKER ...]")
+        sys.exit(1)
+
+    report = asyncio.run(run_sweep(sys.argv[1:], grid={
+        "retrain_frequency": [25, 50, 100],
+        "rsi_upper": [65, 70, 75],
+        "rsi_lower": [25, 30, 35],
+    }, top=10))
+    pools.shutdown()
+    for row in report["results"]:
+        print(row)
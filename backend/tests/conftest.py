@@ -0,0 +1,40 @@
+import os
+import sys
+
+# Offline and in-process unless a test opts in to a process pool
+os.environ.setdefault("LLM_STUB", "1")
+os.environ.setdefault("CPU_WORKERS", "0")
+os.environ["NEWS_REFRESH_SECONDS"] = "0"
+os.environ["SNAPSHOT_UNIVERSE"] = ""
+os.environ.pop("SHARED_CACHE_URL", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def store(tmp_path):
+    """
+    Process-wide bar store backed by bench.py's seeded synthetic bars.
+    """
+    import bar_store
+    from bench import install_store
+
+    previous = bar_store._default_store
+    yield install_store(str(tmp_path))
+    bar_store.set_store(previous)
+
+
+@pytest.fixture
+def registry():
+    """
+    Empty process-wide model registry.
+    """
+    import model_registry
+
+    previous = model_registry._default_registry
+    fresh = model_registry.ModelRegistry()
+    model_registry.set_registry(fresh)
+    yield fresh
+    model_registry.set_registry(previous)
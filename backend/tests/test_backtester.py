@@ -0,0 +1,43 @@
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from backtester import FEATURE_COLS, RETRAIN_FREQUENCY, START_INDEX, feature_arrays, walk_forward_signals
+from bench import synthetic_bars
+from features import add_features
+
+
+def baseline_signals(df, start_index=START_INDEX, retrain_frequency=RETRAIN_FREQUENCY):
+    """
+    The original row-by-row walk-forward loop.
+    """
+    scaler = StandardScaler()
+    model = LogisticRegression(max_iter=1000)
+    signals = [0] * start_index
+    for i in range(start_index, len(df)):
+        if (i - start_index) % retrain_frequency == 0:
+            train = df.iloc[:i]
+            model.fit(scaler.fit_transform(train[FEATURE_COLS]), train["Target"])
+        prediction = model.predict(scaler.transform(df.iloc[[i]][FEATURE_COLS]))[0]
+        rsi = df.iloc[i]["RSI"]
+        if prediction == 1 and rsi < 70:
+            signals.append(1)
+        elif prediction == 0 and rsi > 30:
+            signals.append(-1)
+        else:
+            signals.append(0)
+    return np.array(signals)
+
+
+def test_walk_forward_matches_baseline_loop():
+    for ticker in ["WF1.NS", "WF2.NS", "WF3.NS"]:
+        bars = synthetic_bars(ticker, "1h", 182)
+        df = add_features(bars.copy(), target=True, dropna=True).reset_index(drop=True)
+
+        valid, features, target = feature_arrays(bars["Close"].to_numpy())
+        signals = walk_forward_signals(
+            np.column_stack([features[c] for c in FEATURE_COLS]), target, features["RSI"]
+        )
+
+        assert valid.sum() == len(df)
+        np.testing.assert_array_equal(signals, baseline_signals(df))
@@ -0,0 +1,108 @@
+import pandas as pd
+import pytest
+
+from bar_store import BarStore, FileBarProvider
+from bench import synthetic_bars
+
+TICKER = "STORE.NS"
+
+
+@pytest.fixture
+def setup(tmp_path):
+    """
+    (store, provider, bars, clock) with the clock just after bar 300.
+    """
+    bars = synthetic_bars(TICKER, "1h", 120).reset_index(drop=True)
+    provider = FileBarProvider(str(tmp_path / "fixtures"))
+    now = [0.0]
+
+    def publish(upto, revised=None):
+        # revised: {row: close} for bars the provider has corrected
+        shown = bars.iloc[:upto].copy()
+        for row, close in (revised or {}).items():
+            shown.loc[row, "Close"] = close
+        provider.save(TICKER, "1h", shown)
+        now[0] = shown["Date"].iloc[-1].timestamp() + 600
+
+    store = BarStore(str(tmp_path / "bars.sqlite"), provider, refresh_seconds=60, clock=lambda: now[0])
+    return store, provider, bars, publish
+
+
+def test_first_read_downloads_the_window_once(setup):
+    store, provider, bars, publish = setup
+    publish(300)
+
+    first = store.get_bars(TICKER, "1h", "max")
+    again = store.get_bars(TICKER, "1h", "max")
+
+    assert len(provider.calls) == 1
+    assert provider.calls[0][2] is None
+    assert len(first) == 300
+    pd.testing.assert_frame_equal(first, again)
+
+
+def test_incremental_refresh_after_a_gap_fetches_from_the_last_bar(setup):
+    store, provider, bars, publish = setup
+    publish(300)
+    store.get_bars(TICKER, "1h", "max")
+
+    # The store was not read for a few days: 40 new bars
+    publish(340)
+    out = store.get_bars(TICKER, "1h", "max")
+
+    assert len(provider.calls) == 2
+    assert provider.calls[1][2] == bars["Date"].iloc[299]
+    assert len(out) == 340
+    assert out["Date"].is_monotonic_increasing and out["Date"].is_unique
+    assert out["Close"].tolist() == pytest.approx(bars["Close"].iloc[:340].tolist())
+
+
+def test_revised_last_bar_is_overwritten(setup):
+    store, provider, bars, publish = setup
+    publish(300)
+    store.get_bars(TICKER, "1h", "max")
+
+    # The forming bar closed at a different price and one more bar arrived
+    publish(301, revised={299: 123.45})
+    out = store.get_bars(TICKER, "1h", "max")
+
+    assert len(out) == 301
+    assert out["Close"].iloc[299] == pytest.approx(123.45)
+    assert out["Close"].iloc[300] == pytest.approx(bars["Close"].iloc[300])
+
+
+def test_fresh_series_skips_the_provider(setup):
+    store, provider, bars, publish = setup
+    publish(300)
+    store.get_bars(TICKER, "1h", "max")
+    calls = len(provider.calls)
+
+    store.get_bars(TICKER, "1h", "30d")
+    store.get_arrays(TICKER, "1h", "30d")
+
+    assert len(provider.calls) == calls
+
+
+def test_arrays_match_frames(setup):
+    store, provider, bars, publish = setup
+    publish(300)
+
+    frame = store.get_bars(TICKER, "1h", "30d")
+    series = store.get_arrays(TICKER, "1h", "30d")
+
+    assert len(series) == len(frame)
+    assert series["Close"].tolist() == pytest.approx(frame["Close"].tolist())
+
+
+def test_many_arrays_refresh_once(setup, monkeypatch):
+    store, provider, bars, publish = setup
+    publish(300)
+
+    refreshes = []
+    monkeypatch.setattr(store, "refresh", lambda *args: refreshes.append(args))
+    out = store.get_many_arrays([TICKER], "1h", "30d")
+
+    # The grouped refresh is the only one; no per-ticker refresh after it
+    assert refreshes == []
+    assert len(provider.calls) == 1
+    assert len(out[TICKER]) == len(store.read(TICKER, "1h", "30d"))
@@ -0,0 +1,103 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from columnar import COLUMNS, VERSIONS_TO_KEEP, ColumnarSeries, ColumnarStore
+
+
+def _columns(n, value):
+    return {name: np.full(n, float(value)) for name in COLUMNS}
+
+
+def _versions(series_dir):
+    return {d for d in os.listdir(series_dir) if d != "current" and not d.startswith(".")}
+
+
+def test_write_publishes_a_versioned_directory(tmp_path):
+    store = ColumnarStore(str(tmp_path))
+    store.write("COL.NS", "1h", np.arange(5) * 3600, _columns(5, 1), "Asia/Kolkata")
+
+    series_dir = tmp_path / "1h" / "COL.NS"
+    version = os.readlink(series_dir / "current")
+    assert _versions(series_dir) == {version}
+    assert sorted(os.listdir(series_dir / version)) == sorted(
+        [f"{name}.npy" for name in ["ts"] + COLUMNS] + ["meta.json"]
+    )
+
+    series = store.open("COL.NS", "1h")
+    assert series.tz == "Asia/Kolkata"
+    assert series["Close"].tolist() == [1.0] * 5
+    assert not series["Close"].flags.writeable
+    assert store.open("MISSING.NS", "1h") is None
+
+
+def test_current_link_swaps_and_old_versions_are_pruned(tmp_path):
+    store = ColumnarStore(str(tmp_path))
+    series_dir = tmp_path / "1h" / "COL.NS"
+
+    published = []
+    for i in range(4):
+        store.write("COL.NS", "1h", np.arange(5 + i), _columns(5 + i, i), None)
+        published.append(os.readlink(series_dir / "current"))
+        assert store.open("COL.NS", "1h")["Close"].tolist() == [float(i)] * (5 + i)
+
+    assert len(set(published)) == 4
+    assert _versions(series_dir) == set(published[-VERSIONS_TO_KEEP:])
+
+
+def test_open_series_survive_newer_versions(tmp_path):
+    store = ColumnarStore(str(tmp_path))
+    store.write("COL.NS", "1h", np.arange(5), _columns(5, 1), None)
+    old = store.open("COL.NS", "1h")
+
+    # Its directory is removed once two newer versions exist
+    for i in (2, 3):
+        store.write("COL.NS", "1h", np.arange(5), _columns(5, i), None)
+
+    assert old["Close"].tolist() == [1.0] * 5
+    assert store.open("COL.NS", "1h")["Close"].tolist() == [3.0] * 5
+
+
+def test_readers_never_see_a_half_written_version(tmp_path):
+    writer = ColumnarStore(str(tmp_path))
+    writer.write("COL.NS", "1h", np.arange(10), _columns(10, 0), None)
+    done = threading.Event()
+
+    def publish():
+        for i in range(1, 60):
+            writer.write("COL.NS", "1h", np.arange(10 + i), _columns(10 + i, i), None)
+        done.set()
+
+    thread = threading.Thread(target=publish)
+    thread.start()
+    reads = 0
+    while not done.is_set() or reads == 0:
+        # A fresh store per read, like another worker process
+        series = ColumnarStore(str(tmp_path)).open("COL.NS", "1h")
+        value = series["Close"][0]
+        assert len(series) == 10 + int(value)
+        assert all((series[name] == value).all() for name in COLUMNS)
+        reads += 1
+    thread.join()
+
+
+@pytest.mark.parametrize("start, end, expected", [
+    (None, None, [0, 10, 20, 30, 40]),
+    (15, None, [20, 30, 40]),
+    (10, 30, [10, 20, 30]),       # both ends inclusive
+    (None, 5, [0]),
+    (41, None, []),
+    (-100, 100, [0, 10, 20, 30, 40]),
+])
+def test_slice_by_timestamp(start, end, expected):
+    ts = np.arange(5) * 10
+    series = ColumnarSeries(ts, {"Close": ts * 1.5}, None)
+
+    part = series.slice(start, end)
+
+    assert part.ts.tolist() == expected
+    assert part["Close"].tolist() == [t * 1.5 for t in expected]
+    if expected:
+        assert np.shares_memory(part.ts, ts)
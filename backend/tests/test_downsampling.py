@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from downsampling import downsample_indices, lttb, minmax
+
+
+@pytest.fixture
+def walk():
+    rng = np.random.default_rng(0)
+    y = np.cumsum(rng.normal(size=5000))
+    return np.arange(len(y)), y
+
+
+def test_lttb_keeps_endpoints_and_count(walk):
+    x, y = walk
+    for points in [3, 10, 500, 4999]:
+        picks = lttb(x, y, points)
+        assert len(picks) == points
+        assert picks[0] == 0 and picks[-1] == len(y) - 1
+        assert np.all(np.diff(picks) > 0)
+
+
+def test_lttb_keeps_every_row_when_not_reducing(walk):
+    x, y = walk
+    np.testing.assert_array_equal(lttb(x[:100], y[:100], 500), np.arange(100))
+
+
+def test_minmax_keeps_extremes_and_endpoints(walk):
+    x, y = walk
+    picks = minmax(y, 100)
+    assert len(picks) <= 100
+    assert picks[0] == 0 and picks[-1] == len(y) - 1
+    assert y.argmax() in picks and y.argmin() in picks
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_shared_axis_keeps_endpoints_within_budget(walk, method):
+    x, y = walk
+    picks = downsample_indices(x, [y, -y * 2], points=200, method=method)
+    assert len(picks) <= 200
+    assert picks[0] == 0 and picks[-1] == len(y) - 1
+
+
+def test_unknown_method_is_rejected(walk):
+    x, y = walk
+    with pytest.raises(ValueError):
+        downsample_indices(x, [y], points=10, method="nearest")
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+@pytest.mark.parametrize("points, curves", [(1, 1), (2, 1), (5, 3), (8, 4)])
+def test_small_budgets_never_exceed_points(walk, method, points, curves):
+    x, y = walk
+    picks = downsample_indices(x, [y * (k + 1) for k in range(curves)], points=points, method=method)
+    assert len(picks) <= points
+    assert np.all(np.diff(picks) > 0)
+    assert picks[0] == 0
+    if points >= 2:
+        assert picks[-1] == len(y) - 1
+
+
+@pytest.mark.parametrize("points", [0, None, -5])
+def test_non_positive_budget_keeps_every_row(walk, points):
+    x, y = walk
+    np.testing.assert_array_equal(downsample_indices(x, [y], points=points), np.arange(len(y)))
+
+
+@pytest.mark.parametrize("method, path, body", [
+    ("get", "/history/BENCH?points=-1", None),
+    ("get", "/batch/history?tickers=BENCH&points=-1", None),
+    ("get", "/backtest/BENCH?points=-1", None),
+    ("post", "/portfolio/backtest", {"tickers": ["BENCH"], "points": -1}),
+])
+def test_api_rejects_negative_points(store, method, path, body):
+    from fastapi.testclient import TestClient
+
+    import api
+
+    with TestClient(api.app) as client:
+        response = client.request(method, path, json=body)
+
+    assert response.status_code == 422
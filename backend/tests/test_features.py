@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench import synthetic_bars
+from features import FEATURE_NAMES, WARMUP_ROWS, FeatureEngine, StreamingFeatures, compute_features
+
+
+def _assert_matches_batch(out, df):
+    expected = compute_features(df["Close"].to_numpy())
+    for name in FEATURE_NAMES:
+        np.testing.assert_allclose(out[name].to_numpy(), expected[name], rtol=1e-9, atol=1e-9,
+                                   equal_nan=True, err_msg=name)
+
+
+def test_warmup_rows_match_compute_features():
+    close = synthetic_bars("WARM.NS", "1h", 30)["Close"].to_numpy()
+    for name, values in compute_features(close).items():
+        assert np.isnan(values[:WARMUP_ROWS[name]]).all()
+        assert not np.isnan(values[WARMUP_ROWS[name]:]).any()
+
+
+def test_features_for_matches_batch_after_window_slides():
+    bars = synthetic_bars("SLIDE.NS", "1h", 120).reset_index(drop=True)
+    engine = FeatureEngine()
+
+    # A fixed-size window moving forward a few bars at a time, as a
+    # '30d' request does over the day
+    size = 200
+    for start in [0, 1, 5, 6, 20, 21, 22, 60]:
+        window = bars.iloc[start:start + size].reset_index(drop=True)
+        out = engine.features_for("SLIDE.NS", window)
+        _assert_matches_batch(out, window)
+        assert out["RSI"].isna().sum() == WARMUP_ROWS["RSI"]
+
+
+def test_features_for_is_independent_of_cache_history():
+    bars = synthetic_bars("HIST.NS", "1h", 60).reset_index(drop=True)
+    window = bars.iloc[50:250].reset_index(drop=True)
+
+    warm = FeatureEngine()
+    warm.features_for("HIST.NS", bars.iloc[:240].reset_index(drop=True))
+    cold = FeatureEngine()
+
+    pd.testing.assert_frame_equal(
+        warm.features_for("HIST.NS", window), cold.features_for("HIST.NS", window), check_exact=False
+    )
+
+
+def test_streaming_update_matches_batch():
+    close = synthetic_bars("STREAM.NS", "1h", 30)["Close"].to_numpy()
+    expected = compute_features(close)
+    state = StreamingFeatures().seed(close[:50])
+    for i in range(50, len(close)):
+        row = state.update(close[i])
+        for name in FEATURE_NAMES:
+            assert row[name] == pytest.approx(expected[name][i], rel=1e-9)
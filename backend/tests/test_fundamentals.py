@@ -0,0 +1,112 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from fundamentals import PRICE_TTL, FileInfoProvider, FundamentalsStore
+
+TICKER = "FUND.NS"
+INFO = {
+    "currentPrice": 100.0, "previousClose": 98.0, "marketCap": 5e9,
+    "fiftyTwoWeekHigh": 120.0, "fiftyTwoWeekLow": 80.0,
+    "trailingPE": 21.5, "longBusinessSummary": "Makes things."
+}
+
+
+@pytest.fixture
+def setup(tmp_path):
+    """
+    (store, provider, clock) with the clock under test control.
+    """
+    provider = FileInfoProvider(str(tmp_path / "info"))
+    provider.save(TICKER, INFO)
+    now = [1_000_000.0]
+    store = FundamentalsStore(str(tmp_path / "fundamentals.sqlite"), provider, clock=lambda: now[0])
+    return store, provider, now
+
+
+async def _settle(store):
+    # Let background revalidations start, then finish
+    await asyncio.sleep(0)
+    while store._refreshing:
+        await asyncio.sleep(0.01)
+
+
+def test_first_get_waits_then_fresh_gets_are_hits(setup):
+    store, provider, now = setup
+
+    async def run():
+        first = await store.get(TICKER)
+        now[0] += PRICE_TTL / 2
+        return first, await store.get(TICKER)
+
+    first, again = asyncio.run(run())
+
+    assert first == again
+    assert first["currentPrice"] == 100.0 and first["trailingPE"] == 21.5
+    assert sorted(provider.calls) == [(TICKER, "info"), (TICKER, "quote")]
+    assert (store.misses, store.hits) == (1, 1)
+
+
+def test_stale_price_is_served_then_refreshed_alone(setup):
+    store, provider, now = setup
+
+    async def run():
+        await store.get(TICKER)
+        provider.save(TICKER, dict(INFO, currentPrice=105.0))
+        now[0] += PRICE_TTL + 1
+
+        stale = await store.get(TICKER)
+        await _settle(store)
+        return stale, await store.get(TICKER)
+
+    stale, fresh = asyncio.run(run())
+
+    # The old price is returned at once; only the quote source is refetched
+    assert stale["currentPrice"] == 100.0
+    assert fresh["currentPrice"] == 105.0
+    assert provider.calls.count((TICKER, "quote")) == 2
+    assert provider.calls.count((TICKER, "info")) == 1
+    assert store.stale_hits == 1
+
+
+def test_each_field_keeps_its_own_ttl(setup):
+    store, provider, now = setup
+
+    async def run():
+        await store.get(TICKER)
+        # Past the market cap TTL (15 min), inside the P/E one (6 h)
+        now[0] += 20 * 60
+        await store.get(TICKER)
+        await _settle(store)
+
+    asyncio.run(run())
+
+    assert provider.calls.count((TICKER, "quote")) == 2
+    assert provider.calls.count((TICKER, "info")) == 1
+
+
+def test_numpy_and_nan_values_are_stored_as_plain_json(setup):
+    store, _, now = setup
+
+    class NumpyProvider:
+        def fetch(self, ticker, source):
+            if source == "quote":
+                return {"currentPrice": np.float64(101.5), "previousClose": np.float64("nan"),
+                        "marketCap": np.int64(7), "fiftyTwoWeekHigh": np.float32(2.5),
+                        "fiftyTwoWeekLow": None}
+            return {"trailingPE": float("inf"), "longBusinessSummary": "Text"}
+
+    store.provider = NumpyProvider()
+    fields = asyncio.run(store.get(TICKER))
+
+    assert fields["currentPrice"] == 101.5 and type(fields["currentPrice"]) is float
+    assert fields["previousClose"] is None and fields["trailingPE"] is None
+    assert fields["marketCap"] == 7.0
+    json.dumps(fields, allow_nan=False)
+
+    # Another worker reads the same values back from SQLite
+    other = FundamentalsStore(store.path, provider=None, clock=lambda: now[0])
+    other.load([TICKER])
+    assert asyncio.run(other.get(TICKER)) == fields
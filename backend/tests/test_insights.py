@@ -0,0 +1,33 @@
+import asyncio
+
+from genai_explainer import StubClient, get_client
+from insights import InsightQueue, RateLimiter
+from llm_cache import explanations
+
+CONTEXT = {"trend": "UP", "signal": "BUY", "confidence": 0.61, "rsi": 55.2,
+           "risk_lower": 2410.0, "risk_upper": 2490.0}
+
+
+def test_similar_contexts_share_one_streamed_explanation():
+    client = get_client()
+    assert isinstance(client, StubClient)
+    explanations.clear()
+    queue = InsightQueue(workers=2, limiter=RateLimiter(rate_per_minute=6000))
+    calls = client.calls
+
+    async def run():
+        first = queue.submit(CONTEXT)
+        # Same bucket: a slightly different RSI and confidence
+        second = queue.submit(dict(CONTEXT, rsi=55.9, confidence=0.62))
+        chunks = [chunk async for chunk in first.stream()]
+        await second.wait()
+        queue.stop()
+        return first, second, chunks
+
+    first, second, chunks = asyncio.run(run())
+
+    assert first is second
+    assert client.calls - calls == 1
+    assert len(chunks) > 1
+    assert "".join(chunks).strip() == first.text
+    assert explanations.peek(first.key) == (True, first.text)
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+from bar_store import FileBarProvider
+from bench import synthetic_bars
+from features import compute_features
+from live import LiveHub, ReplayBarSource, Subscription
+
+TICKER = "LIVE.NS"
+
+
+@pytest.fixture
+def replay(tmp_path):
+    bars = synthetic_bars(TICKER, "1h", 90)
+    FileBarProvider(str(tmp_path)).save(TICKER, "1h", bars)
+    return ReplayBarSource(str(tmp_path), warmup=300), bars
+
+
+def test_replayed_updates_match_batch_features(replay, registry):
+    source, bars = replay
+    hub = LiveHub(source=source, poll_seconds=3600)
+    subscriptions = [Subscription() for _ in range(20)]
+    rsi = compute_features(bars["Close"].to_numpy())["RSI"]
+
+    async def run():
+        for subscription in subscriptions:
+            assert await hub.subscribe(subscription, ["LIVE"]) == {}
+        for _ in range(5):
+            await hub.poll_once()
+        hub.stop()
+        # Seed state, then one update per replayed bar
+        queue = subscriptions[0].queue
+        return [json.loads(queue.get_nowait()) for _ in range(queue.qsize())]
+
+    messages = asyncio.run(run())
+
+    assert [m["price"] for m in messages] == pytest.approx(bars["Close"].iloc[299:305].round(2).tolist())
+    assert [m["rsi"] for m in messages] == pytest.approx([round(v, 2) for v in rsi[299:305]])
+    # One computation per bar, however many subscribers
+    assert hub.stats()["computations"] == 5
+    assert hub.stats()["deliveries"] == 5 * len(subscriptions)
+
+
+def test_unknown_ticker_is_reported(replay, registry):
+    source, _ = replay
+    hub = LiveHub(source=source)
+
+    async def run():
+        return await hub.subscribe(Subscription(), ["MISSING"])
+
+    assert "MISSING.NS" in asyncio.run(run())
+
+
+def test_committed_bars_retrain_the_model(replay, registry):
+    from live import _model_key
+
+    source, bars = replay
+    hub = LiveHub(source=source, poll_seconds=3600)
+    subscription = Subscription()
+
+    async def run():
+        await hub.subscribe(subscription, ["LIVE"])
+        for _ in range(3):
+            await hub.poll_once()
+        hub.stop()
+        queue = subscription.queue
+        return [json.loads(queue.get_nowait()) for _ in range(queue.qsize())]
+
+    messages = asyncio.run(run())
+
+    # Every update predicts with a model trained for its own bar
+    assert [m["model_ts"] for m in messages] == [m["bar_ts"] for m in messages]
+    assert hub.stats()["retrains"] == 3
+    # Published like any other model (older bars of the series are evicted)
+    assert registry.get(_model_key(TICKER, "1h", messages[-1]["bar_ts"])) is not None
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+import metrics
+from metrics import Counter, Histogram, render, server_timing, span, traced_call
+
+
+def stage_count(stage):
+    series = metrics.STAGE_SECONDS._series.get((("stage", stage),))
+    return series[-1] if series else 0
+
+
+def timed_work(stage):
+    # Top-level so a process pool can run it
+    with span(stage):
+        return sum(range(1000))
+
+
+def test_histogram_and_counter_exposition():
+    histogram = Histogram("test_seconds", "Test latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        histogram.observe(value, route="/x")
+    counter = Counter("test_total", "Test requests")
+    counter.inc(route="/x", status=200)
+    counter.inc(2, route="/x", status=200)
+
+    assert histogram.render() == [
+        "# HELP test_seconds Test latency",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{le="0.1",route="/x"} 1',
+        'test_seconds_bucket{le="1.0",route="/x"} 2',
+        'test_seconds_bucket{le="+Inf",route="/x"} 3',
+        'test_seconds_sum{route="/x"} 2.550000',
+        'test_seconds_count{route="/x"} 3',
+    ]
+    assert counter.render()[-1] == 'test_total{route="/x",status="200"} 3'
+
+
+def test_render_includes_stages_and_gauges():
+    timed_work("render_test")
+    text = render({"in_flight": [({"pool": "cpu"}, 2)]})
+
+    assert text.endswith("\n")
+    assert "# TYPE algoholics_stage_seconds histogram" in text
+    assert 'algoholics_stage_seconds_count{stage="render_test"} 1' in text
+    assert "# TYPE algoholics_in_flight gauge\nalgoholics_in_flight{pool=\"cpu\"} 2" in text
+
+
+def test_traced_call_hands_spans_back_instead_of_recording():
+    before = stage_count("traced")
+    result, spans = traced_call(timed_work, "traced")
+
+    assert result == sum(range(1000))
+    assert [stage for stage, _ in spans] == ["traced"]
+    assert stage_count("traced") == before
+
+
+@pytest.mark.parametrize("cpu_workers", [0, 1])
+def test_spans_from_pools_are_recorded(cpu_workers):
+    from workers import WorkPools
+
+    pools = WorkPools(cpu_workers=cpu_workers)
+
+    async def run():
+        await pools.run_io(timed_work, "pool_io")
+        await pools.run_cpu(timed_work, f"pool_cpu_{cpu_workers}")
+
+    before = stage_count("pool_io")
+    try:
+        asyncio.run(run())
+    finally:
+        pools.shutdown()
+
+    # Counted once each, in this process, whichever pool ran them
+    assert stage_count("pool_io") == before + 1
+    assert stage_count(f"pool_cpu_{cpu_workers}") == 1
+    assert stage_count("cpu_queue") > 0
+
+
+def test_server_timing_sums_stages_in_first_seen_order():
+    assert server_timing([("a", 0.001), ("b", 0.002), ("a", 0.003)]) == "a;dur=4.00, b;dur=2.00"
+
+
+def test_profiled_request_gets_server_timing(store, registry):
+    from fastapi.testclient import TestClient
+
+    import api
+
+    with TestClient(api.app) as client:
+        plain = client.get("/history/BENCH")
+        profiled = client.get("/technical/BENCH?profile=1")
+        scrape = client.get("/metrics").text
+
+    assert "server-timing" not in plain.headers
+    stages = [part.split(";")[0] for part in profiled.headers["server-timing"].split(", ")]
+    assert {"data", "features", "fit", "total"} <= set(stages)
+    assert 'algoholics_requests_total{route="/technical/{ticker}",status="200"}' in scrape
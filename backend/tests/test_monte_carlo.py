@@ -0,0 +1,25 @@
+import pytest
+
+from bench import synthetic_bars
+from features import add_features
+from main import run_monte_carlo
+
+
+@pytest.fixture
+def frame():
+    return add_features(synthetic_bars("MC.NS", "1h", 60).reset_index(drop=True))
+
+
+def test_float_percentiles_use_plain_keys(frame):
+    out = run_monte_carlo(frame, percentiles=(5.0, 2.5, 50, 95.0), seed=1)
+
+    assert list(out["percentiles"]) == ["2.5", "5", "50", "95"]
+    assert out["lower"] == out["percentiles"]["5"]
+    assert out["upper"] == out["percentiles"]["95"]
+
+
+def test_int_and_float_percentiles_agree(frame):
+    ints = run_monte_carlo(frame, percentiles=(5, 95), seed=1)
+    floats = run_monte_carlo(frame, percentiles=(5.0, 95.0), seed=1)
+
+    assert ints == floats
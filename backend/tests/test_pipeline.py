@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import pytest
+
+
+@pytest.fixture
+def process_pool(monkeypatch):
+    """
+    Runs CPU work in a real worker process, like the default deployment.
+    """
+    from workers import pools
+
+    pools.shutdown()
+    monkeypatch.setattr(pools, "cpu_workers", 1)
+    yield pools
+    pools.shutdown()
+
+
+def test_model_cache_hits_with_process_pool(store, registry, process_pool):
+    from main import analyze_frame_async, load_data
+
+    async def run():
+        df = load_data("BENCH")
+        return [await analyze_frame_async("BENCH", df) for _ in range(4)]
+
+    results = asyncio.run(run())
+
+    stats = registry.stats()
+    assert stats["entries"] == 1
+    assert stats["misses"] == 1
+    assert stats["hits"] == 3
+    assert stats["hit_rate"] > 0
+    assert all(result == results[0] for result in results)
+
+
+def test_technical_endpoint_reports_model_hits(store, registry, process_pool):
+    from fastapi.testclient import TestClient
+
+    import api
+    from singleflight import flights
+
+    with TestClient(api.app) as client:
+        for _ in range(3):
+            # Skip request coalescing so every call reaches the model registry
+            flights.clear()
+            assert "error" not in client.get("/technical/BENCH").json()
+
+        stats = client.get("/stats/model-cache").json()
+        metrics = client.get("/metrics").text
+
+    assert stats["entries"] == 1
+    assert stats["hits"] == 2
+    assert stats["hit_rate"] > 0
+    assert 'algoholics_cache_hit_ratio{cache="model"} 0.6667' in metrics
+
+
+def test_batch_load_failure_reports_every_ticker(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import api
+
+    def broken(symbols):
+        raise ConnectionError("provider down")
+
+    monkeypatch.setattr(api, "load_many", broken)
+    with TestClient(api.app) as client:
+        response = client.get("/batch/technical?tickers=AAA,BBB")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == 200
+    assert sorted(line["ticker"] for line in lines) == ["AAA.NS", "BBB.NS"]
+    assert all(line["error"] == "Data load failed: provider down" for line in lines)
@@ -0,0 +1,78 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def trade_logs(tmp_path, monkeypatch):
+    import portfolio
+
+    monkeypatch.setattr(portfolio, "TRADE_LOG_DIR", str(tmp_path / "trades"))
+    return portfolio
+
+
+def test_portfolio_runs_on_shared_cpu_pool(store, trade_logs, monkeypatch):
+    from workers import pools
+
+    submitted = []
+    run_cpu = pools.run_cpu
+
+    async def counting_run_cpu(fn, *args, **kwargs):
+        submitted.append(fn.__name__)
+        return await run_cpu(fn, *args, **kwargs)
+
+    monkeypatch.setattr(pools, "run_cpu", counting_run_cpu)
+    report = asyncio.run(trade_logs.run_portfolio_backtest(["SYN000", "SYN001", "SYN002"]))
+
+    assert sorted(submitted) == ["portfolio_report"] + ["ticker_signals"] * 3
+    assert report["tickers"] == 3
+    assert not report["errors"]
+    assert report["stats"]["tradesExecuted"] > 0
+
+
+def test_buys_never_borrow_when_cash_runs_out():
+    from portfolio import simulate
+
+    # A is bought with every rupee (no fees); the wide band then keeps it
+    # whole when B turns BUY, leaving no cash for B
+    index = np.arange(3, dtype=np.int64) * 3600
+    close = np.full((3, 2), 10.0)
+    signal = np.array([[1, 0], [1, 1], [1, 1]])
+    sim = simulate(index, close, signal, ["A", "B"], initial_capital=1000,
+                   cost_bps=0, slippage_bps=0, rebalance_band=10)
+
+    cash = sim["equity"] * (1 - sim["exposure"])
+    assert (cash >= -1e-9).all()
+    assert list(sim["final_shares"]) == [100, 0]
+
+
+def test_ticker_signals_drop_rows_with_missing_bar_fields(store):
+    from backtester import feature_arrays
+    from bar_store import BAR_COLUMNS, get_store
+    from portfolio import ticker_signals
+
+    bars = get_store().get_arrays("SYN000.NS", interval="1h", period="6mo")
+    columns = [np.array(bars[c], dtype=float) for c in BAR_COLUMNS]
+    columns[BAR_COLUMNS.index("Volume")][150] = np.nan
+
+    ts, close, signal = ticker_signals(np.asarray(bars.ts), columns[3], columns)
+    valid, _, _ = feature_arrays(columns[3], columns)
+
+    assert bars.ts[150] not in ts
+    assert np.array_equal(ts, np.asarray(bars.ts)[valid])
+    assert len(signal) == len(ts)
+
+
+def test_buy_short_of_cash_is_not_marked_held():
+    from portfolio import simulate
+
+    # B's first rebalance has no cash (A and C are kept inside the band).
+    # When C leaves, B must be bought, not treated as an in-band holding
+    index = np.arange(3, dtype=np.int64) * 3600
+    close = np.full((3, 3), 10.0)
+    signal = np.array([[1, 0, 1], [1, 1, 1], [1, 1, 0]])
+    sim = simulate(index, close, signal, ["A", "B", "C"], initial_capital=1000,
+                   cost_bps=0, slippage_bps=0, rebalance_band=1.0)
+
+    assert list(sim["final_shares"]) == [50, 50, 0]
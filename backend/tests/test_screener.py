@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from bench import synthetic_bars, universe
+from features import add_features
+from main import FEATURE_COLS, run_trend_analysis
+from screener import fit_logistic_batch, screen_series
+from training import TrendModel
+
+
+@pytest.fixture(scope="module")
+def frames():
+    return {t: synthetic_bars(t, "1h", 60) for t in universe(25)}
+
+
+def test_screen_matches_per_ticker_trend_model(frames):
+    report = screen_series({t: df["Close"].to_numpy() for t, df in frames.items()})
+    assert not report["errors"]
+    assert report["stats"]["tickers"] == len(frames)
+
+    for row in report["results"]:
+        expected = run_trend_analysis(add_features(frames[row["ticker"]].copy()))
+        assert (row["trend"], row["signal"], row["rsi"], row["price"]) == (
+            expected["trend"], expected["signal"], expected["rsi"], expected["price"]
+        )
+        # sklearn stops at tol=1e-4, the batched Newton solve converges fully
+        assert row["confidence"] == pytest.approx(expected["confidence"], abs=5e-3)
+
+
+def test_batched_fit_matches_sklearn_optimum(frames):
+    from sklearn.linear_model import LogisticRegression
+
+    df = add_features(next(iter(frames.values())).copy(), target=True, dropna=True)
+    model = TrendModel()
+    model.update(df[FEATURE_COLS], df["Target"])
+    X = model.scaler.transform(df[FEATURE_COLS].to_numpy())
+    y = df["Target"].to_numpy()
+
+    coef, intercept, _ = fit_logistic_batch(X[None], y[None], np.ones((1, len(y))))
+    exact = LogisticRegression(tol=1e-12, max_iter=10000).fit(X, y)
+
+    np.testing.assert_allclose(coef[0], exact.coef_[0], atol=1e-6)
+    assert intercept[0] == pytest.approx(exact.intercept_[0], abs=1e-6)
+
+
+def test_unusable_tickers_are_reported():
+    report = screen_series({
+        "EMPTY.NS": None,
+        "SHORT.NS": np.arange(10.0),
+        "FLAT.NS": np.linspace(100, 200, 300),
+    })
+    errors = {e["ticker"]: e["error"] for e in report["errors"]}
+    assert errors == {
+        "EMPTY.NS": "Invalid ticker or no data available",
+        "SHORT.NS": "Not enough data",
+        "FLAT.NS": "Training data has a single class",
+    }
+    assert report["results"] == []
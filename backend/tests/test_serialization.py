@@ -0,0 +1,65 @@
+import datetime
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import serialization
+from columnar import format_dates
+from serialization import dumps, table
+
+PAYLOAD = {
+    "nan": float("nan"),
+    "inf": np.float64("inf"),
+    "price": np.float64(101.25),
+    "count": np.int64(7),
+    "flag": np.bool_(True),
+    "series": np.array([1.5, np.nan, 3.0]),
+    "ints": np.array([1, 2, 3], dtype=np.int64),
+    "at": pd.Timestamp("2024-01-02 09:15", tz="Asia/Kolkata"),
+    "naive": pd.Timestamp("2024-01-02 09:15:30"),
+    "day": datetime.date(2024, 1, 2),
+    "nested": [{"value": np.float64("nan")}, (np.int64(1), None, "text")],
+    3: "int key",
+}
+
+
+def test_column_and_record_layouts_decode_to_the_same_rows():
+    ts = np.arange(4) * 3600 + 1_704_180_600
+    columns = {
+        "date": format_dates(ts, "Asia/Kolkata", unit="h"),
+        "close": np.array([101.5, np.nan, 102.25, 99.0]),
+        "volume": np.array([10, 20, 30, 40], dtype=np.int64),
+    }
+
+    rows = json.loads(dumps(table(columns, "records")))
+    cols = json.loads(dumps(table(columns, "columns")))
+
+    assert rows == [dict(zip(cols, values)) for values in zip(*cols.values())]
+    assert rows[1] == {"date": "2024-01-02 14", "close": None, "volume": 20}
+
+
+def test_stdlib_fallback_matches_orjson(monkeypatch):
+    pytest.importorskip("orjson")
+    fast = dumps(PAYLOAD)
+
+    monkeypatch.setattr(serialization, "orjson", None)
+    slow = dumps(PAYLOAD)
+
+    assert slow == fast
+    decoded = json.loads(slow)
+    assert decoded["nan"] is None and decoded["inf"] is None
+    assert decoded["series"] == [1.5, None, 3.0]
+    assert decoded["at"] == "2024-01-02T09:15:00+05:30"
+    assert decoded["naive"] == "2024-01-02T09:15:30"
+    assert decoded["nested"] == [{"value": None}, [1, None, "text"]]
+    assert decoded["3"] == "int key"
+
+
+def test_unknown_types_are_rejected(monkeypatch):
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+    monkeypatch.setattr(serialization, "orjson", None)
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
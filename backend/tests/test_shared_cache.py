@@ -0,0 +1,59 @@
+import pytest
+
+from shared_cache import MemoryCache, SQLiteCache, get_object, hold_lease, set_object
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    now = [1000.0]
+    if request.param == "memory":
+        cache = MemoryCache(clock=lambda: now[0])
+    else:
+        cache = SQLiteCache(str(tmp_path / "shared.sqlite"), clock=lambda: now[0])
+    cache.now = now
+    return cache
+
+
+def test_set_nx_and_expiry(cache):
+    assert cache.set("k", b"1", ex=10)
+    assert not cache.set("k", b"2", nx=True)
+    assert cache.get("k") == b"1"
+
+    cache.now[0] += 11
+    assert cache.get("k") is None
+    assert cache.set("k", b"3", nx=True)
+    assert cache.get("k") == b"3"
+
+    cache.delete("k")
+    assert cache.get("k") is None
+
+
+def test_objects_round_trip(cache):
+    set_object(cache, "obj", {"a": [1, 2]})
+    assert get_object(cache, "obj") == {"a": [1, 2]}
+    assert get_object(cache, "missing") is None
+
+
+def test_lease_has_one_holder_until_it_expires(cache):
+    assert hold_lease(cache, "job", ttl=30, owner="a")
+    assert not hold_lease(cache, "job", ttl=30, owner="b")
+
+    # Renewal keeps the lease past the original expiry
+    cache.now[0] += 20
+    assert hold_lease(cache, "job", ttl=30, owner="a")
+    cache.now[0] += 20
+    assert not hold_lease(cache, "job", ttl=30, owner="b")
+
+    # The holder stops renewing (e.g. it died): another worker takes over
+    cache.now[0] += 31
+    assert hold_lease(cache, "job", ttl=30, owner="b")
+    assert not hold_lease(cache, "job", ttl=30, owner="a")
+
+
+def test_sqlite_lease_is_shared_between_handles(tmp_path):
+    path = str(tmp_path / "shared.sqlite")
+    first, second = SQLiteCache(path), SQLiteCache(path)
+
+    assert hold_lease(first, "snapshots", ttl=30, owner="worker-1")
+    assert not hold_lease(second, "snapshots", ttl=30, owner="worker-2")
+    assert second.get("lease:snapshots") == b"worker-1"
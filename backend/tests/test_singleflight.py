@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight(ttl=0)
+    calls = []
+
+    async def compute(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    async def run():
+        return await asyncio.gather(*(flight.run("key", compute, 21) for _ in range(10)))
+
+    assert asyncio.run(run()) == [42] * 10
+    assert calls == [21]
+    stats = flight.stats()
+    assert stats["executions"] == 1
+    assert stats["coalesced"] == 9
+
+
+def test_results_are_cached_for_ttl():
+    now = [0.0]
+    flight = SingleFlight(ttl=5, clock=lambda: now[0])
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    async def run():
+        first = await flight.run("key", compute)
+        now[0] = 4
+        cached = await flight.run("key", compute)
+        now[0] = 6
+        expired = await flight.run("key", compute)
+        return first, cached, expired
+
+    assert asyncio.run(run()) == ({"value": 1}, {"value": 1}, {"value": 2})
+    assert flight.stats()["cache_hits"] == 1
+
+
+def test_errors_are_shared_but_not_cached():
+    flight = SingleFlight(ttl=60)
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def error_dict():
+        calls.append(1)
+        return {"error": "bad ticker"}
+
+    async def run():
+        results = await asyncio.gather(*(flight.run("a", failing) for _ in range(3)), return_exceptions=True)
+        await flight.run("b", error_dict)
+        await flight.run("b", error_dict)
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(calls) == 3  # one failing execution, then two uncached error dicts
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight(ttl=0)
+
+    async def compute(value):
+        await asyncio.sleep(0)
+        return value
+
+    async def run():
+        return await asyncio.gather(flight.run("a", compute, 1), flight.run("b", compute, 2))
+
+    assert asyncio.run(run()) == [1, 2]
+    assert flight.stats()["executions"] == 2
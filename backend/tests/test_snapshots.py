@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+import bar_store
+from bar_store import BarStore, FileBarProvider
+from bench import synthetic_bars
+from snapshots import SnapshotScheduler, SnapshotStore
+
+UNIVERSE = ["SNAPA.NS", "SNAPB.NS"]
+OUTSIDE = "SNAPC.NS"
+
+
+@pytest.fixture
+def setup(tmp_path, registry):
+    """
+    (scheduler, store, publish, now): bars served from FileBarProvider
+    fixtures, one clock shared by the bar store and the scheduler.
+    """
+    bars = {t: synthetic_bars(t, "1h", 120).reset_index(drop=True) for t in UNIVERSE + [OUTSIDE]}
+    provider = FileBarProvider(str(tmp_path / "fixtures"))
+    now = [0.0]
+
+    def publish(upto, tickers=None):
+        for ticker in tickers or bars:
+            provider.save(ticker, "1h", bars[ticker].iloc[:upto])
+        now[0] = max(now[0], bars[UNIVERSE[0]]["Date"].iloc[upto - 1].timestamp() + 600)
+
+    store = BarStore(str(tmp_path / "bars.sqlite"), provider, refresh_seconds=60, clock=lambda: now[0])
+    previous = bar_store._default_store
+    bar_store.set_store(store)
+
+    scheduler = SnapshotScheduler(UNIVERSE, SnapshotStore(str(tmp_path / "snapshots.sqlite")),
+                                  max_age=3600, clock=lambda: now[0])
+    yield scheduler, store, publish, now
+    bar_store.set_store(previous)
+
+
+def test_run_once_refreshes_the_universe_in_one_group(setup, monkeypatch):
+    scheduler, store, publish, now = setup
+    publish(300)
+
+    grouped, single = [], []
+    refresh_many = store.refresh_many
+
+    def spy(tickers, *args):
+        grouped.append(sorted(tickers))
+        return refresh_many(tickers, *args)
+
+    monkeypatch.setattr(store, "refresh_many", spy)
+    monkeypatch.setattr(store, "refresh", lambda *args: single.append(args))
+
+    assert asyncio.run(scheduler.run_once()) == 2
+    assert grouped == [UNIVERSE] and single == []
+
+    # No new bar: nothing is recomputed
+    now[0] += 120
+    assert asyncio.run(scheduler.run_once()) == 0
+
+    # A new bar for one ticker recomputes only that one
+    publish(301, tickers=[UNIVERSE[0]])
+    assert asyncio.run(scheduler.run_once()) == 1
+    assert scheduler.computed == 3
+    assert all(scheduler.lookup(t) is not None for t in UNIVERSE)
+
+
+def test_snapshots_past_max_age_are_not_served(setup):
+    scheduler, store, publish, now = setup
+    publish(300)
+    asyncio.run(scheduler.run_once())
+
+    now[0] += 3000
+    assert scheduler.lookup(UNIVERSE[0]) is not None
+
+    now[0] += 1000
+    assert scheduler.lookup(UNIVERSE[0]) is None
+    assert scheduler.stats()["fresh"] == 0
+
+
+def test_get_falls_back_to_a_live_computation(setup):
+    scheduler, store, publish, now = setup
+    publish(300)
+
+    async def run():
+        await scheduler.run_once()
+        snapshot = scheduler.lookup(UNIVERSE[0])
+        served = await scheduler.get(UNIVERSE[0])
+
+        # Outside the universe: computed on demand, never stored
+        outside = await scheduler.get(OUTSIDE)
+
+        # Stale snapshot: recomputed on demand and stored again
+        now[0] += 4000
+        recomputed = await scheduler.get(UNIVERSE[1])
+        return snapshot, served, outside, recomputed
+
+    snapshot, served, outside, recomputed = asyncio.run(run())
+
+    assert served == snapshot
+    assert outside[0]["price"] > 0
+    assert recomputed[0]["price"] > 0
+    assert (scheduler.served, scheduler.on_demand) == (1, 2)
+    assert OUTSIDE not in scheduler.store.load_all()
+    assert scheduler.store.load_all()[UNIVERSE[1]]["computed_at"] == now[0]
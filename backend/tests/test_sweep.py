@@ -0,0 +1,27 @@
+import asyncio
+
+
+def test_sweep_runs_on_shared_cpu_pool(store, monkeypatch):
+    import sweep
+    from workers import pools
+
+    submitted = []
+    run_cpu = pools.run_cpu
+
+    async def counting_run_cpu(fn, *args, **kwargs):
+        submitted.append(fn.__name__)
+        return await run_cpu(fn, *args, **kwargs)
+
+    monkeypatch.setattr(pools, "run_cpu", counting_run_cpu)
+    report = asyncio.run(sweep.run_sweep(["BENCH"], grid={
+        "retrain_frequency": [50, 100],
+        "rsi_upper": [65, 75],
+    }))
+
+    # One pool task per distinct model, each scoring both rule sets
+    assert submitted == ["_run_model_group"] * 2
+    assert report["configurations"] == 4
+    assert not report["errors"]
+    assert [row["rank"] for row in report["results"]] == [1, 2, 3, 4]
+    profits = [row["profitPercent"] for row in report["results"]]
+    assert profits == sorted(profits, reverse=True)
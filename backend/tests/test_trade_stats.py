@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from backtester import max_drawdown, risk_ratios, run_backtest_strategy, trade_page, trade_statistics
+
+
+def test_max_drawdown_of_known_curve():
+    assert max_drawdown([100, 120, 90, 130, 117]) == pytest.approx(-25.0)
+    assert max_drawdown([100, 110, 120]) == 0.0
+    assert max_drawdown([]) == 0.0
+
+
+def test_risk_ratios_of_known_returns():
+    # mean 0.005, sample std sqrt(0.0003), downside sqrt(0.00005);
+    # 3 bar intervals over 0.03 years -> 100 bars a year, scale 10
+    returns = [0.02, -0.01, 0.02, -0.01]
+    timestamps = np.linspace(0, 0.03 * 365.25 * 24 * 3600, 4)
+
+    sharpe, sortino = risk_ratios(returns, timestamps)
+
+    assert sharpe == pytest.approx(0.005 / np.sqrt(0.0003) * 10)
+    assert sortino == pytest.approx(0.005 / np.sqrt(0.00005) * 10)
+    assert risk_ratios([0.01], [0]) == (0.0, 0.0)
+    assert risk_ratios([0.01, 0.01, 0.01], [0, 1, 2]) == (0.0, 0.0)
+
+
+def test_trade_statistics_of_known_trades():
+    # Trades held 2, 1 and 10 bars, then one still open
+    signal = np.array([0, 1, 1, 0, 1, 0, 0] + [1] * 10 + [0, 1])
+    prices = 100.0 + np.arange(len(signal))
+    value = np.array([100.0, 110, 99] + [99] * (len(signal) - 3))
+    returns = np.concatenate([[0.0], np.diff(value) / value[:-1]])
+    timestamps = np.arange(len(signal)) * 3600
+
+    trades, stats = trade_statistics(signal, prices, returns, value, timestamps,
+                                     start_index=0, quantity=2)
+
+    np.testing.assert_array_equal(trades["holding"], [2, 1, 10])
+    np.testing.assert_array_equal(trades["pnl"], [4, 2, 20])
+    assert stats["totalTrades"] == 3
+    assert stats["openTrade"] is True
+    assert stats["winRate"] == 100.0
+    assert stats["tradePnL"] == 26.0
+    assert stats["profitFactor"] is None
+    assert stats["maxDrawdownPercent"] == -10.0
+    assert stats["holdingBars"]["max"] == 10
+    assert stats["holdingBars"]["median"] == 2.0
+    assert stats["holdingBars"]["histogram"] == {
+        "1": 1, "2-3": 1, "4-7": 0, "8-15": 1, "16-31": 0, "32-63": 0, "64+": 0
+    }
+
+
+@pytest.mark.parametrize("total, offset, limit, page", [
+    (120, None, 50, (70, 120)),   # default: the last page
+    (120, 0, 50, (0, 50)),
+    (120, 100, 50, (100, 120)),   # short last page
+    (120, 200, 50, (120, 120)),   # past the end
+    (120, -5, 10, (0, 10)),
+    (120, None, 0, (0, 120)),     # limit=0: everything
+    (120, 30, 0, (30, 120)),
+    (10, None, 50, (0, 10)),
+])
+def test_trade_page_bounds(total, offset, limit, page):
+    assert trade_page(total, offset, limit) == page
+
+
+def test_trade_log_pages_cover_the_full_log(store):
+    full = run_backtest_strategy("BENCH", trade_limit=0)
+    total = full["tradeLogPage"]["total"]
+    assert total == len(full["tradeLog"]) > 4
+
+    size = total // 3 + 1
+    pages = [run_backtest_strategy("BENCH", trade_offset=offset, trade_limit=size)
+             for offset in range(0, total, size)]
+
+    assert len(pages) == 3
+    assert [row for page in pages for row in page["tradeLog"]] == full["tradeLog"]
+    assert pages[-1]["tradeLogPage"] == {"offset": 2 * size, "limit": size, "total": total}
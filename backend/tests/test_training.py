@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from training import TrendModel
+
+
+def _rows(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 3)) + np.linspace(0, 2, n)[:, None]
+    y = (X @ [1.0, -0.5, 0.2] + rng.normal(size=n) > 1).astype(int)
+    return X, y
+
+
+def _cold_fit(model, X, y):
+    from sklearn.linear_model import LogisticRegression
+
+    return LogisticRegression(max_iter=1000).fit(model.scaler.transform(X), y)
+
+
+def test_warm_first_fit_matches_full():
+    X, y = _rows()
+    warm = TrendModel(mode="warm").update(X[:200], y[:200])
+    full = TrendModel(mode="full").update(X[:200], y[:200])
+
+    np.testing.assert_allclose(warm.model.coef_, full.model.coef_, atol=1e-3)
+    np.testing.assert_allclose(warm.predict_proba(X), full.predict_proba(X), atol=1e-3)
+
+
+@pytest.mark.parametrize("max_train_rows, fitted, dropped", [
+    (None, [200, 50, 50], [0, 0, 0]),
+    (100, [100, 50, 50], [0, 50, 50]),
+])
+def test_warm_update_touches_only_new_rows(monkeypatch, max_train_rows, fitted, dropped):
+    from training import IncrementalLogistic
+
+    calls = []
+    partial_fit = IncrementalLogistic.partial_fit
+
+    def spy(self, X, y, X_drop=None, y_drop=None):
+        calls.append((len(X), 0 if X_drop is None else len(X_drop)))
+        return partial_fit(self, X, y, X_drop, y_drop)
+
+    monkeypatch.setattr(IncrementalLogistic, "partial_fit", spy)
+
+    X, y = _rows()
+    model = TrendModel(mode="warm", max_train_rows=max_train_rows)
+    for end in (200, 250, 300):
+        model.update(X[:end], y[:end])
+
+    assert calls == list(zip(fitted, dropped))
+    # Scaler fixed at the first fit
+    assert model.scaler.count == fitted[0]
+
+
+def test_warm_tracks_cold_fit():
+    X, y = _rows()
+    model = TrendModel(mode="warm")
+    for end in range(200, 401, 20):
+        model.update(X[:end], y[:end])
+
+    cold = _cold_fit(model, X, y)
+    np.testing.assert_allclose(model.model.coef_, cold.coef_, atol=0.05)
+    np.testing.assert_allclose(model.model.intercept_, cold.intercept_, atol=0.05)
+
+
+def test_warm_window_follows_recent_rows():
+    X, y = _rows()
+    model = TrendModel(mode="warm", max_train_rows=100)
+    for end in range(200, 401, 20):
+        model.update(X[:end], y[:end])
+
+    cold = _cold_fit(model, X[-100:], y[-100:])
+    agree = model.predict(X) == cold.predict(model.scaler.transform(X))
+    assert agree.mean() >= 0.9
+
+
+def test_full_window_rescales_on_window():
+    X, y = _rows()
+    model = TrendModel(mode="full", max_train_rows=100)
+    model.update(X[:300], y[:300])
+
+    assert model.scaler.count == 100
+    np.testing.assert_allclose(model.scaler.mean_, X[200:300].mean(axis=0))
@@ -0,0 +1,227 @@
+import numpy as np
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+# full   - refit a fresh LogisticRegression on the training rows (original behaviour)
+# warm   - L2 logistic regression updated from the previous coefficients with
+#          Newton steps on the new rows only; earlier rows enter through the
+#          curvature of their loss (a quadratic approximation of the full fit)
+# online - SGD logistic regression updated with partial_fit on new rows only
+TRAINING_MODES = ("full", "warm", "online")
+
+NEWTON_MAX_ITER = 50
+NEWTON_TOL = 1e-8
+
+
+# =====================================================
+# INCREMENTAL SCALER
+# =====================================================
+class RunningScaler:
+    """
+    StandardScaler whose mean/variance are updated with each new block of
+    rows (Chan et al. parallel update) instead of refit over the full prefix.
+    """
+
+    def __init__(self, n_features):
+        self.count = 0
+        self.mean_ = np.zeros(n_features)
+        self._m2 = np.zeros(n_features)
+
+    def partial_fit(self, X):
+        n = len(X)
+        if n == 0:
+            return self
+        batch_mean = X.mean(axis=0)
+        batch_m2 = ((X - batch_mean) ** 2).sum(axis=0)
+
+        total = self.count + n
+        delta = batch_mean - self.mean_
+        self.mean_ = self.mean_ + delta * n / total
+        self._m2 = self._m2 + batch_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        return self
+
+    @property
+    def scale_(self):
+        scale = np.sqrt(self._m2 / self.count)
+        scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0
+        return scale
+
+    def transform(self, X):
+        return (X - self.mean_) / self.scale_
+
+
+# =====================================================
+# INCREMENTAL LOGISTIC REGRESSION
+# =====================================================
+def _sigmoid(z):
+    return 0.5 * (1 + np.tanh(0.5 * z))
+
+
+def _with_intercept(X):
+    return np.column_stack([X, np.ones(len(X))])
+
+
+def _curvature(Xb, w, C):
+    p = _sigmoid(Xb @ w)
+    return C * (Xb.T * (p * (1 - p))) @ Xb
+
+
+class IncrementalLogistic:
+    """
+    LogisticRegression's objective (C * log-loss + ||coef||^2 / 2, free
+    intercept) fitted block by block. Rows already fitted are kept only as
+    the curvature of their loss at the previous coefficients, so an update
+    costs the rows added (and dropped from a window), not the history.
+    """
+
+    def __init__(self, C=1.0):
+        self.C = C
+        self.classes_ = np.array([0, 1])
+        self.coef_ = None
+        self.intercept_ = None
+        self._w = None
+        self._hessian = None
+
+    def partial_fit(self, X, y, X_drop=None, y_drop=None):
+        Xb = _with_intercept(X)
+        n_params = Xb.shape[1]
+
+        if self._w is None:
+            w0 = np.zeros(n_params)
+            prior = np.diag(np.r_[np.ones(n_params - 1), 0.0])
+        else:
+            w0, prior = self._w, self._hessian
+        pull = np.zeros(n_params)
+
+        # Rows leaving the window: remove their curvature and the gradient
+        # they were balancing at the previous optimum
+        if X_drop is not None and len(X_drop):
+            Db = _with_intercept(X_drop)
+            prior = prior - _curvature(Db, w0, self.C)
+            pull = self.C * Db.T @ (_sigmoid(Db @ w0) - y_drop)
+
+        def objective(w):
+            d = w - w0
+            z = Xb @ w
+            return 0.5 * d @ prior @ d - pull @ d + self.C * (np.logaddexp(0, z) - y * z).sum()
+
+        w, loss = w0.copy(), objective(w0)
+        for _ in range(NEWTON_MAX_ITER):
+            p = _sigmoid(Xb @ w)
+            grad = prior @ (w - w0) - pull + self.C * Xb.T @ (p - y)
+            step = np.linalg.solve(prior + _curvature(Xb, w, self.C), grad)
+
+            # Backtracking keeps every step a descent step
+            t = 1.0
+            while t > 1e-6 and objective(w - t * step) > loss:
+                t *= 0.5
+            w = w - t * step
+            loss = objective(w)
+            if np.abs(t * step).max() < NEWTON_TOL:
+                break
+
+        self._w = w
+        self._hessian = prior + _curvature(Xb, w, self.C)
+        self.coef_ = w[None, :-1]
+        self.intercept_ = w[-1:]
+        return self
+
+    def decision_function(self, X):
+        return X @ self.coef_[0] + self.intercept_[0]
+
+    def predict(self, X):
+        return (self.decision_function(X) > 0).astype(int)
+
+    def predict_proba(self, X):
+        p = _sigmoid(self.decision_function(X))
+        return np.column_stack([1 - p, p])
+
+
+# =====================================================
+# TREND MODEL
+# =====================================================
+class TrendModel:
+    """
+    Scaler + classifier pair that keeps its state between retrains.
+
+    update() receives every training row currently available together with
+    increasing row keys (positions or timestamps). Rows with keys already
+    seen are not fed to the scaler again, and in "online" mode not to the
+    model either, so each retrain costs only the new rows.
+
+    "warm" fits only the new rows (plus the rows leaving the window) with
+    IncrementalLogistic. Its scaler is fixed at the first fit, so the
+    stored curvature of earlier rows stays in the same coordinates.
+    max_train_rows limits training to the most recent rows; "full" then
+    rescales on that window, like a fresh StandardScaler.
+    """
+
+    def __init__(self, mode="full", max_train_rows=None):
+        if mode not in TRAINING_MODES:
+            raise ValueError(f"Unknown training mode '{mode}'. Choose from {TRAINING_MODES}")
+
+        self.mode = mode
+        self.max_train_rows = max_train_rows
+        self.last_key = None
+        self.scaler = None
+        self.model = None
+
+    def _new_model(self):
+        # sklearn (and scipy behind it) is imported on first fit, not at startup
+        from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+        if self.mode == "online":
+            return SGDClassifier(loss="log_loss", random_state=0)
+        if self.mode == "warm":
+            return IncrementalLogistic()
+        return LogisticRegression(max_iter=1000)
+
+    def update(self, X, y, keys=None):
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y)
+        keys = np.arange(len(X)) if keys is None else np.asarray(keys)
+
+        new = np.ones(len(X), dtype=bool) if self.last_key is None else keys > self.last_key
+        if not new.any():
+            return self
+
+        first = self.scaler is None
+        if first:
+            self.scaler = RunningScaler(X.shape[1])
+            self.model = self._new_model()
+
+        if self.mode == "online":
+            self.scaler.partial_fit(X[new])
+            self.model.partial_fit(self.scaler.transform(X[new]), y[new], classes=np.array([0, 1]))
+        elif self.mode == "warm":
+            # Rows seen before form a prefix; the window slides over it
+            seen = len(X) - int(new.sum())
+            start = max(len(X) - self.max_train_rows, 0) if self.max_train_rows else 0
+            seen_start = max(seen - self.max_train_rows, 0) if self.max_train_rows else 0
+            if first:
+                self.scaler.partial_fit(X[start:])
+            fresh = slice(max(seen, start), None)
+            dropped = slice(seen_start, min(start, seen))
+            self.model.partial_fit(
+                self.scaler.transform(X[fresh]), y[fresh],
+                self.scaler.transform(X[dropped]), y[dropped],
+            )
+        else:
+            if self.max_train_rows:
+                X, y = X[-self.max_train_rows:], y[-self.max_train_rows:]
+                self.scaler = RunningScaler(X.shape[1]).partial_fit(X)
+            else:
+                self.scaler.partial_fit(X[new])
+            self.model = self._new_model()
+            self.model.fit(self.scaler.transform(X), y)
+
+        self.last_key = keys[-1]
+        return self
+
+    def predict(self, X):
+        return self.model.predict(self.scaler.transform(np.asarray(X, dtype=float)))
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(self.scaler.transform(np.asarray(X, dtype=float)))
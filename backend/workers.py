@@ -0,0 +1,129 @@
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from metrics import record, record_all, traced_call
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+# Each class of work gets its own limit so a slow dependency
+# (e.g. Gemini) cannot starve the fast endpoints.
+#   data - blocking network / disk I/O (yfinance, bar store)
+#   cpu  - model fits, Monte Carlo, backtests (process pool)
+#   llm  - Gemini calls (async clients)
+DEFAULT_LIMITS = {
+    "data": int(os.getenv("DATA_CONCURRENCY", 16)),
+    "cpu": int(os.getenv("CPU_CONCURRENCY", os.cpu_count() or 2)),
+    "llm": int(os.getenv("LLM_CONCURRENCY", 4)),
+}
+
+# CPU_WORKERS=0 runs CPU work on threads instead of processes
+# (keeps in-process caches shared; handy for development).
+DEFAULT_CPU_WORKERS = int(os.getenv("CPU_WORKERS", DEFAULT_LIMITS["cpu"]))
+
+
+# =====================================================
+# WORK POOLS
+# =====================================================
+class WorkPools:
+    """
+    Bounded executors per work class plus in-flight counters.
+    """
+
+    def __init__(self, limits=None, cpu_workers=DEFAULT_CPU_WORKERS):
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.cpu_workers = cpu_workers
+
+        self.in_flight = {kind: 0 for kind in self.limits}
+        self._semaphores = {}
+        self._loop = None
+        self._thread_pools = {}
+        self._process_pool = None
+
+    def _semaphore(self, kind):
+        # Semaphores are bound to the running loop, so create them lazily,
+        # and again when another loop (e.g. a CLI's asyncio.run) takes over
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._semaphores = {}
+            self._loop = loop
+        if kind not in self._semaphores:
+            self._semaphores[kind] = asyncio.Semaphore(self.limits[kind])
+        return self._semaphores[kind]
+
+    def _threads(self, kind):
+        if kind not in self._thread_pools:
+            self._thread_pools[kind] = ThreadPoolExecutor(
+                max_workers=self.limits[kind], thread_name_prefix=f"{kind}-worker"
+            )
+        return self._thread_pools[kind]
+
+    def _cpu_executor(self):
+        if self.cpu_workers == 0:
+            return self._threads("cpu")
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.cpu_workers)
+        return self._process_pool
+
+    async def _run(self, kind, executor, fn, args, kwargs):
+        queued = time.perf_counter()
+        async with self._semaphore(kind):
+            record(f"{kind}_queue", time.perf_counter() - queued)
+            self.in_flight[kind] += 1
+            try:
+                loop = asyncio.get_running_loop()
+                # Spans timed inside the worker come back with the result
+                result, spans = await loop.run_in_executor(
+                    executor, functools.partial(traced_call, fn, *args, **kwargs)
+                )
+            finally:
+                self.in_flight[kind] -= 1
+        record_all(spans)
+        return result
+
+    async def run_io(self, fn, *args, **kwargs):
+        """
+        Runs blocking I/O on the data thread pool.
+        """
+        return await self._run("data", self._threads("data"), fn, args, kwargs)
+
+    async def run_cpu(self, fn, *args, **kwargs):
+        """
+        Runs CPU-bound work on the process pool. `fn` must be picklable.
+        """
+        return await self._run("cpu", self._cpu_executor(), fn, args, kwargs)
+
+    async def run_llm(self, coro_fn, *args, **kwargs):
+        """
+        Awaits an async LLM call under the llm concurrency limit.
+        """
+        queued = time.perf_counter()
+        async with self._semaphore("llm"):
+            record("llm_queue", time.perf_counter() - queued)
+            self.in_flight["llm"] += 1
+            try:
+                return await coro_fn(*args, **kwargs)
+            finally:
+                self.in_flight["llm"] -= 1
+
+    def stats(self):
+        return {
+            kind: {"limit": self.limits[kind], "in_flight": self.in_flight[kind]}
+            for kind in self.limits
+        }
+
+    def shutdown(self):
+        for pool in self._thread_pools.values():
+            pool.shutdown(wait=False)
+        self._thread_pools.clear()
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+        self._semaphores.clear()
+        self._loop = None
+
+
+pools = WorkPools()
@@ -98,6 +98,22 @@ export default function AnalysisPage() {
             if (response.ok) {
                 const result = await response.json();
                 setAnalysisData(result);
+
+                // AI insight streams in separately (Server-Sent Events)
+                if (!result.error && !result.ai_insight && result.insight_url) {
+                    const source = new EventSource(`http://127.0.0.1:8000${result.insight_url}`);
+                    let text = "";
+                    source.addEventListener("token", (event) => {
+                        text += JSON.parse((event as MessageEvent).data);
+                        setAnalysisData((prev: any) => prev && { ...prev, ai_insight: text });
+                    });
+                    source.addEventListener("done", (event) => {
+                        const full = JSON.parse((event as MessageEvent).data);
+                        setAnalysisData((prev: any) => prev && { ...prev, ai_insight: full });
+                        source.close();
+                    });
+                    source.onerror = () => source.close();
+                }
             } else {
                 console.error("Failed to fetch analysis data");
             }